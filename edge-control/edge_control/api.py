@@ -2,17 +2,17 @@ import asyncio
 import json
 import logging
 import time
-from typing import Any, Set
+from typing import Any, Dict, Set, Union
 
 from dataclasses import asdict
 from websockets import WebSocketServerProtocol  # type: ignore
 from websockets import serve as serve_ws  # type: ignore
 
-from edge_control import storage, topics
+from edge_control import framing, snapshot, storage, topics
 from edge_control.util.pubsub import Topic
 
 from .config import site_config
-from .robot import RobotState
+from .connections import ApiStatus, Connection
 
 """
 A WebSocket end-point for 
@@ -21,59 +21,151 @@ A WebSocket end-point for
 """
 
 logger = logging.getLogger(__name__)
-connections = set()  # type: Set[WebSocketServerProtocol]
+connections = {}  # type: Dict[WebSocketServerProtocol, Connection]
+trails = {}  # type: Dict[Connection, TrailClient]
+delta_clients = {}  # type: Dict[Connection, int]  # sequence number of last status snapshot sent
+binary_clients = {}  # type: Dict[Connection, Set[str]]  # topics sent in binary frames, see framing module
+batcher = framing.Batcher()
+BINARY_INTERVAL = 0.1  # s
 
 
-async def feed(topic: Topic):
+class TrailClient:
+    def __init__(self, trail: storage.Trail, cursor: int):
+        self.trail = trail
+        self.cursor = cursor  # sequence number of last record sent
+
+
+async def feed(topic: Topic, as_json: bool = True):
+    """Messages to the clients as JSON if as_json, and batched to the clients that receive the topic binary"""
     async for msg in topic.stream():
         try:
             logger.debug("Feed %s", msg)
-            await post_as_json(topic.name, asdict(msg))
+            binary = [c for c, names in binary_clients.items() if topic.name in names]
+            if binary:
+                batcher.add(topic.name, time.time(), msg)
+            if as_json and len(binary) < len(connections):
+                message = envelope(topic.name, asdict(msg))
+                for c in connections.values():
+                    if topic.name not in binary_clients.get(c, ()):
+                        c.post(topic.name, message)
         except ValueError:
             logger.exception("feed")
 
 
+async def binary_feed(interval: float = BINARY_INTERVAL):
+    """A frame per interval to each binary client, with the blocks encoded once for all"""
+    while True:
+        await asyncio.sleep(interval)
+        # record times are relative to the frame time
+        t = time.time()
+        blocks = batcher.flush(t)
+        if not blocks:
+            continue
+        for c, names in binary_clients.items():
+            data = framing.frame(t, blocks, names)
+            if data:
+                c.post("binary", data)
+
+
+def request_binary(connection: Connection, message: dict):
+    """Topics sent in binary frames from now on, none for all JSON"""
+    names = [name for name in message.get("topics") or [] if name in framing.TOPICS]
+    if names:
+        binary_clients[connection] = set(names)
+    else:
+        binary_clients.pop(connection, None)
+    connection.post("binary/schema", envelope("binary/schema", framing.schema(names, BINARY_INTERVAL)))
+
+
 async def status():
+    async for s in topics.robot_status.stream():
+        # clients in next snapshot
+        t = time.time()
+        ApiStatus.clients.set([c.status(t) for c in connections.values()], t)
+        # envelope(topic, ...) with the encoded snapshot
+        full = '{"topic": "status", "message": ' + s.encoded + "}"
+        delta = '{"topic": "status/delta", "message": ' + s.delta + "}"
+        for c in connections.values():
+            seq = delta_clients.get(c)
+            if seq is None:
+                c.post("status", full)
+            elif seq == s.seq - 1 and not c.pending("status/delta"):
+                c.post("status/delta", delta)
+                delta_clients[c] = s.seq
+            else:
+                # first or replacing a queued delta
+                c.post("status/delta", '{"topic": "status/delta", "message": ' + snapshot.keyframe(s) + "}")
+                delta_clients[c] = s.seq
+
+
+def send_trail(connection: Connection, client: TrailClient, reset: bool = False):
+    points = client.trail.since(client.cursor)
+    if points or reset:
+        if points:
+            client.cursor = points[-1][0]
+        message = {
+            "session": storage.session,
+            "cursor": client.cursor,
+            "resolution": client.trail.resolution,
+            "reset": reset,
+            "points": [[round(x, 3), round(y, 3)] for _, x, y in points],
+        }
+        connection.post("trail", envelope("trail", message))
+
+
+async def trail_feed(period: float = 1.0):
+    """Trail points added since last sent, to clients that have requested the trail"""
     while True:
-        await asyncio.sleep(1)
-        s = RobotState.as_dict(time.time())
-        logger.debug("API robot status: %s", s)
-        await post_as_json("status", s)
+        await asyncio.sleep(period)
+        for connection, client in list(trails.items()):
+            try:
+                send_trail(connection, client)
+            except Exception:
+                logger.exception("trail")
 
 
-async def post_map():
-    await post_as_json("map", {"exterior": site_config.exterior, "interiors": site_config.interiors})
+def request_trail(connection: Connection, message: dict):
+    """Starts sending the trail at the requested resolution (m), resuming from cursor within the same session"""
+    resolution = float(message.get("resolution") or 0.1)
+    cursor = message.get("cursor") or 0
+    reset = message.get("session") != storage.session
+    client = TrailClient(storage.track.trail(resolution), 0 if reset else cursor)
+    trails[connection] = client
+    send_trail(connection, client, reset)
 
 
-async def post_as_json(topic: str, message: Any):
+def envelope(topic: str, message: Any) -> str:
     from .util.json import dumps
 
-    envelope = {"topic": topic, "message": message}
-    await post(dumps(envelope))
+    return dumps({"topic": topic, "message": message})
+
+
+async def post_as_json(topic: str, message: Any):
+    await post(topic, envelope(topic, message))
 
 
-async def post(message: str):
-    """Post the message to all current connections"""
-    if connections:
-        # return exceptions to avoid one closed connection to block sending to others
-        await asyncio.gather(*[c.send(message) for c in connections], return_exceptions=True)
+async def post(topic: str, message: Union[str, bytes]):
+    """Queue the message to all current connections, each sent at the pace of the client"""
+    for c in connections.values():
+        c.post(topic, message)
 
 
 async def connection(ws: WebSocketServerProtocol, path: str):
     from .models.messages import MissionAbort, MissionStart, MoveCommand, StopCommand, CutCommand
 
     logger.info("Connection from %r %r", ws, path)
-    connections.add(ws)
+    client = Connection(ws)
+    client.start()
+    connections[ws] = client
     logger.info("Number of connections: %d", len(connections))
     try:
-        await post_map()
-        await post_as_json("robot_tracking", [asdict(message) for message in storage.get()])
+        client.post("map", envelope("map", {"exterior": site_config.exterior, "interiors": site_config.interiors}))
         async for msg in ws:
             # parse envelope and forward to topic...
             logger.debug("Received %r" % msg)
-            envelope = json.loads(msg)
-            topic = envelope.get("topic")
-            message = envelope.get("message")
+            received = json.loads(msg)
+            topic = received.get("topic")
+            message = received.get("message")
             if topic == "move/stop":
                 await topics.robot_command.publish(StopCommand())
             elif topic == "move" and message:
@@ -89,10 +181,24 @@ async def connection(ws: WebSocketServerProtocol, path: str):
                 await topics.mission_command.publish(MissionStart(message))
             elif topic == "mission/abort":
                 await topics.mission_command.publish(MissionAbort())
+            elif topic == "trail":
+                request_trail(client, message or {})
+            elif topic == "binary":
+                request_binary(client, message or {})
+            elif topic == "status" and message:
+                # status deltas from the next snapshot, see snapshot module
+                if message.get("delta"):
+                    delta_clients[client] = -1
+                else:
+                    delta_clients.pop(client, None)
             else:
                 logger.warning("Ignoring %s", msg)
     finally:
-        connections.remove(ws)
+        client.stop()
+        del connections[ws]
+        trails.pop(client, None)
+        delta_clients.pop(client, None)
+        binary_clients.pop(client, None)
         logger.info("Connection closed")
 
 
@@ -100,7 +206,11 @@ async def serve(host: str, port: int):
     # returns when all set up to serve
     logger.debug("Starting web socket api on port %s:%d...", host, port)
     asyncio.create_task(feed(topics.robot_tracking))
+    asyncio.create_task(feed(topics.obstacle_detection, as_json=False))
+    asyncio.create_task(binary_feed())
+    asyncio.create_task(snapshot.run())
     asyncio.create_task(status())
+    asyncio.create_task(trail_feed())
     await serve_ws(connection, host, port)
 
 
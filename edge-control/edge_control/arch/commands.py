@@ -0,0 +1,69 @@
+"""
+Command stage between robot_command and the serial writes in the arch drivers.
+
+Move commands are coalesced to the latest, such that the robot never executes stale commands queued up while the
+serial link was slow. Unchanged move commands are only written to refresh the timeout in the motor controller.
+"""
+
+import time
+from collections import deque
+from typing import AsyncGenerator, Deque, Optional, Tuple
+
+from edge_control.models.messages import MoveCommand, StopCommand, ToRobot
+from edge_control.util.pubsub import Topic
+from edge_control.util.status import Counter
+
+
+class CommandStatus:
+    written = Counter()
+    coalesced = Counter()  # replaced by a later move command before being written
+    suppressed = Counter()  # unchanged move command, not written
+
+
+def _unchanged(command: MoveCommand, last: Optional[MoveCommand]) -> bool:
+    if last is None or isinstance(command, StopCommand) or isinstance(last, StopCommand):
+        return False
+    return command.speed == last.speed and command.omega == last.omega
+
+
+async def commands(topic: Topic[ToRobot], refresh: float) -> AsyncGenerator[Tuple[ToRobot, bool], None]:
+    """
+    Yields commands in order, with at most one pending move command (and a stop), and whether to write it to the robot.
+    Unchanged move commands are yielded but not written, unless refresh (s) has passed since the last write.
+    """
+    queue = topic.subscription()
+    pending: Deque[ToRobot] = deque()
+    last: Optional[MoveCommand] = None
+    t_write = 0.0
+    while True:
+        if not pending:
+            pending.append(await queue.get())
+        while not queue.empty():
+            pending.append(queue.get_nowait())
+
+        moves = [command for command in pending if isinstance(command, MoveCommand)]
+        if len(moves) > 1:
+            # keep the latest move command, and the latest stop when followed by moves - a stop is never dropped
+            keep = {id(moves[-1])}
+            stops = [command for command in moves if isinstance(command, StopCommand)]
+            if stops:
+                keep.add(id(stops[-1]))
+            pending = deque(c for c in pending if not isinstance(c, MoveCommand) or id(c) in keep)
+            if len(moves) > len(keep):
+                CommandStatus.coalesced.inc(n=len(moves) - len(keep))
+
+        command = pending.popleft()
+        if not isinstance(command, MoveCommand):
+            yield command, True
+            continue
+
+        t = time.time()
+        if _unchanged(command, last) and t < t_write + refresh:
+            CommandStatus.suppressed.inc(t)
+            yield command, False
+            continue
+
+        last = command
+        t_write = t
+        CommandStatus.written.inc(t)
+        yield command, True
@@ -6,12 +6,13 @@ Feeds motor_command -> STM32 -> motor_state.
 import asyncio
 import logging
 import time
-
-import aioserial
+from typing import Optional
 
 from edge_control import topics
-from edge_control.config import robot_config
+from edge_control.arch.commands import commands as command_stage
+from edge_control.config import SerialConfig, robot_config
 from edge_control.models import messages as msgs
+from edge_control.util.serialport import SerialPort
 from edge_control.util.tasks import retry, start_tasks
 
 from . import messages
@@ -31,10 +32,9 @@ def from_move(message: msgs.MoveCommand) -> messages.MoveCommand:
     return messages.MoveCommand(message.speed, message.omega, message.timeout)
 
 
-async def _connect():
+async def _connect(device: SerialConfig):
     logger.info("Connecting to STM32")
-    device = robot_config.motor_control
-    with aioserial.AioSerial(device.port, device.baud_rate) as serial:
+    with SerialPort(device.port, device.baud_rate) as serial:
         logger.info("Connected to STM32")
 
         async def write(command: RobotCommand):
@@ -49,7 +49,7 @@ async def _connect():
             # initial cut power from config, can be modified with CutCommand, applied to every move command
             # cut_power = robot_config.mower.cut_power if robot_config.mower else 0
 
-            async for message in topics.robot_command.stream():
+            async for message, send in command_stage(topics.robot_command, robot_config.move_refresh):
                 logger.debug("robot_to_motor message: %r", message)
                 try:
                     if isinstance(message, msgs.StopCommand):
@@ -58,7 +58,9 @@ async def _connect():
                         HagedagStatus.cut_power.set(0)
                         await topics.odometry.publish(msgs.Odometry(time.time(), 0, 0))
                     elif isinstance(message, msgs.MoveCommand):
-                        await write(from_move(message))
+                        # odometry is derived from the commands, also publish when an unchanged command is not written
+                        if send:
+                            await write(from_move(message))
                         await topics.odometry.publish(msgs.Odometry(time.time(), message.speed, message.omega))
                         # TODO: handle cutter separately, or derive MoveCutCommand from MoveCommand, add payloads to Move?
                     elif isinstance(message, msgs.CutCommand):
@@ -107,9 +109,11 @@ async def _connect():
         await start_tasks({commands(), status()})
 
 
-async def motor_driver():
+async def motor_driver(device: Optional[SerialConfig] = None):
     logger.info("Starting hagedag driver")
+    device = device or robot_config.motor_control
+    assert device, "No motor control configuration"
     loop = asyncio.get_event_loop()
     if robot_config.mower is not None:
         cutter.start_watch_dog(loop)
-    await retry(_connect, 2)
+    await retry(lambda: _connect(device), 2)
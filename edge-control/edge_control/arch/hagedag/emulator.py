@@ -0,0 +1,163 @@
+"""
+STM32 motor controller emulator on a pseudo-terminal, speaking the line protocol of the hagedag driver:
+
+    m <speed ticks/s> <rotation ticks/s> <timeout>  - move until timeout (robot time)
+    .                                                - stop
+    !                                                - reset, robot time restarts at 0
+
+responding with Ack/Timeout for commands and reporting Time, Speed, Battery and Status,
+driven by a kinematic model.
+
+    python -m edge_control.arch.hagedag.emulator
+
+and point motor_control port in robot.yaml to the printed device.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Callable, List, Optional
+
+from edge_control.models.turtle import Turtle
+from edge_control.util.pty import PseudoTerminal
+
+from . import RobotModel
+
+logger = logging.getLogger(__name__)
+
+
+class Stm32Emulator:
+    def __init__(self, rate: float = 10.0, acceleration: float = 0.5, battery: float = 12.4):
+        self.rate = rate  # Hz, Time and Speed reports
+        self.acceleration = acceleration  # m/s2, per wheel
+        self.battery = battery  # V
+        self.t0 = time.time()
+        self.turtle = Turtle()
+        self.left = 0.0  # m/s
+        self.right = 0.0  # m/s
+        self.left_set = 0.0
+        self.right_set = 0.0
+        self.timeout: Optional[float] = None  # robot time
+        self.move = ""  # move command as interpreted, for Ack and Timeout
+        self.t_update: Optional[float] = None
+        self.commands = 0
+        self.timeouts = 0
+        self.errors = 0
+        # called with time and line for every received command, e.g. to measure latency
+        self.on_command: Optional[Callable[[float, str], None]] = None
+
+    def time(self, t: float) -> float:
+        return t - self.t0
+
+    def _stop(self):
+        self.left_set = self.right_set = 0.0
+        self.timeout = None
+
+    def handle(self, line: str, t: float) -> List[str]:
+        """Returns responses to the command line received at time t"""
+        segments = line.split()
+        if not segments:
+            return []
+        self.commands += 1
+        if self.on_command:
+            self.on_command(t, line)
+        cmd = segments[0]
+        try:
+            if cmd == "m" and len(segments) == 4:
+                ticks, rotation, timeout = (float(s) for s in segments[1:])
+                self.move = f"m {ticks:.2f} {rotation:.2f} {timeout:.3f}"
+                if timeout <= self.time(t):
+                    self.timeouts += 1
+                    self._stop()
+                    return [f"Timeout {self.time(t):.3f} {self.move}"]
+                self.left_set = (ticks - rotation) * RobotModel.DIST_PER_TICK
+                self.right_set = (ticks + rotation) * RobotModel.DIST_PER_TICK
+                self.timeout = timeout
+                return [f"Ack {self.time(t):.3f} {self.move}"]
+            if cmd == "." and len(segments) == 1:
+                self._stop()
+                return [f"Ack {self.time(t):.3f} ."]
+            if cmd == "!" and len(segments) == 1:
+                self._stop()
+                self.left = self.right = 0.0
+                self.t0 = t
+                return [f"Ack {self.time(t):.3f} !"]
+        except ValueError:
+            pass
+        self.errors += 1
+        return [f"Error {line}"]
+
+    def update(self, t: float) -> List[str]:
+        """Advance the model to time t, returns Timeout if the move command expired"""
+        responses = []
+        if self.timeout is not None and self.time(t) >= self.timeout:
+            self.timeouts += 1
+            self._stop()
+            responses.append(f"Timeout {self.time(t):.3f} {self.move}")
+        if self.t_update is not None:
+            dt = t - self.t_update
+            dv = self.acceleration * dt
+            self.left += max(-dv, min(dv, self.left_set - self.left))
+            self.right += max(-dv, min(dv, self.right_set - self.right))
+            self.turtle.update_distances(self.left * dt, self.right * dt, RobotModel.WHEEL_BASE)
+        self.t_update = t
+        return responses
+
+    def report(self, t: float, full: bool) -> List[str]:
+        ticks = 1 / RobotModel.DIST_PER_TICK
+        reports = [
+            f"Time {self.time(t):.3f}",
+            f"Speed {self.left * ticks:.0f} {self.right * ticks:.0f} {self.left_set * ticks:.0f} {self.right_set * ticks:.0f}",
+        ]
+        if full:
+            reports.append(f"Battery {self.battery:.2f}")
+            reports.append("Status 0")
+        return reports
+
+    async def _input(self, pty: PseudoTerminal):
+        buffer = b""
+        while True:
+            buffer += await pty.read()
+            *lines, buffer = buffer.split(b"\n")
+            t = time.time()
+            for line in lines:
+                responses = self.handle(line.decode("ascii", errors="replace").strip(), t)
+                if responses:
+                    pty.write("".join(r + "\n" for r in responses).encode("ascii"))
+
+    async def _output(self, pty: PseudoTerminal):
+        i = 0
+        while True:
+            await asyncio.sleep(1 / self.rate)
+            t = time.time()
+            responses = self.update(t) + self.report(t, i % int(self.rate) == 0)
+            pty.write("".join(r + "\n" for r in responses).encode("ascii"))
+            i += 1
+
+    async def run(self, pty: PseudoTerminal):
+        await asyncio.gather(self._input(pty), self._output(pty))
+
+    def __str__(self):
+        return f"commands {self.commands} timeouts {self.timeouts} errors {self.errors} {self.turtle}"
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="edge_control.arch.hagedag.emulator", description="STM32 emulator")
+    parser.add_argument("--rate", type=float, default=10.0, help="Time and Speed reports per second")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Verbose output")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.verbose and logging.DEBUG or logging.INFO)
+    emulator = Stm32Emulator(args.rate)
+
+    async def _run():
+        with PseudoTerminal() as pty:
+            logger.info("STM32 emulator on %s", pty.name)
+            await emulator.run(pty)
+
+    asyncio.run(_run())
+
+
+if __name__ == "__main__":
+    main()
@@ -5,14 +5,15 @@ Feeds motor_command -> Arduino -> motor_state.
 
 import asyncio
 import logging
-
-import aioserial
+from typing import Optional
 
 from edge_control import topics
-from edge_control.config import robot_config
+from edge_control.arch.commands import commands as command_stage
+from edge_control.config import SerialConfig, robot_config
 from edge_control.models.messages import CutCommand, MoveCommand, Odometry, StopCommand, Time
+from edge_control.util.serialport import SerialPort
 
-from .frame import frame, read_frames
+from .frame import FrameReader, frame, read_frames
 from .messages import Heartbeat, MotorStop, ToMotorController, parse
 from .motor import from_move, to_move
 from .status import HusqvarnaStatus
@@ -20,12 +21,13 @@ from .status import HusqvarnaStatus
 logger = logging.getLogger(__name__)
 
 
-async def motor_driver():
+async def motor_driver(device: Optional[SerialConfig] = None):
+    device = device or robot_config.motor_control
+    assert device, "No motor control configuration"
 
     while True:
         logger.info("Connecting to Arduino")
-        device = robot_config.motor_control
-        arduino = aioserial.AioSerial(device.port, device.baud_rate)
+        arduino = SerialPort(device.port, device.baud_rate)
         logger.info("Connected to Arduino")
 
         async def write(command: ToMotorController):
@@ -42,8 +44,10 @@ async def motor_driver():
         async def commands():
             # initial cut power from config, can be modified with CutCommand, applied to every move command
             cut_power = robot_config.mower.cut_power
-            async for command in topics.robot_command.stream():
+            async for command, send in command_stage(topics.robot_command, robot_config.move_refresh):
                 logger.debug("Command %r", command)
+                if not send:
+                    continue
                 if isinstance(command, StopCommand):
                     await write(MotorStop())
                 elif isinstance(command, MoveCommand):
@@ -56,7 +60,11 @@ async def motor_driver():
 
         _commands = asyncio.create_task(commands())
 
-        async for t, message in read_frames(arduino):
+        # start bit, 8 data bits, stop bit
+        reader = FrameReader(10 / device.baud_rate)
+        async for t, message in read_frames(arduino, reader):
+            HusqvarnaStatus.resyncs.set(reader.resyncs, t)
+            HusqvarnaStatus.discarded.set(reader.discarded, t)
             try:
                 logger.debug("From arduino: %s", message.hex())
                 m = parse(t, message)
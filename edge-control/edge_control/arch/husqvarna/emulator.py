@@ -0,0 +1,146 @@
+"""
+Arduino motor controller emulator on a pseudo-terminal, speaking the framed binary protocol of the husqvarna driver:
+MotorStop and MotorSpeed (with optional end time millis) requests, Heartbeat at 20 Hz with low pass filtered
+wheel tick counts and Error responses, driven by a kinematic model.
+
+    python -m edge_control.arch.husqvarna.emulator
+
+and point motor_control port in robot.yaml to the printed device.
+"""
+
+import asyncio
+import logging
+import struct
+import time
+from typing import Callable, List, Optional
+
+from edge_control.models.turtle import Turtle
+from edge_control.util.pty import PseudoTerminal
+
+from .frame import FrameReader, frame
+from .messages import _REQ_MOTOR_SPEED, _REQ_MOTOR_STOP, _RESP_ERROR, _RESP_HEARTBEAT, ErrorCode
+from .motor import _ticks_per_dist, _update_rate
+
+logger = logging.getLogger(__name__)
+
+
+def heartbeat(millis: int, count0: int, count1: int) -> bytes:
+    return struct.pack("<BLhh", _RESP_HEARTBEAT, millis & 0xFFFFFFFF, count0, count1)
+
+
+def error(code: ErrorCode, message: str = "") -> bytes:
+    return bytes([_RESP_ERROR, code.value]) + message.encode("ascii")
+
+
+class ArduinoEmulator:
+    def __init__(self, wheel_base: float):
+        self.wheel_base = wheel_base
+        self.t0 = time.time()
+        self.turtle = Turtle()
+        self.deltas = [0, 0, 0]  # ticks per update, right, left (reversed), cutter
+        self.counts = [0, 0]  # 2-bit low pass filtered ticks per update
+        self.end_millis: Optional[int] = None
+        self.reader = FrameReader()
+        self.commands = 0
+        self.timeouts = 0
+        self.errors = 0
+        # called with time and message for every received request, e.g. to measure latency
+        self.on_command: Optional[Callable[[float, bytes], None]] = None
+
+    def millis(self, t: float) -> int:
+        return int(1000 * (t - self.t0))
+
+    def _stop(self):
+        self.deltas = [0, 0, 0]
+        self.end_millis = None
+
+    def handle(self, message: bytes, t: float) -> List[bytes]:
+        """Returns response messages to the request received at time t"""
+        if not message:
+            # empty frame, no request to handle
+            self.errors += 1
+            return [error(ErrorCode.invalid_frame)]
+        self.commands += 1
+        if self.on_command:
+            self.on_command(t, message)
+        if message == bytes([_REQ_MOTOR_STOP]):
+            self._stop()
+            return []
+        if message[0] == _REQ_MOTOR_SPEED and len(message) in (4, 8):
+            deltas = list(struct.unpack_from("bbb", message, 1))
+            end_millis = struct.unpack_from("<L", message, 4)[0] if len(message) == 8 else None
+            if end_millis is not None and end_millis <= self.millis(t):
+                self.timeouts += 1
+                self._stop()
+                return [error(ErrorCode.motor_speed_end_time)]
+            self.deltas = deltas
+            self.end_millis = end_millis
+            return []
+        self.errors += 1
+        return [error(ErrorCode.invalid_request, message[:1].hex())]
+
+    def update(self, t: float) -> List[bytes]:
+        """One update period at time t: returns Heartbeat, and Error if the motor speed end time passed"""
+        responses = []
+        if self.end_millis is not None and self.millis(t) >= self.end_millis:
+            self.timeouts += 1
+            self._stop()
+            responses.append(error(ErrorCode.motor_speed_end_time))
+        right, left = self.deltas[0], -self.deltas[1]
+        self.turtle.update_distances(left / _ticks_per_dist, right / _ticks_per_dist, self.wheel_base)
+        for i in range(2):
+            # count += ticks - count / 4, settles at 4 * ticks per update, symmetric around 0
+            self.counts[i] += self.deltas[i] - int(self.counts[i] / 4)
+        responses.append(heartbeat(self.millis(t), *self.counts))
+        return responses
+
+    def write(self, pty: PseudoTerminal, messages: List[bytes]):
+        if messages:
+            pty.write(b"".join(frame(m) for m in messages))
+
+    async def _input(self, pty: PseudoTerminal):
+        while True:
+            data = await pty.read()
+            t = time.time()
+            errors = self.reader.resyncs
+            for _, message in self.reader.feed(data, t):
+                self.write(pty, self.handle(message, t))
+            if self.reader.resyncs > errors:
+                self.write(pty, [error(ErrorCode.invalid_frame)])
+
+    async def _output(self, pty: PseudoTerminal):
+        period = 1 / _update_rate
+        t_next = time.time()
+        while True:
+            t_next += period
+            await asyncio.sleep(max(0.0, t_next - time.time()))
+            self.write(pty, self.update(time.time()))
+
+    async def run(self, pty: PseudoTerminal):
+        await asyncio.gather(self._input(pty), self._output(pty))
+
+    def __str__(self):
+        return f"commands {self.commands} timeouts {self.timeouts} errors {self.errors} {self.turtle}"
+
+
+def main():
+    import argparse
+
+    from edge_control.config import robot_config
+
+    parser = argparse.ArgumentParser(prog="edge_control.arch.husqvarna.emulator", description="Arduino emulator")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Verbose output")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.verbose and logging.DEBUG or logging.INFO)
+    emulator = ArduinoEmulator(robot_config.wheel_base)
+
+    async def _run():
+        with PseudoTerminal() as pty:
+            logger.info("Arduino emulator on %s", pty.name)
+            await emulator.run(pty)
+
+    asyncio.run(_run())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 import time
+from collections import deque
+from typing import Deque, List, Optional, Tuple
 
-import aioserial
+from edge_control.util.serialport import SerialPort
 
 _FRAME_START = 0xDE
 _FRAME_END = 0xAD
@@ -10,17 +12,78 @@ def frame(message: bytes) -> bytes:
     return bytes([_FRAME_START, len(message)]) + message + bytes([_FRAME_END])
 
 
-async def read_frames(device: aioserial.AioSerial):
+class FrameReader:
+    """
+    Extracts frames from bulk reads: start, length, message, end.
+    Resynchronizes on the next start byte when the end byte is missing.
+    """
+
+    def __init__(self, byte_time: float = 0.0):
+        # time per byte on the line, to estimate the arrival time of bytes within a read
+        self.byte_time = byte_time
+        self._buffer = bytearray()
+        self._position = 0  # stream position of the first byte in the buffer
+        self._reads: Deque[Tuple[int, float]] = deque()  # stream position after each read and its time
+        self.frames = 0
+        self.resyncs = 0
+        self.discarded = 0
+
+    def remaining(self) -> int:
+        """Number of bytes required to complete the next frame"""
+        if len(self._buffer) < 2:
+            return 2 - len(self._buffer)
+        return max(1, self._buffer[1] + 3 - len(self._buffer))
+
+    def _arrival(self, position: int) -> float:
+        for end, t in self._reads:
+            if position < end:
+                return t - (end - 1 - position) * self.byte_time
+        raise ValueError("Position not in buffer")
+
+    def _consume(self, n: int):
+        del self._buffer[:n]
+        self._position += n
+        while self._reads and self._reads[0][0] <= self._position:
+            self._reads.popleft()
+
+    def _discard(self, n: int):
+        self.discarded += n
+        self._consume(n)
+
+    def feed(self, data: bytes, t: float) -> List[Tuple[float, bytes]]:
+        """Add data read at time t, returns all complete frames with the arrival time of their start byte"""
+        self._buffer += data
+        self._reads.append((self._position + len(self._buffer), t))
+        frames = []
+        while self._buffer:
+            i = self._buffer.find(_FRAME_START)
+            if i < 0:
+                self._discard(len(self._buffer))
+                break
+            if i > 0:
+                self._discard(i)
+            if len(self._buffer) < 2:
+                break
+            length = self._buffer[1]
+            if len(self._buffer) < length + 3:
+                break
+            if self._buffer[length + 2] != _FRAME_END:
+                # start byte was part of a corrupt frame or data, search from the next byte
+                self.resyncs += 1
+                self._discard(1)
+                continue
+            frames.append((self._arrival(self._position), bytes(self._buffer[2 : length + 2])))
+            self._consume(length + 3)
+        self.frames += len(frames)
+        return frames
+
+
+async def read_frames(device: SerialPort, reader: Optional[FrameReader] = None):
+    if reader is None:
+        # start bit, 8 data bits, stop bit
+        reader = FrameReader(10 / device.baudrate)
     while True:
-        ch = await device.read_async()
-        while ord(ch) != _FRAME_START:
-            ch = await device.read_async()
-
-        # time stamp beginning of frame
-        t = time.time()
-        ch = await device.read_async()
-        frame_length = ord(ch)
-        data = await device.read_async(frame_length)
-        ch = await device.read_async()
-        if ord(ch) == _FRAME_END:
-            yield t, data
+        # at least the rest of the next frame, and anything else already received
+        data = await device.read_async(max(reader.remaining(), device.in_waiting))
+        for t, message in reader.feed(data, time.time()):
+            yield t, message
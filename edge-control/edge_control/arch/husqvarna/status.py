@@ -4,6 +4,9 @@ from edge_control.util.status import Status
 class HusqvarnaStatus:
     speed = Status[float]()
     omega = Status[float]()
+    # serial link frame errors
+    resyncs = Status[int]()
+    discarded = Status[int]()  # bytes
 
     @staticmethod
     def fault(t: float):
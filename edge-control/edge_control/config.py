@@ -5,17 +5,21 @@ import functools
 import json
 import math
 from enum import Enum
-from typing import List, Optional, Tuple
+from typing import TYPE_CHECKING, Callable, Dict, Generic, List, Optional, Tuple, TypeVar, cast
 
-import shapely.ops
 from dataclasses import dataclass, field
-from shapely.geometry import Point, Polygon
 
-from .gps.coordinates import UTM, LatLon
-from .gps.ntrip import NtripConfig
-from .map import geojson
 from .util.config import filepath, read_config
 
+if TYPE_CHECKING:
+    # imported where used, such that importing the configuration is fast
+    from shapely.geometry import Polygon
+
+    from .gps.coordinates import UTM
+    from .map.tagmap import TagMap
+
+T = TypeVar("T")
+
 
 class RobotType(Enum):
     simulation = 1
@@ -62,6 +66,10 @@ class RealSenseConfig:
     reference_tags: List[int]
     driver: str = "driver1"
     depth: bool = True
+    depth_file: Optional[str] = None  # frames recorded with util.framefile, replayed instead of the depth camera
+    depth_record: Optional[str] = None  # record depth frames to file
+    tag_fov: float = 2.8  # radians, horizontal field of view where tags are expected
+    tag_range: float = 6.0  # m, max distance to detected tags
 
 
 @dataclass(frozen=True)
@@ -80,9 +88,13 @@ class SiteReferenceConfig:
 
     @functools.cached_property
     def _utm0(self) -> UTM:
+        from .gps.coordinates import LatLon
+
         return LatLon(self.latitude, self.longitude).utm()
 
     def to_site(self, lat: float, lon: float, _height: float = 0) -> Tuple[float, float]:
+        from .gps.coordinates import LatLon
+
         return self._to_site(LatLon(lat, lon).utm())
 
     def _to_site(self, utm: UTM) -> Tuple[float, float]:
@@ -138,11 +150,14 @@ class TagConfig:
     def load(filename: str = "tags.yaml") -> TagConfig:
         return read_config(filename, TagConfig)
 
+    @functools.cached_property
+    def map(self) -> TagMap:
+        from .map.tagmap import TagMap
+
+        return TagMap(self.tags)
+
     def get(self, tag_id: int) -> Optional[Tag]:
-        for tag in self.tags:
-            if tag.id == tag_id:
-                return tag
-        return None
+        return self.map.get(tag_id)
 
 
 @dataclass(frozen=True)
@@ -169,6 +184,8 @@ class SiteConfig:
 
     @functools.cached_property
     def shape(self) -> Polygon:
+        from shapely.geometry import Polygon
+
         # create shape from configured exterior and interiors
         exterior = [(p.x, p.y) for p in self.exterior]
         interiors = [[(p.x, p.y) for p in interior] for interior in self.interiors]
@@ -176,6 +193,8 @@ class SiteConfig:
       
 
     def on_site(self, x: float, y: float, buffer: float):
+        from shapely.geometry import Point
+
         # more efficient to buffer shape (on to many) than to buffer point (many to many)?
         return self.shape.buffer(-buffer).contains(Point(x, y))
         # return self.shape.contains(Point(x, y).buffer(buffer))
@@ -191,6 +210,10 @@ class SiteConfig:
                 # map to exterior and interiors in site coordinates
                 with filepath(filename).parent.joinpath(sc.geojson).open() as file:
                     feature = json.load(file)
+                import shapely.ops
+
+                from .map import geojson
+
                 shape = geojson.to_shape(feature)
                 if sc.reference:
 
@@ -274,6 +297,23 @@ class RoombaConfig:
     wheel_scale_right: float = 1.0
 
 
+@dataclass(frozen=True)
+class OutboxConfig:
+    file: str = "outbox.sqlite"  # messages not yet published to MQTT
+    max_bytes: int = 10_000_000  # of payloads queued, the oldest are dropped beyond
+    rate: float = 10.0  # messages/s, max publish rate of the queue
+    batch: int = 10  # messages
+
+
+@dataclass(frozen=True)
+class PublishPolicy:
+    qos: Optional[int] = None  # None for the default of the topic
+    window: float = 0  # s, messages within the window are published together at its end, 0 for immediately
+    coalesce: bool = False  # only the latest message of the window
+    batch: int = 0  # max messages per payload, as a JSON array, 0 to publish messages separately
+    max_rate: float = 0  # publishes/s of the messages pending, 0 for unlimited
+
+
 @dataclass(frozen=True)
 class RobotConfig:
     id: str
@@ -293,12 +333,30 @@ class RobotConfig:
     motor_control: Optional[SerialConfig]
     camera: CameraConfig = CameraConfig(0.0, 0.0)
     ip_address: str = "0.0.0.0"
+    move_refresh: float = 0.5  # s, unchanged move commands are only resent at this interval to refresh the timeout
+    tracking_capacity: int = 100_000  # tracking history records in memory
+    tracking_retention: float = 0  # s, max age of tracking history sent to clients, 0 for all in memory
+    tracking_directory: Optional[str] = None  # append tracking history to a file per session in the directory
+    status_keyframe: int = 0  # publish status deltas on MQTT with a keyframe every n s, 0 for the full status every s
+    outbox: Optional[OutboxConfig] = None  # queue mission reports and gauge captures on disk while offline
+    mqtt_topics: Dict[str, PublishPolicy] = field(default_factory=dict)  # by MQTT topic
 
     @staticmethod
     def load(filename: str = "robot.yaml") -> RobotConfig:
         return read_config(filename, RobotConfig)
 
 
+@dataclass
+class NtripConfig:
+    server: str
+    port: int
+    mount_point: str
+    username: Optional[str]
+    password: str = ""
+    interval: float = 10  # seconds
+    site: bool = False
+
+
 @dataclass(frozen=True)
 class GpsConfig:
     gps: Optional[SerialConfig] = None
@@ -338,11 +396,47 @@ def load_default(clz, filename=None):
         return clz()
 
 
-# Configuration singletons
-robot_config = RobotConfig.load()
-site_config = SiteConfig.load()
-mission_config = MissionConfig.load()
-mission_config.validate()
-gps_config: Optional[GpsConfig] = load_optional(GpsConfig)
-tag_config: Optional[TagConfig] = load_optional(TagConfig)
-simulation_config: Optional[SimulationConfig] = load_optional(SimulationConfig)
+class Lazy(Generic[T]):
+    """
+    Configuration loaded (or object created) on first access of an attribute, or truth value for optional
+    configuration
+    """
+
+    def __init__(self, load: Callable[[], T]):
+        self._load = load
+
+    @functools.cached_property
+    def _value(self) -> T:
+        return self._load()
+
+    def __getattr__(self, name: str):
+        if name in ("_load", "_value"):
+            # not initialized, e.g. copied
+            raise AttributeError(name)
+        return getattr(self._value, name)
+
+    def __bool__(self) -> bool:
+        return bool(self._value)
+
+    def __repr__(self) -> str:
+        return repr(self._value)
+
+
+def resolve(config: T) -> T:
+    """The configuration itself, e.g. for serialization"""
+    return config._value if isinstance(config, Lazy) else config  # type: ignore
+
+
+def _mission_config() -> MissionConfig:
+    config = MissionConfig.load()
+    config.validate()
+    return config
+
+
+# Configuration singletons, loaded on first use
+robot_config = cast(RobotConfig, Lazy(RobotConfig.load))
+site_config = cast(SiteConfig, Lazy(SiteConfig.load))
+mission_config = cast(MissionConfig, Lazy(_mission_config))
+gps_config = cast(Optional[GpsConfig], Lazy(lambda: load_optional(GpsConfig)))
+tag_config = cast(Optional[TagConfig], Lazy(lambda: load_optional(TagConfig)))
+simulation_config = cast(Optional[SimulationConfig], Lazy(lambda: load_optional(SimulationConfig)))
@@ -0,0 +1,117 @@
+"""
+WebSocket client connections with an outbound queue and writer task each, such that a slow client does not hold
+back the others. Messages of conflated topics are replaced by the latest while queued. A client falling too far
+behind is disconnected.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Collection, Deque, Dict, Optional, Tuple, Union
+
+from dataclasses import dataclass
+
+from .util.status import Counter, Status
+
+logger = logging.getLogger(__name__)
+Message = Union[str, bytes]
+CONFLATE = ("status", "status/delta", "robot_tracking")  # only the latest is of interest
+
+
+@dataclass
+class ClientStatus:
+    address: str
+    queued: int
+    lag: float  # s, age of oldest queued message
+    sent: int
+    conflated: int
+
+
+class ApiStatus:
+    clients = Status[list]()  # list of ClientStatus
+    conflated = Counter()  # messages replaced by a later message of the same topic before sent
+    disconnected = Counter()  # clients disconnected for falling behind
+
+
+class Connection:
+    def __init__(self, ws, conflate: Collection[str] = CONFLATE, limit: int = 100, max_lag: float = 30):
+        self.ws = ws
+        self.conflate = conflate
+        self.limit = limit  # max queued messages
+        self.max_lag = max_lag  # s
+        self.sent = 0
+        self.conflated = 0
+        self.closed: Optional[str] = None  # reason
+        self._pending: Deque[Tuple[float, str, Optional[Message]]] = deque()  # (time, topic, message or in _latest)
+        self._latest: Dict[str, Message] = {}
+        self._ready = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+
+    @property
+    def address(self) -> str:
+        return str(getattr(self.ws, "remote_address", None))
+
+    def start(self):
+        self._writer = asyncio.create_task(self._write())
+
+    def lag(self, t: Optional[float] = None) -> float:
+        return (t or time.time()) - self._pending[0][0] if self._pending else 0.0
+
+    def pending(self, topic: str) -> bool:
+        """True if a message of a conflated topic is queued"""
+        return topic in self._latest
+
+    def post(self, topic: str, message: Message):
+        """Queues message (text or binary) for sending, without waiting for the client"""
+        if self.closed:
+            return
+        if topic in self.conflate:
+            if topic in self._latest:
+                self._latest[topic] = message
+                self.conflated += 1
+                ApiStatus.conflated.inc()
+                return
+            self._latest[topic] = message
+            self._pending.append((time.time(), topic, None))
+        else:
+            self._pending.append((time.time(), topic, message))
+        if len(self._pending) > self.limit:
+            self.close("queue full")
+        elif self.lag() > self.max_lag:
+            self.close("lagging %.1f s" % self.lag())
+        else:
+            self._ready.set()
+
+    async def _write(self):
+        try:
+            while True:
+                while not self._pending:
+                    self._ready.clear()
+                    await self._ready.wait()
+                _, topic, message = self._pending.popleft()
+                if message is None:
+                    message = self._latest.pop(topic)
+                await self.ws.send(message)
+                self.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # connection closed, reader ends too
+            logger.debug("Writer %s: %r", self.address, e)
+
+    def close(self, reason: str):
+        logger.warning("Disconnecting %s: %s", self.address, reason)
+        self.closed = reason
+        ApiStatus.disconnected.inc()
+        self.stop()
+        self._pending.clear()
+        self._latest.clear()
+        asyncio.create_task(self.ws.close(1008, reason))
+
+    def stop(self):
+        if self._writer:
+            self._writer.cancel()
+
+    def status(self, t: float) -> ClientStatus:
+        return ClientStatus(self.address, len(self._pending), self.lag(t), self.sent, self.conflated)
@@ -0,0 +1,112 @@
+"""
+Binary framing of high-rate topics for WebSocket clients that negotiate it on connect, JSON is the default.
+
+The client requests the topics to receive binary:
+
+    {"topic": "binary", "message": {"topics": ["robot_tracking", "obstacle_detection"]}}
+
+and is answered with the schema of the topics granted, {"interval": 0.1, "topics": {name: {"id", "fields"}}}.
+The messages of those topics are then no longer sent as JSON but batched per frame interval, one binary
+WebSocket message per interval, all little-endian:
+
+    float64 frame time (s)
+    per topic: uint8 topic id, uint8 fields per record, uint16 record count, records of float32 fields
+
+The first field of a record is the time (s) of the message relative to the frame time.
+"""
+
+import math
+import struct
+from typing import Any, Callable, Collection, Dict, Iterable, List, Tuple
+
+import numpy as np
+from dataclasses import dataclass
+
+from .models.messages import ObstacleDetection
+from .models.state import State
+
+HEADER = struct.Struct("<d")
+BLOCK = struct.Struct("<BBH")
+MAX_RECORDS = 0xFFFF  # per topic and frame
+
+
+@dataclass(frozen=True)
+class BinaryTopic:
+    id: int
+    name: str
+    fields: Tuple[str, ...]  # after dt
+    record: Callable[[Any], Tuple[float, ...]]  # message to fields
+
+    def schema(self) -> dict:
+        return {"id": self.id, "fields": ["dt", *self.fields]}
+
+
+def _tracking(s: State) -> Tuple[float, ...]:
+    return s.x, s.y, s.theta
+
+
+def _obstacle(o: ObstacleDetection) -> Tuple[float, ...]:
+    # zones as bits 0-3 from left
+    flags = o.left | o.center_left << 1 | o.center_right << 2 | o.right << 3
+    return float(flags), math.nan if o.distance is None else o.distance
+
+
+TOPICS: Dict[str, BinaryTopic] = dict(
+    (t.name, t)
+    for t in (
+        BinaryTopic(1, "robot_tracking", ("x", "y", "theta"), _tracking),
+        BinaryTopic(2, "obstacle_detection", ("flags", "distance"), _obstacle),
+    )
+)
+
+
+def schema(names: Iterable[str], interval: float) -> dict:
+    return {"interval": interval, "topics": dict((name, TOPICS[name].schema()) for name in names if name in TOPICS)}
+
+
+class Batcher:
+    """Records of the binary topics received in the current frame interval"""
+
+    def __init__(self):
+        self._records: Dict[str, List[Tuple[float, ...]]] = {}  # name: [(t, fields...)]
+
+    def add(self, name: str, t: float, message: Any):
+        records = self._records.setdefault(name, [])
+        if len(records) < MAX_RECORDS:
+            records.append((t, *TOPICS[name].record(message)))
+
+    def flush(self, t: float) -> Dict[str, bytes]:
+        """Encoded block per topic of the records since the last flush, relative to frame time t"""
+        blocks = {}
+        for name, records in self._records.items():
+            if records:
+                topic = TOPICS[name]
+                data = np.array(records, dtype="<f8")
+                data[:, 0] -= t
+                blocks[name] = BLOCK.pack(topic.id, data.shape[1], len(data)) + data.astype("<f4").tobytes()
+        self._records.clear()
+        return blocks
+
+
+def frame(t: float, blocks: Dict[str, bytes], names: Collection[str]) -> bytes:
+    """Frame of the blocks of topics in names, or empty if none"""
+    parts = [block for name, block in blocks.items() if name in names]
+    return HEADER.pack(t) + b"".join(parts) if parts else b""
+
+
+def decode(data: bytes) -> Tuple[float, Dict[str, np.ndarray]]:
+    """Frame time and records (count, fields) per topic, with record times absolute"""
+    names = dict((topic.id, name) for name, topic in TOPICS.items())
+    (t,) = HEADER.unpack_from(data)
+    offset = HEADER.size
+    records = {}
+    while offset < len(data):
+        topic_id, fields, count = BLOCK.unpack_from(data, offset)
+        offset += BLOCK.size
+        size = 4 * fields * count
+        block = np.frombuffer(data, dtype="<f4", count=fields * count, offset=offset).reshape(count, fields)
+        offset += size
+        values = block.astype(float)
+        values[:, 0] += t
+        records[names.get(topic_id, str(topic_id))] = values
+    return t, records
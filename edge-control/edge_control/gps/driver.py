@@ -4,11 +4,10 @@ GPS client that receives RTK corrections from a NTRIP service.
 
 import logging
 
-import aioserial
-
 from edge_control import topics
 from edge_control.config import GpsConfig
 
+from ..util.serialport import SerialPort
 from ..util.tasks import retry, start_task, start_tasks
 from . import nmea_driver, ubx_driver
 from .ntrip import ntrip_client
@@ -20,7 +19,7 @@ logger = logging.getLogger(__name__)
 async def gps_driver(config: GpsConfig):
     async def _connection():
         logger.info("Connecting to GPS %s", config.gps.port)
-        serial = aioserial.AioSerial(config.gps.port, config.gps.baud_rate)
+        serial = SerialPort(config.gps.port, config.gps.baud_rate)
         logger.info("Connected to GPS")
 
         async def commands():
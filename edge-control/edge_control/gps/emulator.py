@@ -0,0 +1,390 @@
+"""
+GPS receiver emulator on a pseudo-terminal, for testing the GPS driver and tracking without hardware.
+
+Streams NMEA sentences or UBX NAV-POSLLH frames from a simulated trajectory or a recorded NMEA log,
+with position noise, RTK fix/float transitions and corrupted checksums. Consumes RTCM corrections
+written to the port by the driver.
+
+    python -m edge_control.gps.emulator --rate 20 --corrupt 0.01
+
+and point the gps port in gps.yaml to the printed device.
+"""
+
+import asyncio
+import cmath
+import logging
+import math
+import random
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from dataclasses import dataclass, field
+
+from edge_control.config import SiteReferenceConfig
+from edge_control.util.binmsg import Int32, UInt32
+from edge_control.util.pty import PseudoTerminal
+
+from . import ubx
+from .messages import GGA, Quality, checksum, dms, process
+
+logger = logging.getLogger(__name__)
+
+# Horizontal accuracy (m) per fix quality, reported as hdop and used to scale position noise.
+_accuracy = {
+    Quality.RTK: 0.014,
+    Quality.FLOAT_RTK: 0.3,
+    Quality.DIFF_GPS_FIX: 0.8,
+    Quality.GPS_FIX: 1.5,
+}
+
+_rmc_mode: Dict[int, str] = {Quality.RTK: "R", Quality.FLOAT_RTK: "F", Quality.DIFF_GPS_FIX: "D", Quality.GPS_FIX: "A"}
+
+_METERS_PER_DEGREE = 111_320.0
+_GPS_WEEK = 7 * 86400
+
+
+@dataclass
+class Fix:
+    lat: float
+    lon: float
+    alt: float = 100.0
+    quality: int = Quality.RTK
+    sats: int = 12
+    speed: float = 0.0  # m/s
+    course: Optional[float] = None  # degrees, true north
+
+
+@dataclass
+class EmulatorConfig:
+    mode: str = "nmea"  # "nmea" or "ublox"
+    rate: float = 5.0  # Hz, epochs per second
+    sentences: List[str] = field(default_factory=lambda: ["GGA", "GSA", "GST", "RMC", "VTG"])
+    noise: float = 1.0  # scale of position noise wrt fix accuracy, 0 disables
+    corrupt: float = 0.0  # probability of a corrupted checksum per sentence/frame
+    float_rate: float = 0.0  # transitions per second from RTK fix to float, 0 disables
+    fix_rate: float = 0.5  # transitions per second from RTK float to fix
+    rtcm_timeout: float = 0.0  # degrade to GPS fix without RTCM corrections for this long (s), 0 disables
+
+
+class Circle:
+    """Drive in a circle in site coordinates"""
+
+    def __init__(self, reference: SiteReferenceConfig, x: float, y: float, radius: float, speed: float):
+        self.reference = reference
+        self.center = complex(x, y)
+        self.radius = radius
+        self.speed = speed
+
+    def __call__(self, t: float) -> Fix:
+        angle = self.speed * t / self.radius
+        p = self.center + cmath.rect(self.radius, angle)
+        ll = self.reference.to_world(p.real, p.imag).latlon()
+        # site heading is anti-clockwise from site x-axis, which is rotated anti-clockwise from east
+        heading = math.degrees(angle + math.pi / 2) - self.reference.rotation
+        course = (90 - heading) % 360
+        return Fix(ll.lat, ll.lon, speed=self.speed, course=course)
+
+
+class Replay:
+    """Replay positions from GGA sentences in a recorded NMEA log, one per epoch and repeating"""
+
+    def __init__(self, lines: Iterable[str]):
+        self.fixes: List[Fix] = []
+        for line in lines:
+            try:
+                m = process(line)
+            except (ValueError, IndexError):
+                continue
+            if isinstance(m, GGA) and m.lat is not None and m.lon is not None:
+                self.fixes.append(Fix(m.lat, m.lon, m.alt or 0.0, m.quality or 0, m.sats or 0))
+        assert self.fixes, "No GGA positions in log"
+        self._i = 0
+
+    def __call__(self, t: float) -> Fix:
+        fix = self.fixes[self._i % len(self.fixes)]
+        self._i += 1
+        return fix
+
+
+def _sentence(nmea: str) -> str:
+    return f"${nmea}*{checksum(nmea)}\r\n"
+
+
+def _hms(t: float) -> str:
+    # milliseconds (the F9P reports 1/100 s) to measure driver latency
+    s = t % 86400
+    h, s = divmod(s, 3600)
+    m, s = divmod(s, 60)
+    return "%02d%02d%06.3f" % (h, m, s)
+
+
+def _lat(lat: float) -> str:
+    return "%02d%011.8f,%s" % (*dms(abs(lat)), "N" if lat >= 0 else "S")
+
+
+def _lon(lon: float) -> str:
+    return "%03d%011.8f,%s" % (*dms(abs(lon)), "E" if lon >= 0 else "W")
+
+
+def gga(t: float, fix: Fix, hdop: float) -> str:
+    return _sentence(
+        f"GNGGA,{_hms(t)},{_lat(fix.lat)},{_lon(fix.lon)},{fix.quality},{fix.sats:02d},{hdop:.2f},{fix.alt:.1f},M,39.4,M,"
+        + ("1.0,0000" if fix.quality in (Quality.RTK, Quality.FLOAT_RTK) else ",")
+    )
+
+
+def gsa(t: float, fix: Fix, hdop: float) -> str:
+    svs = ",".join(str(sv) for sv in range(1, 13)[: fix.sats]) + "," * (12 - min(fix.sats, 12))
+    return _sentence(f"GNGSA,A,3,{svs},{1.5 * hdop:.2f},{hdop:.2f},{2 * hdop:.2f},1")
+
+
+def gst(t: float, fix: Fix, hdop: float) -> str:
+    return _sentence(f"GNGST,{_hms(t)},{hdop:.3f},{hdop:.3f},{hdop:.3f},0.0,{hdop:.3f},{hdop:.3f},{2 * hdop:.3f}")
+
+
+def rmc(t: float, fix: Fix, hdop: float) -> str:
+    date = time.strftime("%d%m%y", time.gmtime(t))
+    course = "" if fix.course is None else f"{fix.course:.2f}"
+    mode = _rmc_mode.get(fix.quality, "N")
+    knots = fix.speed * 3600 / 1852
+    return _sentence(f"GNRMC,{_hms(t)},A,{_lat(fix.lat)},{_lon(fix.lon)},{knots:.3f},{course},{date},,,{mode},V")
+
+
+def vtg(t: float, fix: Fix, hdop: float) -> str:
+    course = "" if fix.course is None else f"{fix.course:.2f}"
+    mode = _rmc_mode.get(fix.quality, "N")
+    return _sentence(f"GNVTG,{course},T,,M,{fix.speed * 3600 / 1852:.3f},N,{fix.speed * 3.6:.3f},K,{mode}")
+
+
+_generators = {"GGA": gga, "GSA": gsa, "GST": gst, "RMC": rmc, "VTG": vtg}
+
+
+def navposllh(t: float, fix: Fix, hdop: float) -> bytes:
+    # time of week from UTC, ignoring GPS leap seconds
+    itow = int(round((t + 4 * 86400) % _GPS_WEEK * 1000))  # 1970-01-01 is a Thursday
+    msg = ubx.NavPosLLH(
+        iTOW=UInt32(itow),
+        lon=Int32(round(fix.lon * 1e7)),
+        lat=Int32(round(fix.lat * 1e7)),
+        height=Int32(round((fix.alt + 39.4) * 1000)),
+        hMSL=Int32(round(fix.alt * 1000)),
+        hAcc=UInt32(round(hdop * 1000)),
+        vAcc=UInt32(round(2 * hdop * 1000)),
+    )
+    return ubx.encode(msg)
+
+
+def corrupt_nmea(sentence: str) -> str:
+    # replace a checksum digit, keeping the sentence ASCII and well-formed otherwise
+    i = sentence.index("*") + 1 + random.randrange(2)
+    c = random.choice([d for d in "0123456789ABCDEF" if d != sentence[i]])
+    return sentence[:i] + c + sentence[i + 1 :]
+
+
+def corrupt_ubx(frame: bytes) -> bytes:
+    return frame[:-1] + bytes([frame[-1] ^ 0xFF])
+
+
+def crc24q(data: bytes) -> int:
+    crc = 0
+    for b in data:
+        crc ^= b << 16
+        for _ in range(8):
+            crc <<= 1
+            if crc & 0x1000000:
+                crc ^= 0x1864CFB
+    return crc & 0xFFFFFF
+
+
+class RtcmReader:
+    """Counts valid RTCM3 frames: 0xD3, 6 reserved bits and 10 bit length, payload, CRC-24Q"""
+
+    def __init__(self):
+        self._buffer = bytes()
+        self.frames = 0
+        self.errors = 0
+        self.bytes = 0
+        self.updated: Optional[float] = None
+
+    def feed(self, data: bytes, t: float):
+        self.bytes += len(data)
+        self._buffer += data
+        while True:
+            i = self._buffer.find(0xD3)
+            if i < 0:
+                self._buffer = bytes()
+                return
+            self._buffer = self._buffer[i:]
+            if len(self._buffer) < 3:
+                return
+            length = ((self._buffer[1] & 0x03) << 8) | self._buffer[2]
+            if len(self._buffer) < length + 6:
+                return
+            frame = self._buffer[: length + 6]
+            if crc24q(frame[:-3]) == int.from_bytes(frame[-3:], "big"):
+                self.frames += 1
+                self.updated = t
+                self._buffer = self._buffer[length + 6 :]
+            else:
+                self.errors += 1
+                self._buffer = self._buffer[1:]
+
+
+class GpsEmulator:
+    def __init__(self, config: EmulatorConfig, source: Callable[[float], Fix]):
+        assert config.mode in ("nmea", "ublox"), "Invalid mode: " + config.mode
+        assert 0 < config.rate <= 20, "Rate must be up to 20 Hz"
+        for sentence in config.sentences:
+            assert sentence in _generators, "Unsupported NMEA sentence: " + sentence
+        self.config = config
+        self.source = source
+        self.rtcm = RtcmReader()
+        self.float = False
+        self.epochs = 0
+        self.messages = 0
+        self.corrupted = 0
+        self.bytes = 0
+
+    def fix(self, t: float, t0: float) -> Fix:
+        fix = self.source(t - t0)
+        quality = fix.quality
+        if quality in (Quality.RTK, Quality.FLOAT_RTK) and self.config.float_rate > 0:
+            p = (self.config.fix_rate if self.float else self.config.float_rate) / self.config.rate
+            if random.random() < p:
+                self.float = not self.float
+                logger.debug("RTK %s", "float" if self.float else "fix")
+            quality = Quality.FLOAT_RTK if self.float else Quality.RTK
+        if self.config.rtcm_timeout > 0 and quality in (Quality.RTK, Quality.FLOAT_RTK):
+            if self.rtcm.updated is None or t > self.rtcm.updated + self.config.rtcm_timeout:
+                quality = Quality.GPS_FIX
+        sigma = self.config.noise * _accuracy.get(Quality(quality), 5.0) if quality else 0.0
+        lat = fix.lat + random.gauss(0, sigma) / _METERS_PER_DEGREE
+        lon = fix.lon + random.gauss(0, sigma) / (_METERS_PER_DEGREE * math.cos(math.radians(fix.lat)))
+        return Fix(lat, lon, fix.alt, quality, fix.sats, fix.speed, fix.course)
+
+    def epoch(self, t: float, fix: Fix) -> bytes:
+        hdop = _accuracy.get(Quality(fix.quality), 5.0) if fix.quality else 99.99
+        corrupt = self.config.corrupt
+        if self.config.mode == "ublox":
+            frames = [navposllh(t, fix, hdop)]
+            if corrupt and random.random() < corrupt:
+                frames[0] = corrupt_ubx(frames[0])
+                self.corrupted += 1
+            self.messages += 1
+            return b"".join(frames)
+
+        sentences = []
+        for name in self.config.sentences:
+            sentence = _generators[name](t, fix, hdop)
+            if corrupt and random.random() < corrupt:
+                sentence = corrupt_nmea(sentence)
+                self.corrupted += 1
+            sentences.append(sentence)
+        self.messages += len(sentences)
+        return "".join(sentences).encode("ascii")
+
+    async def _output(self, pty: PseudoTerminal):
+        period = 1 / self.config.rate
+        t0 = time.time()
+        # align epochs to the period, as a real receiver does
+        t_next = math.ceil(t0 / period) * period
+        while True:
+            await asyncio.sleep(max(0.0, t_next - time.time()))
+            t = time.time()
+            data = self.epoch(t, self.fix(t, t0))
+            pty.write(data)
+            self.bytes += len(data)
+            self.epochs += 1
+            t_next += period
+            if t_next < t:
+                # fell behind, skip epochs rather than bursting
+                t_next = math.ceil(t / period) * period
+
+    async def _input(self, pty: PseudoTerminal):
+        while True:
+            data = await pty.read()
+            self.rtcm.feed(data, time.time())
+
+    async def run(self, pty: PseudoTerminal):
+        await asyncio.gather(self._output(pty), self._input(pty))
+
+    def __str__(self):
+        return (
+            f"epochs {self.epochs} messages {self.messages} bytes {self.bytes} corrupted {self.corrupted} "
+            f"rtcm {self.rtcm.frames} frames {self.rtcm.bytes} bytes {self.rtcm.errors} errors"
+        )
+
+
+def source_from_args(args) -> Callable[[float], Fix]:
+    if args.log:
+        with open(args.log) as f:
+            return Replay(f)
+    if args.lat is not None and args.lon is not None:
+        reference = SiteReferenceConfig(args.lat, args.lon)
+    else:
+        from edge_control.config import site_config
+
+        assert site_config.reference, "No site reference, specify --lat and --lon"
+        reference = site_config.reference
+    return Circle(reference, args.x, args.y, args.radius, args.speed)
+
+
+def add_arguments(parser):
+    parser.add_argument("--mode", default="nmea", choices=["nmea", "ublox"])
+    parser.add_argument("--rate", type=float, default=5.0, help="Epochs per second, max 20")
+    parser.add_argument("--sentences", default="GGA,GSA,GST,RMC,VTG", help="Comma separated NMEA sentences")
+    parser.add_argument("--noise", type=float, default=1.0, help="Position noise scale wrt fix accuracy")
+    parser.add_argument("--corrupt", type=float, default=0.0, help="Probability of corrupt checksum")
+    parser.add_argument("--float-rate", type=float, default=0.0, help="RTK fix to float transitions per second")
+    parser.add_argument("--fix-rate", type=float, default=0.5, help="RTK float to fix transitions per second")
+    parser.add_argument("--rtcm-timeout", type=float, default=0.0, help="Degrade to GPS fix without RTCM (s)")
+    parser.add_argument("--log", help="Replay GGA positions from NMEA log instead of trajectory")
+    parser.add_argument("--lat", type=float, help="Site reference latitude, default from site config")
+    parser.add_argument("--lon", type=float, help="Site reference longitude, default from site config")
+    parser.add_argument("--x", type=float, default=0.0, help="Circle center x in site coordinates")
+    parser.add_argument("--y", type=float, default=0.0, help="Circle center y in site coordinates")
+    parser.add_argument("--radius", type=float, default=3.0, help="Circle radius (m)")
+    parser.add_argument("--speed", type=float, default=0.3, help="Speed (m/s)")
+
+
+def config_from_args(args) -> EmulatorConfig:
+    return EmulatorConfig(
+        mode=args.mode,
+        rate=args.rate,
+        sentences=args.sentences.split(","),
+        noise=args.noise,
+        corrupt=args.corrupt,
+        float_rate=args.float_rate,
+        fix_rate=args.fix_rate,
+        rtcm_timeout=args.rtcm_timeout,
+    )
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="edge_control.gps.emulator", description="GPS receiver emulator")
+    add_arguments(parser)
+    parser.add_argument("-v", "--verbose", action="store_true", help="Verbose output")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.verbose and logging.DEBUG or logging.INFO)
+
+    emulator = GpsEmulator(config_from_args(args), source_from_args(args))
+
+    async def _run():
+        with PseudoTerminal() as pty:
+            logger.info("GPS emulator on %s", pty.name)
+
+            async def report():
+                while True:
+                    await asyncio.sleep(10)
+                    logger.info("%s overruns %d", emulator, pty.overruns)
+
+            asyncio.create_task(report())
+            await emulator.run(pty)
+
+    asyncio.run(_run())
+
+
+if __name__ == "__main__":
+    main()
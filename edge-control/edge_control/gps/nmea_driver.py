@@ -1,8 +1,7 @@
 import logging
 
-import aioserial
-
 from .. import topics
+from ..util.serialport import SerialPort
 from . import messages
 from .status import GpsStatus
 
@@ -13,9 +12,11 @@ async def parse_nmea():
     async for nmea in topics.gps_nmea.stream():
         try:
             m = messages.process(nmea)
-        except ValueError:
-            logger.exception("Parsing NMEA: " + nmea)
-            return
+        except (ValueError, IndexError) as e:
+            # corrupt sentences happen on a serial line, skip them
+            logger.warning("Parsing NMEA: %s", e)
+            GpsStatus.errors.inc()
+            continue
 
         logger.debug("GPS message: %r", m)
         if isinstance(m, messages.GGA):
@@ -23,11 +24,11 @@ async def parse_nmea():
             await topics.gps_position.publish(m)
 
 
-async def responses(gps: aioserial.AioSerial):
+async def responses(gps: SerialPort):
     while True:
-        nmea = await gps.readline_async()
+        line = await gps.readline_async()
         GpsStatus.responses.inc()
-        # logger.debug("serial: %r", nmea)
-        nmea = nmea.decode("ascii").strip()
+        # logger.debug("serial: %r", line)
+        nmea = line.decode("ascii").strip()
         logger.debug("NMEA %s", nmea)
         await topics.gps_nmea.publish(nmea)
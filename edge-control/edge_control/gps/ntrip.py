@@ -6,10 +6,8 @@ import asyncio
 import base64
 import logging
 import time
-from typing import Optional
-
-from dataclasses import dataclass
 
+from ..config import NtripConfig
 from ..topics import gps_command, gps_position
 from ..util.tasks import retry, start_tasks
 from . import messages
@@ -18,17 +16,6 @@ from .status import GpsStatus
 logger = logging.getLogger(__name__)
 
 
-@dataclass
-class NtripConfig:
-    server: str
-    port: int
-    mount_point: str
-    username: Optional[str]
-    password: str = ""
-    interval: float = 10  # seconds
-    site: bool = False
-
-
 def _create_ntrip_header(config: NtripConfig) -> str:
     header = (
         f"GET /{config.mount_point} HTTP/1.0\r\n"
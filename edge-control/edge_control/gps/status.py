@@ -10,6 +10,7 @@ class GpsStatus:
     corrections = Counter()
     commands = Counter()
     responses = Counter()
+    errors = Counter()
 
     @staticmethod
     def fault(t: float):
@@ -1,9 +1,11 @@
 import logging
+from typing import Dict, Type
 
 from dataclasses import dataclass
 
 from edge_control.util.binmsg import Int32, UInt32
 from edge_control.util.binmsg import decode as _decode
+from edge_control.util.binmsg import encode as _encode
 
 logger = logging.getLogger(__name__)
 
@@ -134,7 +136,8 @@ def _message_type(c, i) -> bytes:
     return bytes((c, i))
 
 
-_message_types = {_message_type(1, 2): NavPosLLH}
+_message_types: Dict[bytes, Type[UbxMessage]] = {_message_type(1, 2): NavPosLLH}
+_message_ids: Dict[Type[UbxMessage], bytes] = {clz: message_type for message_type, clz in _message_types.items()}
 
 
 def decode(frame: bytes) -> UbxMessage:
@@ -144,3 +147,12 @@ def decode(frame: bytes) -> UbxMessage:
         raise ValueError("Invalid UBX message class and id: " + message_type.hex())
     data = frame[6:-2]
     return _decode(clz, data, "<")
+
+
+def frame(message_type: bytes, payload: bytes) -> bytes:
+    header = bytes((FRAME_START1, FRAME_START2)) + message_type + len(payload).to_bytes(2, "little")
+    return header + payload + checksum(header[2:] + payload)
+
+
+def encode(msg: UbxMessage) -> bytes:
+    return frame(_message_ids[type(msg)], _encode(msg, "<"))
@@ -4,9 +4,8 @@ GPS client that receives RTK corrections from a NTRIP service.
 
 import logging
 
-import aioserial
-
 from edge_control import topics
+from edge_control.util.serialport import SerialPort
 
 from .messages import GGA, Quality
 from .status import GpsStatus
@@ -15,7 +14,7 @@ from .ubx import NavPosLLH, Reader, decode
 logger = logging.getLogger(__name__)
 
 
-async def responses(gps: aioserial.AioSerial):
+async def responses(gps: SerialPort):
     reader = Reader()
     while True:
         data = await gps.read_async(reader.remaining())
@@ -28,6 +27,7 @@ async def responses(gps: aioserial.AioSerial):
                 # TODO: Define WorldPosition in models
                 gga = GGA(
                     "",
+                    time=(msg.iTOW % 86_400_000) * 1e-3,  # GPS time of day, not corrected for leap seconds
                     lat=msg.latitude(),
                     lon=msg.longitude(),
                     quality=Quality.GPS_FIX,
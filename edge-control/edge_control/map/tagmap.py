@@ -0,0 +1,66 @@
+"""
+Tag map indexed by id and by position (uniform grid), to look up tags and find the tags expected in the camera
+view for a pose estimate in constant time wrt the number of tags in the site.
+"""
+
+from __future__ import annotations
+
+import math
+from collections import defaultdict
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from ..config import Tag
+
+
+class TagMap:
+    def __init__(self, tags: Iterable[Tag], cell: float = 4.0):
+        self.tags = tuple(tags)
+        self._index: Dict[int, Tag] = dict((tag.id, tag) for tag in self.tags)
+        assert len(self._index) == len(self.tags), "Duplicate tag ids in tag config"
+        self.cell = cell  # m, grid cell size, in the order of the camera range
+        self.positions = np.array([tag.position.complex() for tag in self.tags], dtype=complex)
+        grid = defaultdict(list)
+        for i, p in enumerate(self.positions):
+            grid[self._cell(p)].append(i)
+        self._grid: Dict[Tuple[int, int], np.ndarray] = dict((k, np.array(v)) for k, v in grid.items())
+
+    def _cell(self, p: complex) -> Tuple[int, int]:
+        return math.floor(p.real / self.cell), math.floor(p.imag / self.cell)
+
+    def __len__(self) -> int:
+        return len(self.tags)
+
+    def __contains__(self, tag_id: int) -> bool:
+        return tag_id in self._index
+
+    def get(self, tag_id: int) -> Optional[Tag]:
+        return self._index.get(tag_id)
+
+    def _near(self, p: complex, radius: float) -> np.ndarray:
+        """Indices of tags within radius of p"""
+        x0, y0 = self._cell(p - complex(radius, radius))
+        x1, y1 = self._cell(p + complex(radius, radius))
+        cells = [self._grid.get((x, y)) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+        found = [c for c in cells if c is not None]
+        if not found:
+            return np.zeros(0, dtype=int)
+        i: np.ndarray = np.concatenate(found)
+        return i[np.abs(self.positions[i] - p) <= radius]
+
+    def near(self, p: complex, radius: float) -> List[Tag]:
+        return [self.tags[i] for i in self._near(p, radius)]
+
+    def visible(self, camera: complex, heading: float, fov: float, distance: float, margin: float = 0) -> List[Tag]:
+        """
+        Tags expected in the horizontal field of view fov (radians) within distance (m) of a camera at position
+        camera pointing in heading, or within margin (m) of the view for uncertainty in the camera position.
+        """
+        i = self._near(camera, distance + margin)
+        d = (self.positions[i] - camera) * complex(math.cos(heading), -math.sin(heading))
+        r = np.maximum(np.abs(d), 1e-9)
+        bearing = np.abs(np.angle(d))
+        inside = bearing <= fov / 2 + np.arcsin(np.minimum(1, margin / r))
+        return [self.tags[j] for j in i[inside]]
@@ -93,12 +93,14 @@ async def realtime_control(control: Control, name=None):
         await mission.complete(stop_time)
         return
     except asyncio.CancelledError:
+        # stop before reporting
+        await topics.robot_command.publish(StopCommand())
         stop_time = time.time()
         mission_time = stop_time - start_time
         logging.warning("Mission %s cancelled in %s", control, timedelta(seconds=mission_time))
         await mission.abort(stop_time, "cancelled")
-        await topics.robot_command.publish(StopCommand())
     except Exception as e:
+        await topics.robot_command.publish(StopCommand())
         logger.exception("Mission error")
         stop_time = time.time()
         mission_time = stop_time - start_time
@@ -109,7 +111,6 @@ async def realtime_control(control: Control, name=None):
             timedelta(seconds=mission_time),
         )
         await mission.abort(stop_time, str(e))
-        await topics.robot_command.publish(StopCommand())
 
     # Rely on move timeout in motor driver when mission fails badly or doesn't explicitly stop/dock.
     # Stopping while docking aborts the docking built-in mode on Roomba.
@@ -117,6 +118,9 @@ async def realtime_control(control: Control, name=None):
 
 
 _mission_in_progress: Optional[asyncio.Task] = None
+# Aborts so far. Start and abort (estop) may be handled concurrently, an abort while a start is getting its mission
+# invalidates the start.
+_aborts = 0
 
 
 async def mission_start(name: str):
@@ -130,20 +134,35 @@ async def mission_start(name: str):
         _mission_in_progress.print_stack()
         return
 
+    aborts = _aborts
     controls = await get_mission(name)
+    if _aborts != aborts:
+        logger.warning("Mission start %s ignored - aborted while getting the mission", name)
+        return
+    if _mission_in_progress is not None and not _mission_in_progress.done():
+        logger.warning("Mission start %s ignored - mission started while getting the mission", name)
+        return
 
     logger.info("Starting mission %s", name)
     _mission_in_progress = asyncio.create_task(realtime_control(controls, name=name))
 
 
 async def mission_abort():
-    global _mission_in_progress
+    from .models.messages import StopCommand
 
+    global _mission_in_progress, _aborts
+
+    _aborts += 1
+    # cancel before stopping, such that the mission does not publish another move after the stop
+    aborted = _mission_in_progress is not None and not _mission_in_progress.done()
+    if aborted:
+        _mission_in_progress.cancel()  # type: ignore
+    # stop immediately, also when manually driven, not waiting for the cancelled mission to report
+    await topics.robot_command.publish(StopCommand())
     logger.warning("Abort mission: %r", _mission_in_progress)
-    if _mission_in_progress and not _mission_in_progress.done():
+    if aborted:
         logger.info("Aborting mission")
-        _mission_in_progress.print_stack()
-        _mission_in_progress.cancel()
+        _mission_in_progress.print_stack()  # type: ignore
 
 
 async def mission_control():
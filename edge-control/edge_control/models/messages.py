@@ -20,6 +20,7 @@ class ObstacleDetection:
     center_left: bool
     center_right: bool
     right: bool
+    distance: Optional[float] = None  # m, nearest obstacle in the regions flagged
 
     def center(self):
         return self.center_left or self.center_right
@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import numpy as np
 from dataclasses import dataclass
 
 
@@ -13,6 +12,8 @@ class State:
     theta: float
 
     def to_array(self):
+        import numpy as np
+
         return np.array([[self.x], [self.y], [self.theta]])
 
     def position(self) -> complex:
@@ -30,3 +31,11 @@ class State:
 @dataclass(frozen=True)
 class ModeState:
     mode: str
+
+
+@dataclass(frozen=True)
+class StatusSnapshot:
+    time: float
+    encoded: str  # JSON of RobotState.as_dict(time)
+    seq: int = 0
+    delta: str = ""  # JSON of changes from the previous snapshot, see snapshot module
@@ -1,22 +1,22 @@
 import asyncio
-import json
 import logging
 import time
-from typing import Any
+from typing import Any, Callable, Optional
 
-import dacite
 import gmqtt
 
 from . import topics
 from .config import robot_config
 from .missioncontrol import mission_abort, mission_start
 from .models.messages import DockCommand, LightsCommand, MoveCommand
-from .models.ptz import PanTiltZoomPosition, PanTiltZoomSpeed
+from .models.ptz import PanTiltZoomPosition, PanTiltZoomSpeed, ToPanTiltZoom
 from .models.state import ModeState
-from .robot import RobotState
+from .outbox import Outbox, forward
+from .publisher import Publisher
+from .snapshot import keyframe
 from .util.inrobot import Envelope
 from .util.json import dumps
-from .util.mqtt import Client
+from .util.mqtt import Client, Dispatcher, json_decoder
 from .util.time import now
 
 logger = logging.getLogger(__name__)
@@ -29,33 +29,18 @@ def publish_to_inrobot(client: Client, topic: str, payload: Any, timestamp: int
     client.publish("api", m)
 
 
-async def publish_to_topic(payload, clz, topic: topics.Topic):
-    try:
-        msg = json.loads(payload)
-        logger.debug("To topic %s: %r", topic, msg)
-        cmd = dacite.from_dict(clz, msg)
-        await topic.publish(cmd)
-    except Exception:
-        logger.error("Failed to publish %r to %s %r", payload, topic, clz)
-
-
-async def command_lights(client: Client, topic: str, payload):
-    await publish_to_topic(payload, LightsCommand, topics.lights)
-
-
-async def command_ptz_move(client: Client, topic: str, payload):
-    await publish_to_topic(payload, PanTiltZoomSpeed, topics.ptz_command)
+async def command_lights(client: Client, topic: str, msg: LightsCommand):
+    await topics.lights.publish(msg)
 
 
-async def command_ptz_absolute(client: Client, topic: str, payload):
-    await publish_to_topic(payload, PanTiltZoomPosition, topics.ptz_command)
+async def command_ptz(client: Client, topic: str, msg: ToPanTiltZoom):
+    await topics.ptz_command.publish(msg)
 
 
-async def command_mode(client: Client, topic: str, payload):
+async def command_mode(client: Client, topic: str, msg: dict):
     # Roomba: Full, Safe, Passive, Dock, ...
     # Modes are really ignored - always in Full/Safe.
     # Should only ack recognized modes.
-    msg = json.loads(payload)
     logger.info("Mode command: %r", msg)
     mode = msg.get("mode")
     if not mode:
@@ -68,8 +53,7 @@ async def command_mode(client: Client, topic: str, payload):
     logger.info("Ignoring mode command: %s", mode)
 
 
-async def command_twist(client: Client, topic: str, payload):
-    msg = json.loads(payload)
+async def command_twist(client: Client, topic: str, msg: dict):
     logger.debug("Twist command: %r", msg)
     timestamp = msg.get("timestamp")
     timeout = 0.0
@@ -86,90 +70,116 @@ async def command_twist(client: Client, topic: str, payload):
     await topics.robot_command.publish(MoveCommand(timeout, speed, omega))
 
 
-async def command_mission_start(client: Client, topic: str, payload):
-    msg = json.loads(payload)
+async def command_mission_start(client: Client, topic: str, msg: dict):
     logger.info("Mission start: %r", msg)
     name = msg.get("name")
+    if not isinstance(name, str):
+        logger.warning("Invalid mission name: %r", name)
+        return
     await mission_start(name)
 
 
-async def command_mission_abort(client: Client, topic: str, payload):
-    msg = json.loads(payload)
+async def command_mission_abort(client: Client, topic: str, msg: dict):
     logger.info("Mission abort: %r", msg)
     await mission_abort()
 
 
-async def command_estop(client: Client, topic: str, payload):
-    msg = json.loads(payload)
+async def command_estop(client: Client, topic: str, msg: dict):
+    # fast path, handled on receipt
     logger.info("estop command: %r", msg)
     if msg.get("signal") == "STOP":
-        logger.info("Mission abort from estop: %r", msg)
+        # no moves queued before the estop after it
+        dropped = _dispatch.clear("robot_cmd/twist_cmd")
+        logger.info("Mission abort from estop, %d twist commands dropped: %r", dropped, msg)
         publish_to_inrobot(client, "estop/status", {"acquired": True, "active": True})
         await mission_abort()
 
 
-async def command_mission_pause(client: Client, topic: str, payload):
-    msg = json.loads(payload)
+async def command_mission_pause(client: Client, topic: str, msg: dict):
     # mission automatically paused on invalid state? or just waits while invalid?
     # paused for a reason - report mission state, progress
     logger.info("Mission pause: %r", msg)
 
 
-async def command_mission_continue(client: Client, topic: str, payload):
-    msg = json.loads(payload)
+async def command_mission_continue(client: Client, topic: str, msg: dict):
     logger.info("Mission continue: %r", msg)
 
 
-_dispatch = {
-    # From InRobot web app:
-    "ptz/move": command_ptz_move,
-    "ptz/absolute": command_ptz_absolute,
-    "cmd/lights": command_lights,
-    "robot_cmd/twist_cmd": command_twist,
-    "robot_cmd/mode_cmd": command_mode,
-    "robot_cmd/navigate_mission": command_mission_start,
-    "bosdyn/EstopSignal": command_estop,
-    "estop/cmd": command_estop,
-    # Proposal:
-    "mission/start": command_mission_start,
-    "mission/abort": command_mission_abort,
-    "mission/pause": command_mission_pause,
-    "mission/continue": command_mission_continue,
-}
-
-
-async def cloud_mqtt_driver():
+_dispatch = Dispatcher()
+# From InRobot web app:
+_dispatch.register("ptz/move", command_ptz, json_decoder(PanTiltZoomSpeed))
+_dispatch.register("ptz/absolute", command_ptz, json_decoder(PanTiltZoomPosition))
+_dispatch.register("cmd/lights", command_lights, json_decoder(LightsCommand))
+_dispatch.register("robot_cmd/twist_cmd", command_twist)
+_dispatch.register("robot_cmd/mode_cmd", command_mode)
+_dispatch.register("robot_cmd/navigate_mission", command_mission_start)
+_dispatch.register("bosdyn/EstopSignal", command_estop, fast=True)
+_dispatch.register("estop/cmd", command_estop, fast=True)
+# Proposal:
+_dispatch.register("mission/start", command_mission_start)
+_dispatch.register("mission/abort", command_mission_abort)
+_dispatch.register("mission/pause", command_mission_pause)
+_dispatch.register("mission/continue", command_mission_continue)
+
+
+async def cloud_mqtt_driver(host: str = "localhost", port: int = 1883):
     _client = gmqtt.Client("robot-autonomy")
     client = Client(_client, "mqtt", _dispatch)
-    await client.connect("localhost", 1883)
+    await client.connect(host, port)
+    publisher = Publisher(client.publish, robot_config.mqtt_topics)
 
     async def _robot_status():
-        # publish RobotState periodically (also a task doing the same on API).
-        # Could publish it on a pubsub topic and have local tasks publishing to API and MQTT.
-        while True:
-            await asyncio.sleep(1)
-            s = dumps(RobotState.as_dict(time.time()))
-            logger.info("Robot status: %s", s)
-            client.publish("autonomy/status", s)
+        # RobotState snapshot, encoded once for API and MQTT
+        keyframes = robot_config.status_keyframe
+        seq = -1
+        async for snapshot in topics.robot_status.stream():
+            if keyframes:
+                # deltas from keyframe, see snapshot module
+                first = seq != snapshot.seq - 1 or snapshot.seq % keyframes == 0
+                s = keyframe(snapshot) if first else snapshot.delta
+                seq = snapshot.seq
+                logger.debug("Robot status: %s", s)
+                publisher.put("autonomy/status/delta", s)
+                publisher.update_status(snapshot.time)
+                continue
+            s = snapshot.encoded
+            logger.debug("Robot status: %s", s)
+            publisher.put("autonomy/status", s)
+            publisher.update_status(snapshot.time)
             publish_to_inrobot(client, "motors/status", {"powered": True})
             publish_to_inrobot(client, "estop/status", {"acquired": True, "active": False})
 
-    async def _to_mqtt(topic: topics.Topic, mqtt_topic: str, qos: int = 0):
+    config = robot_config.outbox
+    outbox = Outbox(config.file, config.max_bytes) if config else None
+
+    async def _to_mqtt(topic: topics.Topic, mqtt_topic: str, qos: int = 0, key: Optional[Callable[[Any], str]] = None):
+        # messages with a deduplication key are queued in the outbox, if configured
         async for o in topic.stream():
             logger.debug("To MQTT %r: %r", mqtt_topic, o)
-            client.publish(mqtt_topic, dumps(o), qos=qos)
+            if outbox and key is not None:
+                outbox.put(mqtt_topic, dumps(o), qos, f"{mqtt_topic}/{key(o)}")
+            else:
+                publisher.put(mqtt_topic, dumps(o), qos)
+
+    async def _forward():
+        if outbox:
+            await forward(outbox, client, config.rate, config.batch)
 
     async def _to_api(topic: topics.Topic, topic_type: str):
         async for o in topic.stream():
             publish_to_inrobot(client, topic_type, o)
 
-    await asyncio.gather(
-        _robot_status(),
-        _to_api(topics.edge_status, "EdgeStatus"),
-        _to_api(topics.batteries_status, "BatteryStatus"),
-        _to_mqtt(topics.gauge_captures, "gaugecapture", 1),
-        _to_mqtt(topics.missions, "mission", 1),
-    )
+    try:
+        await asyncio.gather(
+            _robot_status(),
+            _to_api(topics.edge_status, "EdgeStatus"),
+            _to_api(topics.batteries_status, "BatteryStatus"),
+            _to_mqtt(topics.gauge_captures, "gaugecapture", 1, lambda g: f"{g.gaugeId}/{g.time}"),
+            _to_mqtt(topics.missions, "mission", 1, lambda m: f"{m.missionId}/{m.status}/{m.endTime}"),
+            _forward(),
+        )
+    finally:
+        await _client.disconnect()
 
 
 def mission_control(args):
@@ -0,0 +1,132 @@
+"""
+Durable store-and-forward queue of MQTT messages that must not be lost while offline, such as mission reports
+and gauge captures.
+
+Messages are written to an SQLite database and deleted when handed to the MQTT client while connected, which
+resends unacknowledged QoS 1 messages itself. After a reconnect the backlog is published in batches at a limited
+rate, so that live traffic is not held back. Each message has a deduplication key, a message with the key of a
+queued or recently delivered message is ignored. The queue is bounded by payload size, the oldest are dropped.
+"""
+
+import asyncio
+import logging
+import sqlite3
+import time
+from typing import TYPE_CHECKING, List, Tuple, Union
+
+from .util.status import Counter, Status
+
+if TYPE_CHECKING:
+    from .util.mqtt import Client
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT UNIQUE NOT NULL,
+    topic TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    qos INTEGER NOT NULL,
+    time REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS delivered (
+    key TEXT PRIMARY KEY,
+    time REAL NOT NULL
+);
+"""
+
+
+class OutboxStatus:
+    queued = Status[int]()
+    published = Counter()
+    duplicates = Counter()  # messages ignored as queued or delivered before
+    dropped = Counter()  # oldest messages dropped when full
+
+
+class Outbox:
+    def __init__(self, file_name: str, max_bytes: int, keep_keys: int = 10_000):
+        self.max_bytes = max_bytes  # of payloads queued
+        self.keep_keys = keep_keys  # keys of delivered messages kept for deduplication
+        self.db = sqlite3.connect(file_name)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+        self.size = self.db.execute("SELECT COALESCE(SUM(LENGTH(payload)), 0) FROM messages").fetchone()[0]
+        self.ready = asyncio.Event()  # set when messages are put
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+
+    def put(self, topic: str, payload: Union[str, bytes], qos: int, key: str) -> bool:
+        """Queues message unless a message with the same key is queued or delivered, returns True if queued"""
+        if isinstance(payload, str):
+            payload = payload.encode()
+        if self.db.execute("SELECT 1 FROM delivered WHERE key = ?", (key,)).fetchone():
+            OutboxStatus.duplicates.inc()
+            return False
+        cursor = self.db.execute(
+            "INSERT OR IGNORE INTO messages (key, topic, payload, qos, time) VALUES (?, ?, ?, ?, ?)",
+            (key, topic, payload, qos, time.time()),
+        )
+        if not cursor.rowcount:
+            OutboxStatus.duplicates.inc()
+            return False
+        self.size += len(payload)
+        while self.size > self.max_bytes:
+            id, size = self.db.execute("SELECT id, LENGTH(payload) FROM messages ORDER BY id LIMIT 1").fetchone()
+            self.db.execute("DELETE FROM messages WHERE id = ?", (id,))
+            self.size -= size
+            OutboxStatus.dropped.inc()
+        self.db.commit()
+        self.ready.set()
+        return True
+
+    def peek(self, n: int) -> List[Tuple[int, str, bytes, int]]:
+        """Oldest n messages (id, topic, payload, qos)"""
+        return self.db.execute("SELECT id, topic, payload, qos FROM messages ORDER BY id LIMIT ?", (n,)).fetchall()
+
+    def ack(self, ids: List[int]):
+        """Deletes delivered messages, keeping their keys"""
+        if not ids:
+            return
+        marks = ", ".join("?" * len(ids))
+        size = self.db.execute(f"SELECT SUM(LENGTH(payload)) FROM messages WHERE id IN ({marks})", ids).fetchone()[0]
+        self.db.execute(
+            f"INSERT OR REPLACE INTO delivered (key, time) SELECT key, ? FROM messages WHERE id IN ({marks})",
+            [time.time(), *ids],
+        )
+        self.db.execute(f"DELETE FROM messages WHERE id IN ({marks})", ids)
+        self.db.execute(
+            "DELETE FROM delivered WHERE key NOT IN (SELECT key FROM delivered ORDER BY time DESC LIMIT ?)",
+            (self.keep_keys,),
+        )
+        self.db.commit()
+        self.size -= size or 0
+
+    def close(self):
+        self.db.close()
+
+
+async def forward(outbox: Outbox, client: "Client", rate: float, batch: int):
+    """Publishes queued messages while connected, in batches of at most rate messages/s"""
+    while True:
+        OutboxStatus.queued.set(len(outbox))
+        messages = outbox.peek(batch) if client.is_connected else []
+        if not messages:
+            outbox.ready.clear()
+            try:
+                # also polls for reconnect
+                await asyncio.wait_for(outbox.ready.wait(), 1)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        sent = []
+        for id, topic, payload, qos in messages:
+            if not client.publish(topic, payload, qos):
+                break
+            sent.append(id)
+        outbox.ack(sent)
+        OutboxStatus.published.inc(n=len(sent))
+        if len(sent) < len(messages):
+            logger.info("Disconnected with %d messages queued", len(outbox))
+        await asyncio.sleep(len(messages) / rate)
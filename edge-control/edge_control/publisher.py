@@ -0,0 +1,117 @@
+"""
+MQTT publish pipeline with a policy per topic (see PublishPolicy in config), such that telemetry does not dominate
+the uplink: messages within a window are published together at its end, coalesced to the latest or batched into a
+JSON array payload, at a max rate. Topics without a policy are published immediately.
+
+Status deltas must not be coalesced, as clients then wait for the next keyframe on the gap in sequence.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional
+
+from dataclasses import dataclass
+
+from .config import PublishPolicy
+from .util.status import Status
+
+logger = logging.getLogger(__name__)
+IMMEDIATE = PublishPolicy()
+
+
+@dataclass
+class TopicStatus:
+    topic: str
+    messages: int = 0  # published
+    publishes: int = 0  # payloads
+    bytes: int = 0
+    coalesced: int = 0  # messages replaced by a later message in the window
+    dropped: int = 0  # messages not published, disconnected or pending limit
+
+
+class MqttStatus:
+    topics = Status[list]()  # list of TopicStatus
+
+
+class TopicPipeline:
+    def __init__(self, topic: str, policy: PublishPolicy, publish: Callable[[str, str, int], bool], limit: int = 1000):
+        self.topic = topic
+        self.policy = policy
+        self.publish = publish
+        self.limit = limit  # max messages pending
+        self.status = TopicStatus(topic)
+        self.interval = max(policy.window, 1 / policy.max_rate if policy.max_rate else 0)  # s, between publishes
+        self._pending: Deque[str] = deque()
+        self._qos = 0
+        self._last = float("-inf")  # loop time of last publish
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def put(self, payload: str, qos: int = 0):
+        self._qos = qos if self.policy.qos is None else self.policy.qos
+        if self.policy.coalesce and self._pending:
+            self._pending[-1] = payload
+            self.status.coalesced += 1
+        else:
+            self._pending.append(payload)
+            if len(self._pending) > self.limit:
+                self._pending.popleft()
+                self.status.dropped += 1
+        if self._timer:
+            return
+        loop = asyncio.get_running_loop()
+        delay = max(self.policy.window, self._last + self.interval - loop.time())
+        if delay <= 0:
+            self.flush()
+        else:
+            self._timer = loop.call_later(delay, self.flush)
+
+    def flush(self):
+        self._timer = None
+        if not self._pending:
+            return
+        loop = asyncio.get_running_loop()
+        self._last = loop.time()
+        if self.policy.batch:
+            n = min(self.policy.batch, len(self._pending))
+            messages = [self._pending.popleft() for _ in range(n)]
+            self._publish("[" + ",".join(messages) + "]", n)
+        elif self.policy.max_rate:
+            # a message per publish
+            self._publish(self._pending.popleft(), 1)
+        else:
+            while self._pending:
+                self._publish(self._pending.popleft(), 1)
+        if self._pending:
+            # rest of batches or messages, at max rate
+            self._timer = loop.call_later(self.interval, self.flush)
+
+    def _publish(self, payload: str, n: int):
+        if self.publish(self.topic, payload, self._qos):
+            self.status.messages += n
+            self.status.publishes += 1
+            self.status.bytes += len(payload)
+        else:
+            self.status.dropped += n
+
+
+class Publisher:
+    def __init__(self, publish: Callable[[str, str, int], bool], policies: Dict[str, PublishPolicy]):
+        self.publish = publish  # e.g. util.mqtt.Client.publish
+        self.policies = policies
+        self.pipelines: Dict[str, TopicPipeline] = {}
+
+    def put(self, topic: str, payload: str, qos: int = 0):
+        """Publishes payload to topic according to the policy of the topic"""
+        pipeline = self.pipelines.get(topic)
+        if pipeline is None:
+            pipeline = self.pipelines[topic] = TopicPipeline(topic, self.policies.get(topic, IMMEDIATE), self.publish)
+        pipeline.put(payload, qos)
+
+    def status(self) -> List[TopicStatus]:
+        return [p.status for p in self.pipelines.values()]
+
+    def update_status(self, t: Optional[float] = None):
+        # copies, such that changes are detected
+        MqttStatus.topics.set([TopicStatus(**vars(s)) for s in self.status()], t or time.time())
@@ -2,9 +2,9 @@ from __future__ import annotations
 
 import json
 import math
+import re
 from typing import List, Optional, Tuple
 
-import dacite
 import numpy
 from dataclasses import dataclass
 from numpy import linalg
@@ -50,6 +50,10 @@ class TagPose:
     t: List[float]
     r: List[float]  # 9 elements
 
+    @staticmethod
+    def from_dict(data: dict) -> TagPose:
+        return TagPose(data["t"], data["r"])
+
     def delta(self, t0: List[float]) -> ArrayLike:
         return numpy.array(self.t) - numpy.array(t0)
 
@@ -64,6 +68,11 @@ class Tag:
     # world is only present if Pose.confidence is 3
     world: Optional[TagPose] = None
 
+    @staticmethod
+    def from_dict(data: dict) -> Tag:
+        world = data.get("world")
+        return Tag(data["tagId"], TagPose.from_dict(data["camera"]), world and TagPose.from_dict(world))
+
 
 @dataclass(frozen=True)
 class Frame:
@@ -73,10 +82,55 @@ class Frame:
     pose: Optional[Pose]
     tags: Optional[List[Tag]] = None
 
+    @staticmethod
+    def from_dict(data: dict) -> Frame:
+        pose = data.get("pose")
+        tags = data.get("tags")
+        return Frame(
+            data["frame"],
+            data["timestamp"],
+            pose and Pose(pose["confidence"], pose["t"], pose["r"]),
+            None if tags is None else [Tag.from_dict(tag) for tag in tags],
+        )
+
     @staticmethod
     def from_json(json_data: str) -> Frame:
-        data = json.loads(json_data)
-        return dacite.from_dict(data_class=Frame, data=data)
+        return Frame.from_dict(json.loads(json_data))
+
+
+_head = re.compile(r'\s*\{\s*"frame"\s*:\s*(\d+)\s*,\s*"timestamp"\s*:\s*(\d+)\s*,\s*"(pose|tags)"')
+
+
+class FrameParser:
+    """
+    Parses rs-pose-apriltag lines. Peeks at frame type and timestamp to skip poses within pose_period (ms) of the last
+    pose parsed, without parsing the JSON. Tag frames are always parsed.
+    """
+
+    def __init__(self, pose_period: int = 0):
+        self.pose_period = pose_period
+        self.t_pose: Optional[int] = None
+        self.lines = 0
+        self.skipped = 0
+        # tracking failed, confidence 0 pose without position and rotation:
+        # '{"frame":277042,"timestamp":1606489924746,"pose":{"confidence":0,"t":[nan,nan,nan],"r":[nan,nan,nan,nan]}}'
+        self.lost = 0
+
+    def parse(self, line: str) -> Optional[Frame]:
+        """Returns None for skipped and lost poses"""
+        self.lines += 1
+        if "nan" in line:
+            self.lost += 1
+            return None
+        m = _head.match(line)
+        if m and m.group(3) == "pose" and self.t_pose is not None:
+            if int(m.group(2)) < self.t_pose + self.pose_period:
+                self.skipped += 1
+                return None
+        frame = Frame.from_json(line)
+        if frame.pose:
+            self.t_pose = frame.timestamp
+        return frame
 
 
 def horizontal_speed(frame0: Frame, frame1: Frame) -> float:
@@ -1,12 +1,32 @@
+"""
+Obstacle detection from the depth camera, in a separate process to not compete with the control loop for the GIL.
+A capture thread of the depth process writes frames into a shared memory ring, and detection runs on the latest
+frame of the ring, skipping frames captured while detecting. Detections are sent with the frame sequence number
+and capture time back to the main process, which only publishes the latest detection if it falls behind. Gaps in
+the sequence numbers are counted as dropped.
+
+The main process creates the ring, such that the shared memory is released when it exits even if the depth process
+was killed, and the frame of a detection can be read from the ring by its sequence number while not overwritten.
+
+    python -m edge_control.realsense.depth --file data/depth.frames
+
+runs detection on frames recorded with util.framefile instead of the camera.
+"""
+
 import asyncio
 import logging
+import multiprocessing
+import signal
+import sys
+import threading
+import time
+from multiprocessing.connection import Connection
+from typing import Iterator, Optional, Tuple
 
 import numpy as np
-import pyrealsense2 as rs
 
-from edge_control.robot import RobotState
-from edge_control.util.fstreamer import Writer
-from edge_control.util.tasks import start_task
+from edge_control.util.framefile import Reader, Writer
+from edge_control.util.shmring import FrameRing
 
 from .obstacle import ObstacleDetector, load_floor
 
@@ -17,6 +37,8 @@ frame_rate = 6
 
 
 def start_pipeline():
+    import pyrealsense2 as rs
+
     config = rs.config()
     config.enable_stream(rs.stream.color, width, height, rs.format.bgr8, frame_rate)
     config.enable_stream(rs.stream.depth, width, height, rs.format.z16, frame_rate)
@@ -32,37 +54,149 @@ def get_depth(frames):
     return t, depth_image
 
 
-def start():
-    start_task(driver(), "Depth camera")
+def camera_frames() -> Iterator[Tuple[float, np.ndarray]]:
+    pipeline = start_pipeline()
+    try:
+        while True:
+            frames = pipeline.wait_for_frames()
+            t, depth_image = get_depth(frames)
+            # camera timestamp is ms
+            yield 0.001 * t, depth_image
+    finally:
+        pipeline.stop()
 
 
-async def driver():
-    # OR run entire depth process in new process and post to MQTT
-    logger.info("Starting obstacle detection from depth camera...")
+def file_frames(file_name: str, rate: float = frame_rate) -> Iterator[Tuple[float, np.ndarray]]:
+    """Replays recorded frames in a loop at rate, captured now"""
+    with Reader(file_name) as reader:
+        assert reader.decimation == 1, "Decimated recording"
+        while True:
+            for _, depth_image in reader:
+                time.sleep(1 / rate)
+                yield time.time(), depth_image
+
+
+def capture(source: Optional[str], floor_file: str, ring_name: str, conn: Connection, record: Optional[str] = None):
+    """Depth process: sends (sequence number, ObstacleDetection) for the latest frame, optionally recording frames"""
+    # terminated by the main process, close recording
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    detector = ObstacleDetector(load_floor(floor_file))
+    ring = FrameRing((height, width), np.uint16, name=ring_name)
+    frames = file_frames(source) if source else camera_frames()
+    writer = Writer(record, (height, width), np.uint16, compression="zlib") if record else None
+    captured = threading.Event()  # frame written to the ring, or done
+    done = threading.Event()  # no more frames
+    stop = threading.Event()
+
+    def capture_frames():
+        try:
+            for t, depth_image in frames:
+                if stop.is_set():
+                    break
+                ring.write(t, depth_image)
+                if writer:
+                    writer.write(t, depth_image)
+                captured.set()
+        except Exception:
+            logger.exception("Depth capture failed")
+        finally:
+            frames.close()
+            done.set()
+            captured.set()
+
+    thread = threading.Thread(target=capture_frames, name="capture", daemon=True)
+    thread.start()
+    try:
+        last = 0
+        while not (done.is_set() and ring.head == last):
+            captured.wait()
+            captured.clear()
+            latest = ring.latest()
+            if latest is None or latest[0] == last:
+                continue
+            seq, t, depth_image = latest
+            last = seq
+            conn.send((seq, detector.process(t, depth_image)))
+    except (BrokenPipeError, KeyboardInterrupt, SystemExit):
+        # main process is gone
+        pass
+    finally:
+        stop.set()
+        thread.join(1)
+        ring.close()
+        if writer:
+            writer.close()
 
-    floor_depth = load_floor("floor.npy")
-    detector = ObstacleDetector(floor_depth)
 
-    # writer = Writer(open("data/depth.bag", "wb"), 500)
-    loop = asyncio.get_running_loop()
-    pipeline = await loop.run_in_executor(None, start_pipeline)
+def start():
+    from edge_control.config import robot_config
+    from edge_control.util.tasks import start_task
+
+    rs = robot_config.realsense
+    assert rs, "No RealSense configuration"
+    start_task(driver(rs.depth_file, record=rs.depth_record), "Depth camera")
 
-    def process():
-        frames = pipeline.wait_for_frames()
-        t, depth_image = get_depth(frames)
-        # writer.write(t, depth_image)
-        return detector.process(t, depth_image)
 
+async def driver(source: Optional[str] = None, floor_file: str = "floor.npy", record: Optional[str] = None):
+    from edge_control import topics
+    from edge_control.robot import RobotState
+
+    from .status import DepthStatus
+
+    logger.info("Starting obstacle detection from %s...", source or "depth camera")
+    loop = asyncio.get_running_loop()
+    # owned by the main process, see above
+    ring = FrameRing((height, width), np.uint16)
+    # spawn, as forking a process with an event loop and threads is not safe
+    context = multiprocessing.get_context("spawn")
+    reader, writer = context.Pipe(duplex=False)
+    args = (source, floor_file, ring.name, writer, record)
+    process = context.Process(target=capture, args=args, name="depth", daemon=True)
+    process.start()
+    writer.close()
+    detections: asyncio.Queue = asyncio.Queue()
+
+    def receive():
+        try:
+            detections.put_nowait(reader.recv())
+        except EOFError:
+            loop.remove_reader(reader.fileno())
+            detections.put_nowait(None)
+
+    loop.add_reader(reader.fileno(), receive)
     try:
+        last = 0
         while True:
-            detection = await loop.run_in_executor(None, process)
-            logger.debug("detection %s", detection)
+            message = await detections.get()
+            # publish the latest only, when falling behind
+            while message is not None and not detections.empty():
+                message = detections.get_nowait()
+            assert message is not None, "Depth process stopped"
+            seq, detection = message
+            t = time.time()
+            if last and seq > last + 1:
+                DepthStatus.dropped.inc(t, seq - last - 1)
+            last = seq
+            DepthStatus.sequence.set(seq, t)
+            DepthStatus.latency.set(t - detection.time, t)
+            logger.debug("detection %d %s", seq, detection)
             RobotState.obstacle_depth = detection
-            await asyncio.sleep(0.5)
+            await topics.obstacle_detection.publish(detection)
     finally:
-        pipeline = await loop.run_in_executor(None, pipeline.stop)
+        loop.remove_reader(reader.fileno())
+        reader.close()
+        process.terminate()
+        process.join()
+        ring.close()
 
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="edge_control.realsense.depth", description="Depth obstacle detection")
+    parser.add_argument("--file", help="Frames recorded with util.framefile instead of the camera")
+    parser.add_argument("--floor", default="floor.npy", help="Floor depth")
+    parser.add_argument("--record", help="Record frames to file")
+    args = parser.parse_args()
     logging.basicConfig(level=logging.DEBUG)
-    asyncio.run(driver(), debug=True)
+    asyncio.run(driver(args.file, args.floor, args.record), debug=True)
@@ -1,13 +1,16 @@
 import asyncio
 import logging
-from json import JSONDecodeError
-from typing import AsyncGenerator
+import time
+from typing import Any, AsyncGenerator, Tuple, TypeVar
 
 from ..config import robot_config, site_config
 from ..models.turtle import Turtle
-from .T265 import Frame
+from ..util.worker import LatestWorker
+from .status import RealsenseStatus
+from .T265 import Frame, FrameParser
 
 logger = logging.getLogger(__name__)
+R = TypeVar("R")
 turtle = Turtle(site_config.dock.position.x, site_config.dock.position.y, site_config.dock.heading)
 
 
@@ -21,26 +24,43 @@ def repower() -> None:
     pass
 
 
-async def frames() -> AsyncGenerator[Frame, None]:
+async def frames(pose_period: int = 0) -> AsyncGenerator[Frame, None]:
+    """Frames from rs-pose-apriltag, skipping poses within pose_period (ms) of the last pose"""
     cmd = "rs-pose-apriltag"
     proc = await asyncio.create_subprocess_exec(cmd, stdout=asyncio.subprocess.PIPE)
     assert proc.stdout
+    parser = FrameParser(pose_period)
     while True:
         data = await proc.stdout.readline()
         line = data.decode("ascii").strip()
+        if not line:
+            # source program has stopped?
+            return
         try:
-            if not line:
-                # source program has stopped?
-                return
-            yield Frame.from_json(line)
-        except JSONDecodeError:
-            # TODO: fix .cpp program to drop pose or make t, r optional for confidence 0
-            # TODO: threshold on confidence - what to do then? Stop? When in dock, know position and heading, can make some
-            # route to check for improved confidence. But that requires dead reckoning on odometry, i.e. broader sensor fusion.
-            # '{"frame":277042,"timestamp":1606489924746,"pose":{"confidence":0,"t":[nan,nan,nan],"r":[nan,nan,nan,nan]}}'
-            continue
+            lost = parser.lost
+            frame = parser.parse(line)
         except Exception:
             logger.exception("Frame line: " + line)
+            continue
+        if parser.lost > lost:
+            # TODO: threshold on confidence - what to do then? Stop? When in dock, know position and heading, can make some
+            # route to check for improved confidence. But that requires dead reckoning on odometry, i.e. broader sensor fusion.
+            RealsenseStatus.confidence.set(0)
+        if frame is not None:
+            yield frame
+
+
+async def tag_results(worker: LatestWorker[Any, R]) -> AsyncGenerator[Tuple[float, R], None]:
+    """Results of the tag worker as (capture time, result), updating the tag metrics"""
+    dropped = 0
+    async for t, result in worker.results():
+        t_now = time.time()
+        RealsenseStatus.tags_dropped.inc(t_now, worker.dropped - dropped)
+        dropped = worker.dropped
+        if worker.latency is not None:
+            RealsenseStatus.tags_latency.set(worker.latency, t_now)
+        RealsenseStatus.tags_lag.set(t_now - t, t_now)
+        yield t, result
 
 
 async def driver():
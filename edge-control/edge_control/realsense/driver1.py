@@ -1,27 +1,52 @@
 import cmath
 import logging
 import math
+from typing import List, Tuple
 
 from .. import topics
 from ..models.state import State
 from ..util.filters import LP
+from ..util.tasks import start_task
+from ..util.worker import LatestWorker
 from . import tags
-from .driver import frames
-from .status import RealsenseStatus, Rotation, Vector
+from .driver import frames, tag_results
+from .status import RealsenseStatus, Rotation, TagStatus, Vector
+from .T265 import Frame
 
 logger = logging.getLogger(__name__)
 _bin_dir = "/home/oholsen/bin"
 
 
+# One update per second for tags. Smooth quite hard, drift changes very slowly.
+# Would be nice to filter out errors in early values, or just stay in dock a while to settle in.
+heading_filter = LP(0.05)
+
+
+def heading_errors(frames: Tuple[Frame, Frame]) -> Tuple[List[float], List[TagStatus]]:
+    """Heading errors from the reference tags and the tag statuses of (tags frame, pose frame), in worker thread"""
+    errors: List[float] = []
+    statuses = tags.process(*frames, errors.append)
+    return errors, statuses
+
+
+_worker = LatestWorker(heading_errors, "tags")
+
+
+async def _drain():
+    # heading_filter and status are only updated on the event loop, where they are read
+    async for _, (errors, statuses) in tag_results(_worker):
+        for error in errors:
+            heading_filter(error)
+        if 0:
+            RealsenseStatus.tags.set(statuses)
+
+
 async def states():
     # Convert to site coordinates, push position every 500ms (as GPS) and calculate speed
 
     tags_id = None
     last_pose = None
-
-    # One update per second for tags. Smooth quite hard, drift changes very slowly.
-    # Would be nice to filter out errors in early values, or just stay in dock a while to settle in.
-    heading_filter = LP(0.05)
+    start_task(_drain())
 
     # 30 frames per second - could select reduced frame rate in source program
     async for frame in frames():
@@ -36,7 +61,7 @@ async def states():
                 tags_id = frame.frame
                 if last_pose:
                     if last_pose.frame == frame.frame:
-                        tags.process(frame, last_pose, heading_filter)
+                        _worker.submit(0.001 * frame.timestamp, (frame, last_pose))
                         RealsenseStatus.stream_error.set(None)
                     else:
                         # Stuck with old Pose, still getting tags.
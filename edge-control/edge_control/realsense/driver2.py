@@ -1,6 +1,8 @@
 import asyncio
+import cmath
 import logging
 import math
+from typing import Any, Callable, List, Optional, Tuple
 
 import numpy
 
@@ -9,9 +11,10 @@ from ..config import robot_config, site_config
 from ..models.state import State
 from ..models.turtle import Turtle
 from ..util.math import a2s
+from ..util.worker import LatestWorker
 from . import tags
-from .driver import frames
-from .status import RealsenseStatus, Rotation, Vector
+from .driver import frames, tag_results
+from .status import RealsenseStatus, Rotation, TagStatus, Vector
 from .T265 import Frame
 
 logger = logging.getLogger(__name__)
@@ -19,18 +22,27 @@ _bin_dir = "/home/oholsen/bin"
 turtle = Turtle(site_config.dock.position.x, site_config.dock.position.y, site_config.dock.heading)
 
 
-def position(frame: Frame):
+def solve(
+    item: Tuple[Frame, numpy.ndarray], tag_status: Callable[[List[TagStatus]], Any] = RealsenseStatus.tags.set
+) -> Optional[numpy.ndarray]:
+    """Position fix from the tags in frame, reporting the tags used to tag_status"""
+    frame, p0 = item
     assert frame.tags is not None
     logger.debug("tags: %s", frame)
-    pairs = tags.select(frame.tags)
+    # turtle has no covariance, assume moderate uncertainty
+    expected = tags.expected(p0, 0.1, 0.3)
+    pairs = tags.select(frame.tags, expected)
+    if len(pairs) < 2 and expected is not None:
+        # dead reckoning may have drifted beyond the margin, do not let that reject every tag from now on
+        logger.debug("Too few expected tags, using all")
+        pairs = tags.select(frame.tags)
     # add camera offset here to position the camera in the world
-    p0 = numpy.array([turtle.x, turtle.y, turtle.theta])
     assert robot_config.realsense
-    p = tags.position(p0, pairs, robot_config.realsense.position)
+    return tags.position(p0, pairs, robot_config.realsense.position, tag_status=tag_status)
 
-    if p is None:
-        return
 
+def fix(p: numpy.ndarray, p0: numpy.ndarray):
+    """Applies position fix p solved from the prior position p0"""
     d = p - p0
     # dtheta = d[2]
     distance = tags.norm(d[:2])
@@ -47,16 +59,52 @@ def position(frame: Frame):
     logger.debug("fix %.3f %.3f %.3f", turtle.x, turtle.y, turtle.theta)
 
 
+def position(frame: Frame):
+    p0 = numpy.array([turtle.x, turtle.y, turtle.theta])
+    p = solve((frame, p0))
+    if p is not None:
+        fix(p, p0)
+
+
+def solve_from(
+    item: Tuple[Frame, numpy.ndarray],
+) -> Tuple[numpy.ndarray, Optional[numpy.ndarray], Optional[List[TagStatus]]]:
+    """Prior position p0, position fix solved from it and the tags used, in worker thread"""
+    statuses: List[List[TagStatus]] = []
+    p = solve(item, statuses.append)
+    return item[1], p, statuses[-1] if statuses else None
+
+
+def moved(p: numpy.ndarray, p0: numpy.ndarray, p_now: numpy.ndarray) -> numpy.ndarray:
+    """Position fix p solved from the prior position p0, moved along with the robot from p0 to p_now"""
+    # the motion since p0 is rotated by the heading correction of the fix
+    d = complex(p_now[0] - p0[0], p_now[1] - p0[1]) * cmath.rect(1, p[2] - p0[2])
+    return numpy.array([p[0] + d.real, p[1] + d.imag, p[2] + p_now[2] - p0[2]])
+
+
+_worker = LatestWorker(solve_from, "tags")
+
+
+async def fixes():
+    # the turtle has moved since capture, apply the fix as an offset to the prior position at capture
+    async for _, (p0, p, statuses) in tag_results(_worker):
+        # status is read on the event loop
+        if statuses is not None:
+            RealsenseStatus.tags.set(statuses)
+        if p is not None:
+            p_now = numpy.array([turtle.x, turtle.y, turtle.theta])
+            fix(moved(p, p0, p_now), p_now)
+
+
 async def visual_tracker():
 
     t_last: int = 0
 
-    async for frame in frames():
+    async for frame in frames(pose_period=200):
         try:
             if frame.tags:
-                # loop = asyncio.get_event_loop()
-                # loop.run_in_executor(executor, position, frame)
-                position(frame)
+                # solved in worker and applied in fixes
+                _worker.submit(0.001 * frame.timestamp, (frame, numpy.array([turtle.x, turtle.y, turtle.theta])))
                 # publish now or wait for next odometry... wait to get a steady position rate..??
                 continue
 
@@ -113,4 +161,5 @@ async def driver():
     # Output topic: robot_tracking
     logger.info("Starting Realsense driver2...")
     asyncio.create_task(odometry_tracker())
+    asyncio.create_task(fixes())
     await visual_tracker()
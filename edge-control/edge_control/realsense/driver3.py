@@ -2,19 +2,25 @@ import cmath
 import logging
 import math
 import time
+from collections import deque
+from typing import Deque, List, Optional, Set, Tuple
 
 import numpy as np
+from dataclasses import dataclass
 
 from .. import topics
-from ..config import robot_config, site_config, tag_config
+from ..config import robot_config, site_config
 from ..models.tracking import ExtendedKalmanFilter, State, motion_model, position_model, tag_observation_model
 from ..robot import RobotState
 from ..util.math import a2s, norm_angle
 from ..util.tasks import start_task
 from ..util.time import now
+from ..util.worker import LatestWorker
+from .driver import frames, tag_results
 from .physical import t265_offset_left
 from .status import RealsenseStatus, Rotation, Vector
 from .T265 import Tag
+from .tags import expected, tag_map
 
 logger = logging.getLogger(__name__)
 _ekf = ExtendedKalmanFilter(
@@ -22,18 +28,27 @@ _ekf = ExtendedKalmanFilter(
     np.diag([0.1, 0.1, 0.1]),  # in docking station vs mission...
 )
 
-_tags = dict((tag.id, tag) for tag in tag_config.tags) if tag_config else {}
-if tag_config:
-    assert len(_tags) == len(tag_config.tags), "Duplicate tag ids in tag config"
+# Dead reckoning from odometry only, i.e. without corrections, to move observations from capture time to now.
+_reckoning = np.zeros((3, 1))
+_history: Deque[Tuple[float, np.ndarray]] = deque(maxlen=100)  # (odometry time, _reckoning)
 
 
-def position(ekf: ExtendedKalmanFilter, tag: Tag):
+@dataclass
+class TagObservation:
+    tag: Tag
+    z: np.ndarray  # tag position (forward, left) in robot frame at capture
+    r: np.ndarray  # observation covariance
+    position: complex  # tag position in site
+
+
+def observe(tag: Tag) -> Optional[TagObservation]:
+    """Tag observation in robot frame, independent of the state estimate"""
     logger.debug("Tag camera %s %s", tag.tagId, a2s(tag.camera.t))
 
-    _tag = _tags.get(tag.tagId)
+    _tag = tag_map.get(tag.tagId)
     if _tag is None:
         logger.debug("Ignoring unknown tag %s", tag)
-        return
+        return None
     p = _tag.position
 
     # ignore low tags, as duplicates on thin paper from Spot
@@ -51,19 +66,9 @@ def position(ekf: ExtendedKalmanFilter, tag: Tag):
     dz = p.z - tag_z
     if abs(dz) > 0.2:
         logger.debug("Ignoring invalid tag height %.3f %s", dz, tag)
-        return
+        return None
 
     tag_camera = complex(tag_x, tag_y)
-    # Ignore bad observations!? At extreme angles??? Check if distance makes sense wrt current state.
-    assert ekf.x is not None
-    tag_observation = complex(ekf.x[0, 0], ekf.x[1, 0]) + tag_camera * cmath.rect(1, ekf.x[2, 0])
-    tag_position = complex(p.x, p.y)
-    tag_delta = tag_observation - tag_position
-    logger.debug("tag distance %.3f %s", abs(tag_delta), tag)
-    if 0 and abs(tag_delta) > 0.3:
-        logger.debug("Ignoring invalid tag distance %.3f %s", abs(tag_delta), tag)
-        return
-
     z = np.array([[tag_x], [tag_y]])
     # Horizontal precision is better than depth/distance to tag.
     # Compensate for distortion in fisheye - increase R if angle gets close to pi/2 (by 3x).
@@ -71,10 +76,68 @@ def position(ekf: ExtendedKalmanFilter, tag: Tag):
     # TODO: Have good angle estimate independent of distance estimate - covariance below is not diagonal.
     angle = math.atan2(tag_y, tag_x)
     r = np.diag([0.2, 0.1]) * math.exp((angle / 1.4) ** 2) * math.exp((abs(tag_camera) ** 2))
-    ekf.correct(z, lambda x: tag_observation_model(x, tag_position), r)
+    return TagObservation(tag, z, r, complex(p.x, p.y))
+
+
+def observations(item: Tuple[List[Tag], Optional[Set[int]]]) -> List[TagObservation]:
+    """Observations of the tags expected in view, in worker"""
+    tags, ids = item
+    if ids is not None:
+        rejected = [tag.tagId for tag in tags if tag.tagId not in ids]
+        if rejected:
+            logger.debug("Ignoring unexpected tags %s", rejected)
+            tags = [tag for tag in tags if tag.tagId in ids]
+    return [o for o in map(observe, tags) if o is not None]
+
+
+def expected_tags(ekf: ExtendedKalmanFilter) -> Optional[Set[int]]:
+    assert ekf.x is not None and ekf.P is not None
+    x = ekf.x[:, 0]
+    return expected(x, math.sqrt(ekf.P[2, 2]), math.sqrt(ekf.P[0, 0] + ekf.P[1, 1]))
+
+
+def shift(z: np.ndarray, x0: np.ndarray, x1: np.ndarray) -> np.ndarray:
+    """Moves a position z in robot frame of pose x0 to the robot frame of pose x1"""
+    p = complex(x0[0, 0], x0[1, 0]) + complex(z[0, 0], z[1, 0]) * cmath.rect(1, x0[2, 0])
+    q = (p - complex(x1[0, 0], x1[1, 0])) * cmath.rect(1, -x1[2, 0])
+    return np.array([[q.real], [q.imag]])
+
+
+def correct(ekf: ExtendedKalmanFilter, observation: TagObservation, x0: Optional[np.ndarray] = None):
+    """
+    Corrects the state with the observation. The robot has moved since capture by the dead reckoning from pose x0
+    at capture to the current dead reckoning pose, if given.
+    """
+    assert ekf.x is not None
+    z = observation.z if x0 is None else shift(observation.z, x0, _reckoning)
+    tag_observation = complex(ekf.x[0, 0], ekf.x[1, 0]) + complex(z[0, 0], z[1, 0]) * cmath.rect(1, ekf.x[2, 0])
+    tag_delta = tag_observation - observation.position
+    logger.debug("tag distance %.3f %s", abs(tag_delta), observation.tag)
+    # Ignore bad observations!? At extreme angles??? Check if distance makes sense wrt current state.
+    if 0 and abs(tag_delta) > 0.3:
+        logger.debug("Ignoring invalid tag distance %.3f %s", abs(tag_delta), observation.tag)
+        return
+    ekf.correct(z, lambda x: tag_observation_model(x, observation.position), observation.r)
     ekf.x[2, 0] = norm_angle(ekf.x[2, 0])
 
 
+def position(ekf: ExtendedKalmanFilter, tag: Tag):
+    observation = observe(tag)
+    if observation is not None:
+        correct(ekf, observation)
+
+
+def reckoning(t: float) -> Optional[np.ndarray]:
+    """Dead reckoning pose at time t, None if t is before the history"""
+    for t_odometry, x in reversed(_history):
+        if t_odometry <= t:
+            return x
+    return None
+
+
+_worker = LatestWorker(observations, "tags")
+
+
 def docked(ekf: ExtendedKalmanFilter):
     assert site_config.dock.position
 
@@ -91,18 +154,15 @@ def docked(ekf: ExtendedKalmanFilter):
 
 
 async def _tracker():
-    from .driver import frames
-
     t_last: int = 0
 
-    async for frame in frames():
+    async for frame in frames(pose_period=200):
         try:
             if not frame.pose:
                 logger.debug("tags %s", frame)
-                if frame.tags is not None:
-                    for tag in frame.tags:
-                        position(_ekf, tag)
-                    # publish ekf state in odometry, to get a steady rate
+                if frame.tags:
+                    # solved in worker, corrected in _fuse, published in _odometry to get a steady rate
+                    _worker.submit(0.001 * frame.timestamp, (frame.tags, expected_tags(_ekf)))
                 if RobotState.docked:
                     docked(_ekf)
                 continue
@@ -149,8 +209,16 @@ async def _tracker():
             raise
 
 
+async def _fuse():
+    async for t, tag_observations in tag_results(_worker):
+        x0 = reckoning(t)
+        for observation in tag_observations:
+            correct(_ekf, observation, x0)
+
+
 async def _odometry():
     # Output topic: robot_tracking
+    global _reckoning
     t_last = 0.0
     async for odometry in topics.odometry.stream():
         # logger.debug("Odometry %s", odometry)
@@ -159,6 +227,8 @@ async def _odometry():
             logger.debug("odometry %.4f %s", dt, odometry)
             u = np.array([[odometry.speed], [odometry.omega]])
             _ekf.predict(u, motion_model, dt)
+            _reckoning, _ = motion_model(_reckoning, u, dt)
+            _history.append((odometry.time, _reckoning))
             logger.debug("state %.3f %s", odometry.time, a2s(_ekf.x.flatten()))
             logger.debug("cov %.3f %s", odometry.time, a2s(_ekf.P.flatten()))
             t = time.time()  # odometry.time
@@ -172,4 +242,5 @@ async def _odometry():
 async def driver():
     logger.info("Starting RealSense driver3...")
     start_task(_odometry())
+    start_task(_fuse())
     await _tracker()
@@ -1,4 +1,5 @@
 import logging
+from typing import Tuple
 
 import cv2
 import numpy as np
@@ -51,12 +52,11 @@ _masks = [mask(pts) > 0 for pts in _points]
 _areas = [mask.sum() for mask in _masks]
 
 
-def load_floor(file_name: str):
+def load_floor(file_name: str) -> np.ndarray:
     logger.info("Loading floor depth from %r", file_name)
-    # load and reshape, if required, floor level
+    # load and reshape, if required, floor level. Zero depth is no floor information.
     with open(file_name, "rb") as f:
-        floor_depth = np.load(f)
-        floor_depth = np.ma.masked_equal(floor_depth, 0).astype(np.int16)
+        floor_depth = np.ma.getdata(np.load(f)).astype(np.int16)
         # revert decimation from saved image
         h, w = floor_depth.shape
         if 2 * h == height:
@@ -67,25 +67,49 @@ def load_floor(file_name: str):
 
 
 class ObstacleDetector:
-    def __init__(self, floor_depth):
-        self.floor_depth = floor_depth
+    """
+    Compares depth to floor depth only at the pixels in the regions, gathered with precomputed flat indices.
+    The pixels are concatenated region by region, such that per region statistics are segment reductions.
+    """
 
-    def process(self, t: float, depth) -> ObstacleDetection:
-        assert self.floor_depth.shape == depth.shape
+    def __init__(self, floor_depth):
+        floor_depth = np.ma.filled(floor_depth, 0).astype(np.int16)
+        self.shape = floor_depth.shape
+        floor = floor_depth.ravel()
+        indices = []
+        for m in _masks:
+            index = np.flatnonzero(m)
+            # pixels without floor depth are ignored
+            indices.append(index[floor[index] != 0])
+        self.index = np.concatenate(indices)
+        self.starts = np.cumsum([0] + [len(index) for index in indices[:-1]])
+        assert all(len(index) > 0 for index in indices), "No floor depth in region"
+        self.floor = floor[self.index]
+        self.limits = np.array([obstacle_threshold * area for area in _areas])
+
+    def regions(self, depth: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns number of obstacle pixels and nearest obstacle depth (mm, 0 if none) per region"""
+        assert self.shape == depth.shape
+        d = depth.ravel()[self.index]
         # Pixels without stereo depth information, e.g. where one camera is occluded,
         # have depth = 0. Consider these as obstacles, e.g. when peeking around a corner.
         # Should have very few false positives in the regions of interest immediately in front of the robot
         # (for camera mounted high and pointing down).
-        # depth = np.ma.masked_equal(depth, 0)
         # also handles "holes", avoid falling down stairs
+        # int16 does not overflow for depth and floor below 32 m.
+        obstacles = np.abs(d.astype(np.int16, copy=False) - self.floor) >= distance_threshold
+        counts = np.add.reduceat(obstacles, self.starts, dtype=np.int32)
+        # nearest of the obstacles with depth, 0xFFFF when none
+        nearest = np.where(obstacles & (d > 0), d.astype(np.uint16, copy=False), 0xFFFF)
+        nearest = np.minimum.reduceat(nearest, self.starts)
+        return counts, np.where(nearest == 0xFFFF, 0, nearest)
 
-        obstacles = abs(depth - self.floor_depth) >= distance_threshold
-
-        def regions():
-            for mask, area in zip(_masks, _areas):
-                count = obstacles[mask].sum()
-                blocked = bool(count > obstacle_threshold * area)  # convert from numpy.bool_
-                logger.debug("REGION %s %s %s", count, area, blocked)
-                yield blocked
-
-        return ObstacleDetection(t, *list(regions()))
+    def process(self, t: float, depth) -> ObstacleDetection:
+        counts, nearest = self.regions(depth)
+        blocked = counts > self.limits
+        logger.debug("REGIONS %s %s %s", counts, nearest, blocked)
+        distances = nearest[blocked & (nearest > 0)]
+        distance = 0.001 * float(distances.min()) if len(distances) else None
+        # convert from numpy.bool_
+        left, center_left, center_right, right = (bool(b) for b in blocked)
+        return ObstacleDetection(t, left, center_left, center_right, right, distance)
@@ -3,7 +3,7 @@ from typing import Optional
 from dataclasses import dataclass
 
 from edge_control.models.state import State
-from edge_control.util.status import Status
+from edge_control.util.status import Counter, Status
 
 
 @dataclass
@@ -40,8 +40,17 @@ class RealsenseStatus:
     position = Status[Vector]()
     rotation = Status[Rotation]()
     stream_error = Status[str]()
+    tags_dropped = Counter()  # tag frames replaced by a later frame before solved
+    tags_latency = Status[float]()  # s, tag solve time in worker
+    tags_lag = Status[float]()  # s, from capture to fused
     override: float = 0  # time of override, revert to DIY tracking on expiration
 
     @staticmethod
     def fault(t: float):
         pass
+
+
+class DepthStatus:
+    sequence = Status[int]()  # last frame detected
+    dropped = Counter()  # frames captured but not detected, or detections not published, as falling behind
+    latency = Status[float]()  # s, from capture to detection in main process
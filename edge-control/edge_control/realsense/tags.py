@@ -2,23 +2,21 @@ import cmath
 import logging
 import time
 from math import atan2, pi, sqrt
-from typing import List, Tuple
+from typing import Any, Callable, List, Optional, Set, Tuple
 
 import numpy
 from numpy import linalg
 from numpy.typing import ArrayLike
 
 from edge_control.config import TagPosition, robot_config, tag_config
-from edge_control.util.filters import LP
+from edge_control.map.tagmap import TagMap
 
 from . import status
 from .T265 import Frame, Pose, Tag, to_site_position
 
 logger = logging.getLogger(__name__)
 
-_tag_index = dict((tag.id, tag) for tag in tag_config.tags) if tag_config else {}
-if tag_config:
-    assert len(_tag_index) == len(tag_config.tags), "Duplicate tag ids in tag config"
+tag_map = tag_config.map if tag_config else TagMap(())
 
 
 def norm_angle(a: float) -> float:
@@ -64,7 +62,8 @@ def tag_position(camera_position: ArrayLike, tag: Tag, pose: Pose) -> ArrayLike:
     return camera_position + numpy.array([camera_rotate[2], camera_rotate[0], camera_rotate[1]])
 
 
-def process(tag_frame: Frame, pose_frame: Frame, yaw_lp: LP):
+def process(tag_frame: Frame, pose_frame: Frame, yaw_lp: Callable[[float], Any]) -> List[status.TagStatus]:
+    """Status of the tags in tag_frame, passing the heading errors from the reference tags to yaw_lp"""
     assert pose_frame.pose is not None
     assert tag_frame.tags is not None
     assert robot_config.realsense  # TODO: pass tags, pose, and realsense config as parameters
@@ -76,7 +75,6 @@ def process(tag_frame: Frame, pose_frame: Frame, yaw_lp: LP):
     camera_position = numpy.array(pose.site_position()) + camera_offset
     heading = pose.site_heading()  # Heading may have error for matching against world
 
-    _max = (0, None, None)
     tags = []
     for tag_pose in tag_frame.tags:
         tag_id = tag_pose.tagId
@@ -101,7 +99,7 @@ def process(tag_frame: Frame, pose_frame: Frame, yaw_lp: LP):
 
         e = None
         dyaw = None
-        tag = _tag_index.get(tag_id)
+        tag = tag_map.get(tag_id)
         if tag is None:
             logger.debug("Tag %d ignored", tag_id)
         else:
@@ -126,14 +124,10 @@ def process(tag_frame: Frame, pose_frame: Frame, yaw_lp: LP):
             error = position - real_tag_position
             e = norm(error)
             logger.debug("Tag %d error %.3f %s", tag_id, e, error)
-            # if e > _max[0]: _max = (e, tag_id, dyaw)
 
         tags.append(status.TagStatus(tag_id, e, dyaw))
 
-    if 0:
-        e, tag_id, yaw = _max
-        status.RealsenseStatus.tags.set(tags)
-        status.RealsenseStatus.tag_error.set(status.TagStatus(tag_id, e, yaw) if tag_id is not None else None)
+    return tags
 
 
 def distance(x1, x2):
@@ -144,87 +138,114 @@ def norm(x):
     return linalg.norm(x[:2])
 
 
-def position(x0, pairs, camera_offset):
+def fit(observed: numpy.ndarray, world: numpy.ndarray, weights: Optional[numpy.ndarray] = None):
+    """
+    Closed form weighted least squares 2D rigid alignment (Procrustes) of observed positions (robot frame) to
+    world positions, as complex arrays: minimizes sum w |p + observed * exp(i heading) - world|^2.
+    :return: (robot position, heading, residual per pair)
+    """
+    w = numpy.ones(len(observed)) if weights is None else weights
+    w = w / w.sum()
+    a0 = (w * observed).sum()
+    b0 = (w * world).sum()
+    heading = numpy.angle((w * (world - b0) * numpy.conj(observed - a0)).sum())
+    rotation = cmath.rect(1, heading)
+    p = b0 - a0 * rotation
+    residuals = numpy.abs(p + observed * rotation - world)
+    return p, heading, residuals
+
+
+def position(
+    x0,
+    pairs,
+    camera_offset,
+    weights=None,
+    outlier: float = 0.2,
+    tag_status: Callable[[List[status.TagStatus]], Any] = status.RealsenseStatus.tags.set,
+):
     """
     Find the optimal x for the observed pairs
-    :param x0: (x, y, heading)
+    :param x0: (x, y, heading), the returned heading is the one closest to x0 heading
     :param pairs: list of (tag, complex) where tag is an observation and complex is the world position of the tag.
     :param camera_offset: 2D/3D offset of camera
+    :param weights: optional weight per pair
+    :param outlier: tags with larger residual (m) are rejected one by one, while more than two tags remain
+    :param tag_status: receives the residual of each tag used
     :return: (x, y, heading) or None if no match.
     """
-    from scipy.optimize import minimize
-
     if len(pairs) < 2:
         return
 
+    t_start = time.time()
     # camera t is (right, down, ahead) in direction of camera
     # camera_offset is (ahead, left, up) wrt robot ahead
+    # assumes camera points straight ahead in robot frame
+    t = numpy.array([tag.camera.t for tag, _ in pairs])
+    observed = (t[:, 2] + camera_offset.x) + 1j * (camera_offset.y - t[:, 0])
+    world = numpy.array([pos_real for _, pos_real in pairs])
+    ids = [tag.tagId for tag, _ in pairs]
+    weights = numpy.ones(len(pairs)) if weights is None else numpy.asarray(weights, dtype=float)
+
+    while True:
+        p, heading, residuals = fit(observed, world, weights)
+        worst = int(residuals.argmax())
+        if len(observed) <= 2 or residuals[worst] <= outlier:
+            break
+        logger.debug("Tag %d rejected, residual %.3f", ids[worst], residuals[worst])
+        observed = numpy.delete(observed, worst)
+        world = numpy.delete(world, worst)
+        weights = numpy.delete(weights, worst)
+        del ids[worst]
 
-    def error(robot_pos: complex, camera_yaw: float, debug=False) -> float:
-        # pos in world coords
-        # yaw in radians in world coords
-        _error = 0
-        for tag, pos_real in pairs:
-            tc = tag.camera.t
-            # assumes camera points straight ahead in robot frame
-            pos_est = robot_pos + complex(tc[2] + camera_offset.x, -tc[0] + camera_offset.y) * cmath.rect(1, camera_yaw)
-            delta = pos_est - pos_real
-            _error += abs(delta) ** 2
-            if debug:
-                logger.debug(
-                    "Tag delta %d %.3f %.3f %.3f",
-                    tag.tagId,
-                    abs(delta),
-                    delta.real,
-                    delta.imag,
-                )
-        return _error
-
-    def error_vector(x, debug=False) -> float:
-        return error(complex(x[0], x[1]), x[2], debug)
-
-    t_start = time.time()
-    res = minimize(error_vector, x0)
-    # res = minimize(error_vector, x0, method='nelder-mead', options={'xatol': 1e-8, 'disp': True})
     dt = time.time() - t_start
-    logger.debug("Position elapsed: %.3f", dt)
-
-    # Log deltas
-    _e = error_vector(res.x, debug=True)
-    e = sqrt(res.fun / len(pairs))
-    logger.debug("Position minimize residual: %g", e)
-
-    if not res.success:
-        logger.warning("Position minimize failed: %s", res.message)
-        return None
+    logger.debug("Position elapsed: %.6f", dt)
+    for tag_id, residual in zip(ids, residuals):
+        logger.debug("Tag residual %d %.3f", tag_id, residual)
+    tag_status([status.TagStatus(tag_id, float(r), None) for tag_id, r in zip(ids, residuals)])
 
+    e = sqrt((residuals**2).mean())
+    logger.debug("Position residual: %g", e)
     if e > 0.2:  # quite large if tag db is exact...
-        logger.warning("Position minimize residual too high: %g", e)
+        logger.warning("Position residual too high: %g", e)
         return None
 
-    # TODO: check that it is on a local minimum, i.e. sensitivity to changes in x or y
-    # If not very sensitive to a change, it is a poor fit and discard.
-
     # TODO: check that distance to x0 is not too large - or do that externally,
     # subject to velocity constraints - and accumulated uncertainty per axis.
-
-    # TODO: check bounds
-    # TODO: check that no single tag error is large
     # TODO: lower weight on depth to tag as it has a (much) bigger error (a few cm compared to a few mm on the bearing tag)
 
-    return res.x
+    return numpy.array([p.real, p.imag, x0[2] + norm_angle(heading - x0[2])])
+
+
+def expected(x, heading_sigma: float, position_sigma: float) -> Optional[Set[int]]:
+    """
+    Ids of the tags expected in view of the camera at robot pose x (x, y, heading) with the given standard deviations,
+    or None if too uncertain to tell.
+    """
+    rs = robot_config.realsense
+    assert rs
+    if 3 * heading_sigma > pi / 2:
+        return None
+    camera = complex(x[0], x[1]) + complex(rs.position.x, rs.position.y) * cmath.rect(1, x[2])
+    # margin for tag depth error
+    margin = 0.5 + 3 * position_sigma
+    visible = tag_map.visible(camera, x[2], rs.tag_fov + 6 * heading_sigma, rs.tag_range, margin)
+    return set(tag.id for tag in visible)
 
 
-def select(tags: List[Tag]) -> List[Tuple[Tag, complex]]:
+def select(tags: List[Tag], expected: Optional[Set[int]] = None) -> List[Tuple[Tag, complex]]:
     # returns the same format or None if no match
     pairs = []
     for tag in tags:
+        if expected is not None and tag.tagId not in expected:
+            logger.debug("Ignoring unexpected tag %d", tag.tagId)
+            continue
+
         # Filter out tags low in the camera, possible duplicates for Spot
         if tag.camera.t[1] > 0.5:  # axis points down from camera offset
             logger.warning("Ignoring tag %d too low: %s", tag.tagId, tag.camera.t)
             continue
 
-        _tag = _tag_index.get(tag.tagId)
+        _tag = tag_map.get(tag.tagId)
         if _tag:
             p = _tag.position
             # ignore low tags, as duplicates on thin paper from Spot AND
@@ -1,13 +1,17 @@
 import logging
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterator, Optional, Tuple
 
 from . import mission, topics
+from .arch.commands import CommandStatus
 from .arch.hagedag.status import HagedagStatus
 from .arch.husqvarna.status import HusqvarnaStatus
 from .arch.simulation.status import SimulationStatus
+from .connections import ApiStatus
 from .gps.status import GpsStatus
 from .models.messages import Battery, ObstacleDetection, Time
 from .models.state import State
+from .outbox import OutboxStatus
+from .publisher import MqttStatus
 # from .realsense.status import RealsenseStatus
 from .util.status import Status
 from .util.tasks import start_task
@@ -28,6 +32,10 @@ class RobotState:
     simulation = SimulationStatus
     hagedag = HagedagStatus
     husqvarna = HusqvarnaStatus
+    commands = CommandStatus
+    api = ApiStatus
+    outbox = OutboxStatus
+    mqtt = MqttStatus
 
     @staticmethod
     def fault(t: float) -> Optional[str]:
@@ -41,33 +49,44 @@ class RobotState:
 
     @staticmethod
     def as_dict(t: float) -> Dict[str, Any]:
-        def _as_dict(o) -> Dict[str, Any]:
-            res: Dict[str, Any] = {}
-            if o is None:
-                return res
-            for name, value in vars(o).items():
-                if name[0] == "_":
-                    continue
-                # check for Status at the top level only
-                if isinstance(value, staticmethod):
-                    continue
-                if isinstance(value, Status):
-                    value = value.get(t)
-                    # logger.debug("STATUS %s %r", name, value)
-                if hasattr(value, "__dict__") and value.__dict__:
-                    # class wrappers around basic types (e.g. Infrared(int)) has empty __dict__
-                    # also handles data classes
-                    value = _as_dict(value)
-                # elif is_dataclass(value): value = asdict(value)
-                if value is not None and value != {}:
-                    res[name] = value
-            return res
-
-        d = _as_dict(RobotState)
-        d.update(mission=_as_dict(mission.get()))
+        d = as_dict(RobotState, t)
+        d.update(mission=as_dict(mission.get(), t))
         return d
 
 
+def fields(o) -> Iterator[Tuple[str, Any]]:
+    for name, value in vars(o).items():
+        if name[0] == "_":
+            continue
+        if isinstance(value, staticmethod):
+            continue
+        yield name, value
+
+
+def value(o, t: float) -> Any:
+    # check for Status at the top level only
+    if isinstance(o, Status):
+        o = o.get(t)
+        # logger.debug("STATUS %s %r", name, value)
+    if hasattr(o, "__dict__") and o.__dict__:
+        # class wrappers around basic types (e.g. Infrared(int)) has empty __dict__
+        # also handles data classes
+        o = as_dict(o, t)
+    # elif is_dataclass(value): value = asdict(value)
+    return o
+
+
+def as_dict(o, t: float) -> Dict[str, Any]:
+    res: Dict[str, Any] = {}
+    if o is None:
+        return res
+    for name, v in fields(o):
+        v = value(v, t)
+        if v is not None and v != {}:
+            res[name] = v
+    return res
+
+
 async def _robot_state():
     async for message in topics.robot_state.stream():
         # logger.debug("robot_state message: %r", message)
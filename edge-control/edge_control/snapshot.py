@@ -0,0 +1,117 @@
+"""
+Robot status built and serialized once per tick, shared by the WebSocket API and MQTT.
+
+Top level sections of RobotState that are unchanged since the previous snapshot reuse their previous encoding.
+A Status is unchanged if its changed time and presence (expiration) are the same, other values are compared by
+equality, such that values mutated in place are not detected.
+
+Each snapshot also has a delta from the previous snapshot, with the values set and unset (expired) by path,
+"section" or "section.field" for the fields of status classes:
+
+    {"seq": 12, "time": 1600000000.0, "set": {"gps.gga": {...}, "docked": true}, "unset": ["hagedag.battery"]}
+
+A keyframe has the full status:
+
+    {"seq": 10, "time": 1600000000.0, "keyframe": true, "status": {...}}
+
+A client applies deltas in sequence to the last keyframe, and waits for the next keyframe on a gap in sequence.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import mission, topics
+from .models.state import StatusSnapshot
+from .robot import RobotState, as_dict, fields, value
+from .util.json import dumps
+from .util.status import Status
+
+
+def _key(o, t: float) -> Any:
+    if isinstance(o, Status):
+        return o.changed, o.present(t)
+    if isinstance(o, type):
+        return tuple(_key(v, t) for _, v in fields(o))
+    return o
+
+
+def _same(key1, key2) -> bool:
+    try:
+        return bool(key1 == key2)
+    except ValueError:
+        # e.g. numpy arrays
+        return False
+
+
+def keyframe(snapshot: StatusSnapshot) -> str:
+    return f'{{"seq": {snapshot.seq}, "time": {snapshot.time!r}, "keyframe": true, "status": {snapshot.encoded}}}'
+
+
+class SnapshotBuilder:
+    def __init__(self):
+        self.seq = 0
+        self._values: Dict[str, Tuple[Any, Any]] = {}  # path: (key, value or None if empty)
+        self._sections: Dict[str, Optional[str]] = {}  # name: encoded or None if empty
+        self.encoded = 0  # sections encoded
+        self.reused = 0  # sections reused from previous snapshot
+
+    def _update(self, path: str, o, t: float, changes: Dict[str, Any], unset: List[str]) -> bool:
+        """Updates value at path, returns True if changed"""
+        key = _key(o, t)
+        previous = self._values.get(path)
+        if previous is not None and _same(previous[0], key):
+            return False
+        v = value(o, t)
+        if v == {}:
+            v = None
+        self._values[path] = key, v
+        if v is not None:
+            changes[path] = v
+        elif previous is not None and previous[1] is not None:
+            unset.append(path)
+        return True
+
+    def build(self, t: float) -> StatusSnapshot:
+        """Encoding of RobotState.as_dict(t) and the delta from the previous build"""
+        self.seq += 1
+        changes: Dict[str, Any] = {}
+        unset: List[str] = []
+        parts = []
+        for name, o in fields(RobotState):
+            if isinstance(o, type):
+                paths = [(f"{name}.{field}", f) for field, f in fields(o)]
+                changed = [self._update(path, f, t, changes, unset) for path, f in paths]
+                if any(changed) or name not in self._sections:
+                    section = dict((path.split(".", 1)[1], self._values[path][1]) for path, _ in paths)
+                    section = dict((k, v) for k, v in section.items() if v is not None)
+                    self._sections[name] = dumps(section) if section else None
+                    self.encoded += 1
+                else:
+                    self.reused += 1
+            elif self._update(name, o, t, changes, unset) or name not in self._sections:
+                v = self._values[name][1]
+                self._sections[name] = None if v is None else dumps(v)
+                self.encoded += 1
+            else:
+                self.reused += 1
+            if self._sections[name] is not None:
+                parts.append(f'"{name}": {self._sections[name]}')
+
+        # mission status is mutated in place, and always present
+        m = as_dict(mission.get(), t)
+        previous = self._values.get("mission")
+        if previous is None or previous[1] != m:
+            self._values["mission"] = m, m
+            changes["mission"] = m
+        parts.append('"mission": ' + dumps(m))
+
+        delta = dumps({"seq": self.seq, "time": t, "set": changes, "unset": unset})
+        return StatusSnapshot(t, "{" + ", ".join(parts) + "}", self.seq, delta)
+
+
+async def run(period: float = 1.0):
+    builder = SnapshotBuilder()
+    while True:
+        await asyncio.sleep(period)
+        await topics.robot_status.publish(builder.build(time.time()))
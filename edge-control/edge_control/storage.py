@@ -1,21 +1,175 @@
 """
 Store robot tracking information per session such that it can be presented in a GUI.
+
+The tracking history is a ring of fixed capacity of (time, x, y, theta) records in a numpy array, so memory is
+constant. Optionally every record is also appended to a file per session, for range queries beyond the ring.
+
+Clients get the trail decimated to a resolution, maintained as records are appended. Records are numbered by
+sequence from 1, a client resumes from the sequence number (cursor) of the last record it has been sent.
 """
 
 import logging
-from typing import List
+import math
+import os
+import time
+from collections import deque
+from typing import BinaryIO, Deque, Dict, List, Optional, Tuple, cast
+
+import numpy as np
 
 from edge_control import topics
+from edge_control.config import Lazy, robot_config
 from edge_control.models.state import State
 
 logger = logging.getLogger(__name__)
-_storage = []  # type: List[State]
+RECORD = np.dtype([("time", "<f8"), ("x", "<f8"), ("y", "<f8"), ("theta", "<f8")])
+
+
+class Trail:
+    """
+    Trail decimated by distance: a point is kept when at least resolution from the last point kept.
+    Bounded, the oldest points are dropped.
+    """
+
+    def __init__(self, resolution: float, capacity: int):
+        self.resolution = resolution
+        self.points: Deque[Tuple[int, float, float]] = deque(maxlen=capacity)  # (sequence, x, y)
+        self._last: Optional[complex] = None
+
+    def update(self, sequence: int, x: float, y: float):
+        p = complex(x, y)
+        if self._last is None or abs(p - self._last) >= self.resolution:
+            self._last = p
+            self.points.append((sequence, x, y))
+
+    def since(self, cursor: int) -> List[Tuple[int, float, float]]:
+        """Points after record sequence number cursor"""
+        points = self.points
+        if not points or points[-1][0] <= cursor:
+            return []
+        # newest first as resuming clients mostly lack only the last few points
+        i = len(points)
+        while i > 0 and points[i - 1][0] > cursor:
+            i -= 1
+        return [points[j] for j in range(i, len(points))]
+
+
+def resolution_level(resolution: float) -> float:
+    """Resolution rounded to a power of two cm, such that clients share trails"""
+    return 0.01 * 2 ** max(0, min(12, round(math.log2(max(resolution, 0.01) / 0.01))))
+
+
+class TrackStore:
+    def __init__(self, capacity: int, retention: float = 0):
+        self.capacity = capacity
+        self.retention = retention  # s, records older than retention wrt the last record are not returned, 0 for all
+        self._data = np.zeros(capacity, dtype=RECORD)
+        self.count = 0  # records appended, and sequence number of the last record
+        self.spill_file: Optional[str] = None
+        self._spill: Optional[BinaryIO] = None
+        self._trails: Dict[float, Trail] = {}
+
+    def trail(self, resolution: float) -> Trail:
+        """Trail at the resolution level, initialized from the records in the ring on first use"""
+        level = resolution_level(resolution)
+        trail = self._trails.get(level)
+        if trail is None:
+            trail = Trail(level, self.capacity)
+            records = np.concatenate(self._segments()) if self.count else self._data[:0]
+            first = self.count - len(records) + 1
+            for i, (x, y) in enumerate(zip(records["x"].tolist(), records["y"].tolist())):
+                trail.update(first + i, x, y)
+            self._trails[level] = trail
+        return trail
+
+    def spill(self, file_name: str):
+        """Also append records to file, readable with load()"""
+        self.spill_file = file_name
+        self._spill = open(file_name, "ab")
+
+    def append(self, t: float, state: State):
+        record = self._data[self.count % self.capacity]
+        record["time"] = t
+        record["x"] = state.x
+        record["y"] = state.y
+        record["theta"] = state.theta
+        self.count += 1
+        if self._spill:
+            self._spill.write(record.tobytes())
+        for trail in self._trails.values():
+            trail.update(self.count, state.x, state.y)
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    @property
+    def last(self) -> Optional[float]:
+        return float(self._data[(self.count - 1) % self.capacity]["time"]) if self.count else None
+
+    def _segments(self) -> List[np.ndarray]:
+        # oldest first, views
+        i = self.count % self.capacity
+        if self.count <= self.capacity:
+            return [self._data[: self.count]]
+        return [self._data[i:], self._data[:i]]
+
+    def range(self, t0: Optional[float] = None, t1: Optional[float] = None) -> np.ndarray:
+        """Copy of records with t0 <= time < t1, from the spill file if older than the ring"""
+        if not self.count:
+            return self._data[:0].copy()
+        if self.retention:
+            t_min = self.last - self.retention  # type: ignore
+            t0 = t_min if t0 is None else max(t0, t_min)
+        segments = self._segments()
+        if t0 is not None and t0 < segments[0]["time"][0] and self.count > self.capacity and self._spill:
+            self._spill.flush()
+            segments = [load(self.spill_file)]  # type: ignore
+        parts = []
+        for records in segments:
+            times = records["time"]
+            i0 = 0 if t0 is None else np.searchsorted(times, t0)
+            i1 = len(records) if t1 is None else np.searchsorted(times, t1)
+            parts.append(records[i0:i1])
+        return np.concatenate(parts)
+
+    def close(self):
+        if self._spill:
+            self._spill.close()
+            self._spill = None
+
+
+def load(file_name: str) -> np.ndarray:
+    """Records in spill file, memory mapped"""
+    if not os.path.getsize(file_name):
+        return np.zeros(0, dtype=RECORD)
+    return np.memmap(file_name, dtype=RECORD, mode="r")
+
+
+def to_states(records: np.ndarray) -> List[State]:
+    return [State(x, y, theta) for x, y, theta in zip(*(records[k].tolist() for k in ("x", "y", "theta")))]
+
+
+def to_dicts(records: np.ndarray) -> List[Dict[str, float]]:
+    """Records as asdict(State)"""
+    return [dict(x=x, y=y, theta=theta) for x, y, theta in zip(*(records[k].tolist() for k in ("x", "y", "theta")))]
+
+
+# created on first use, not on import with the robot configuration
+track = cast(TrackStore, Lazy(lambda: TrackStore(robot_config.tracking_capacity, robot_config.tracking_retention)))
+session = int(time.time())  # sequence numbers (cursors) are valid within the session only
 
 
 async def store():
-    async for msg in topics.robot_tracking.stream():
-        _storage.append(msg)
+    if robot_config.tracking_directory:
+        file_name = os.path.join(robot_config.tracking_directory, time.strftime("tracking-%Y%m%d-%H%M%S.bin"))
+        logger.info("Storing tracking in %s", file_name)
+        track.spill(file_name)
+    try:
+        async for msg in topics.robot_tracking.stream():
+            track.append(time.time(), msg)
+    finally:
+        track.close()
 
 
-def get():
-    return _storage
+def get(t0: Optional[float] = None, t1: Optional[float] = None) -> List[State]:
+    return to_states(track.range(t0, t1))
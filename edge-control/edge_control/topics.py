@@ -1,24 +1,47 @@
 from .gps.messages import GGA
 from .models import cdf
-from .models.messages import FromRobot, LightsCommand, MissionCommand, Odometry, SitePosition, ToRobot
+from .models.messages import (
+    FromRobot,
+    LightsCommand,
+    MissionAbort,
+    MissionCommand,
+    MissionStart,
+    MoveCommand,
+    ObstacleDetection,
+    Odometry,
+    SitePosition,
+    StopCommand,
+    ToRobot,
+)
 from .models.ptz import ToPanTiltZoom
-from .models.state import State
+from .models.state import State, StatusSnapshot
 from .util.inrobot import BatteriesStatus, EdgeStatus, Envelope
 from .util.pubsub import Topic
 
-# robot commands - generic for several robots
-robot_command: Topic[ToRobot] = Topic[ToRobot]("robot_command")
-mission_command: Topic[MissionCommand] = Topic[MissionCommand]("mission_command")
+
+def _stop_supersedes(command: ToRobot, pending: ToRobot) -> bool:
+    return isinstance(command, StopCommand) and isinstance(pending, MoveCommand)
+
+
+def _abort_supersedes(command: MissionCommand, pending: MissionCommand) -> bool:
+    return isinstance(command, MissionAbort) and isinstance(pending, MissionStart)
+
+
+# robot commands - generic for several robots. Stop and abort flush pending moves and starts in subscriber queues.
+robot_command: Topic[ToRobot] = Topic[ToRobot]("robot_command", _stop_supersedes)
+mission_command: Topic[MissionCommand] = Topic[MissionCommand]("mission_command", _abort_supersedes)
 
 # robot state - generic for several robots
 inrobot_api: Topic[Envelope] = Topic[Envelope]("inrobot_api")
 robot_state: Topic[FromRobot] = Topic[FromRobot]("robot_state")
 edge_status: Topic[EdgeStatus] = Topic[EdgeStatus]("edge_status")
 batteries_status: Topic[BatteriesStatus] = Topic[BatteriesStatus]("batteries_status")
+robot_status: Topic[StatusSnapshot] = Topic[StatusSnapshot]("robot_status")  # RobotState, once per second
 
 # tracking position, speed and heading - specific for robot type (e.g. two-wheeled turtle)
 odometry: Topic[Odometry] = Topic[Odometry]("odometry")
 robot_tracking: Topic[State] = Topic[State]("robot_tracking")
+obstacle_detection: Topic[ObstacleDetection] = Topic[ObstacleDetection]("obstacle_detection")  # per depth frame
 
 # site and world positions
 site_position: Topic[SitePosition] = Topic[SitePosition]("site_position")
@@ -1,4 +1,4 @@
-from struct import unpack_from
+from struct import pack, unpack_from
 
 
 class UInt32(int):
@@ -29,3 +29,10 @@ def decode(clz, data: bytes, endian=""):
     """Decode binary data defined in a dataclass defined in terms of the above fields"""
     fmt = "".join(t.format for t in clz.__annotations__.values())
     return clz(*unpack_from(endian + fmt, data))
+
+
+def encode(o, endian="") -> bytes:
+    """Encode a dataclass instance defined in terms of the above fields, inverse of decode()"""
+    clz = type(o)
+    fmt = "".join(t.format for t in clz.__annotations__.values())
+    return pack(endian + fmt, *(getattr(o, name) for name in clz.__annotations__))
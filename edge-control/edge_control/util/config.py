@@ -1,12 +1,8 @@
 import logging
-import logging.config
 import os
 from pathlib import Path
 from typing import Type, TypeVar
 
-from dacite import from_dict
-from yaml import safe_load
-
 logger = logging.getLogger(__name__)
 T = TypeVar("T")
 
@@ -22,6 +18,9 @@ def filepath(filename: str) -> Path:
 
 
 def read_config(filename: str, data_class: Type[T]) -> T:
+    from dacite import from_dict
+    from yaml import safe_load
+
     path = filepath(filename)
     logger.debug("Read config for %s from %s", data_class.__name__, path)
     with path.open() as file:
@@ -30,6 +29,10 @@ def read_config(filename: str, data_class: Type[T]) -> T:
 
 
 def config_logging(config_file=None, verbose=False):
+    import logging.config
+
+    from yaml import safe_load
+
     try:
         if config_file:
             with open(config_file) as f:
@@ -0,0 +1,206 @@
+"""
+Indexed recording of image frames (e.g. depth) with timestamps, for O(1) random access by memory mapping the file.
+
+Layout: a header block with magic and JSON describing dtype, shape (after decimation), decimation and compression,
+then the frames. Uncompressed frames are fixed size records (time, frame), such that the frames are zero-copy
+views into the file and a recording cut short (e.g. power loss) is readable up to the last complete frame.
+Compressed frames are (time, size, zlib data) records with an index of offsets at the end of the file, rebuilt by
+scanning the records if the recording was not closed.
+"""
+
+import json
+import mmap
+import struct
+import zlib
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+MAGIC = b"EDGEFRM1"
+INDEX_MAGIC = b"EDGEIDX1"
+_HEADER_SIZE = 4096
+_RECORD = struct.Struct("<dI")
+_TRAILER = struct.Struct("<Q8s")
+_INDEX = np.dtype([("time", "<f8"), ("offset", "<u8"), ("size", "<u4")])
+
+
+class Writer:
+    def __init__(
+        self,
+        file_name: str,
+        shape: Tuple[int, int],
+        dtype=np.uint16,
+        decimation: int = 1,
+        compression: Optional[str] = None,
+        period: float = 0,
+    ):
+        assert compression in (None, "zlib"), "Unsupported compression " + str(compression)
+        self.dtype = np.dtype(dtype)
+        self.decimation = decimation
+        self.shape = tuple((n + decimation - 1) // decimation for n in shape)
+        self.compression = compression
+        self.period = period  # minimum time between frames
+        self.time: Optional[float] = None
+        self.index: List[Tuple[float, int, int]] = []  # time, offset, size
+        header = dict(
+            dtype=self.dtype.str, shape=self.shape, decimation=decimation, compression=compression, period=period
+        )
+        data = MAGIC + json.dumps(header).encode("ascii")
+        assert len(data) < _HEADER_SIZE
+        self.file = open(file_name, "wb")
+        self.file.write(data.ljust(_HEADER_SIZE, b"\0"))
+
+    def write(self, t: float, image: np.ndarray) -> bool:
+        """Writes the frame unless within period of the last frame written, returns True if written"""
+        if self.time is not None and t < self.time + self.period:
+            return False
+        self.time = t
+        if self.decimation > 1:
+            image = image[:: self.decimation, :: self.decimation]
+        assert image.shape == self.shape, f"Invalid shape {image.shape}"
+        data = np.ascontiguousarray(image, dtype=self.dtype).tobytes()
+        if self.compression:
+            data = zlib.compress(data, 1)
+            self.index.append((t, self.file.tell(), len(data)))
+            self.file.write(_RECORD.pack(t, len(data)))
+        else:
+            self.file.write(struct.pack("<d", t))
+        self.file.write(data)
+        return True
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        if self.compression:
+            offset = self.file.tell()
+            self.file.write(np.array(self.index, dtype=_INDEX).tobytes())
+            self.file.write(_TRAILER.pack(offset, INDEX_MAGIC))
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class Reader:
+    def __init__(self, file_name: str):
+        with open(file_name, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = self._mmap
+        assert buf[: len(MAGIC)] == MAGIC, "Not a frame file: " + file_name
+        header = json.loads(bytes(buf[len(MAGIC) : _HEADER_SIZE]).rstrip(b"\0"))
+        self.dtype = np.dtype(header["dtype"])
+        self.shape: Tuple[int, ...] = tuple(header["shape"])
+        self.decimation: int = header["decimation"]
+        self.compression: Optional[str] = header["compression"]
+        self._data = np.frombuffer(buf, dtype=np.uint8)
+        if self.compression:
+            self.index = self._read_index()
+            self.times = self.index["time"]
+            self.frames = None
+        else:
+            record = np.dtype([("time", "<f8"), ("frame", self.dtype, self.shape)])
+            n = (len(buf) - _HEADER_SIZE) // record.itemsize
+            records = self._data[_HEADER_SIZE : _HEADER_SIZE + n * record.itemsize].view(record)
+            self.times = records["time"]
+            # zero-copy views of all frames
+            self.frames = records["frame"]
+
+    def _read_index(self) -> np.ndarray:
+        buf = self._mmap
+        if len(buf) >= _HEADER_SIZE + _TRAILER.size:
+            offset, magic = _TRAILER.unpack_from(buf, len(buf) - _TRAILER.size)
+            if magic == INDEX_MAGIC:
+                return self._data[offset : len(buf) - _TRAILER.size].view(_INDEX)
+        # not closed, scan records
+        index = []
+        offset = _HEADER_SIZE
+        while offset + _RECORD.size <= len(buf):
+            t, size = _RECORD.unpack_from(buf, offset)
+            if offset + _RECORD.size + size > len(buf):
+                break
+            index.append((t, offset, size))
+            offset += _RECORD.size + size
+        return np.array(index, dtype=_INDEX)
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def __getitem__(self, i: int) -> Tuple[float, np.ndarray]:
+        """Time and frame i, a read-only view into the file when not compressed"""
+        if self.frames is not None:
+            return float(self.times[i]), self.frames[i]
+        t, offset, size = self.index[i]
+        start = int(offset) + _RECORD.size
+        data = zlib.decompress(self._data[start : start + int(size)].data)
+        return float(t), np.frombuffer(data, dtype=self.dtype).reshape(self.shape)
+
+    def find(self, t: float) -> int:
+        """Index of the first frame at or after time t"""
+        return int(np.searchsorted(self.times, t))
+
+    def __iter__(self) -> Iterator[Tuple[float, np.ndarray]]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def close(self):
+        # views into the mapped file must be released before closing it
+        self.times = self.frames = self.index = self._data = None  # type: ignore
+        try:
+            self._mmap.close()
+        except BufferError:
+            # frames still referenced, unmapped when released
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def convert(src: str, dst: str, decimation: int = 1, compression: Optional[str] = None):
+    """Converts a recording of numpy.save (timestamp ms, image) pairs, as written by the former util.fstreamer"""
+    with open(src, "rb") as f:
+        writer: Optional[Writer] = None
+        while True:
+            try:
+                timestamp = np.load(f)
+                image = np.load(f)
+            except EOFError:
+                break
+            if writer is None:
+                writer = Writer(dst, image.shape, image.dtype, decimation, compression)
+            writer.write(0.001 * int(timestamp), image)
+        if writer:
+            writer.close()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="edge_control.util.framefile", description="Frame recordings")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    info = subparsers.add_parser("info", help="Describe recording")
+    info.add_argument("file")
+    conv = subparsers.add_parser("convert", help="Convert numpy.save stream recording")
+    conv.add_argument("src")
+    conv.add_argument("dst")
+    conv.add_argument("--decimation", type=int, default=1)
+    conv.add_argument("--compression", choices=["zlib"])
+    args = parser.parse_args()
+    if args.command == "convert":
+        convert(args.src, args.dst, args.decimation, args.compression)
+    else:
+        with Reader(args.file) as reader:
+            print(f"{len(reader)} frames {reader.dtype} {reader.shape} decimation {reader.decimation}", end=" ")
+            print(f"compression {reader.compression}", end=" ")
+            if len(reader):
+                print(f"time {reader.times[0]:.3f} - {reader.times[-1]:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,176 @@
+"""
+JSON encoding of dataclasses and decoding to dataclasses, with accessors compiled once per dataclass.
+
+Dataclasses are encoded field by field by the json C encoder, without the deep copies of dataclasses.asdict, and
+None fields are left out. Enums are encoded by value and numpy scalars and arrays as numbers and lists.
+
+Decoding checks types as dacite.from_dict does for the types in messages: primitives (int is accepted as float),
+Optional, List, Dict, Enum and nested dataclasses. A missing field gets its default, or None if Optional.
+"""
+
+import enum
 import json
-from typing import Any, Type, TypeVar
+import sys
+import typing
+from typing import Any, Callable, Dict, Type, TypeVar
 
 import dataclasses
-from dacite import from_dict
 
 T = TypeVar("T")
+_NONE = type(None)
+_encoders: Dict[type, Callable[[Any], Dict[str, Any]]] = {}
+_decoders: Dict[type, Callable[[Any], Any]] = {}
+
 
+def _compile_encoder(cls: type) -> Callable[[Any], Dict[str, Any]]:
+    lines = ["def encode(o):", "    d = {}"]
+    for f in dataclasses.fields(cls):
+        # field names are identifiers
+        lines += [f"    v = o.{f.name}", "    if v is not None:", f"        d[{f.name!r}] = v"]
+    lines.append("    return d")
+    namespace: Dict[str, Any] = {}
+    exec("\n".join(lines), namespace)
+    return namespace["encode"]
 
-class EncodeDataclasses(json.JSONEncoder):
-    def default(self, o: Any):
-        if dataclasses.is_dataclass(o):
-            return dataclasses.asdict(o)
-        return super().default(o)
+
+def _default(o: Any) -> Any:
+    encode = _encoders.get(type(o))
+    if encode is None:
+        if dataclasses.is_dataclass(o) and not isinstance(o, type):
+            encode = _encoders[type(o)] = _compile_encoder(type(o))
+        elif isinstance(o, enum.Enum):
+            return o.value
+        elif "numpy" in sys.modules and isinstance(o, (sys.modules["numpy"].generic, sys.modules["numpy"].ndarray)):
+            # numpy is not imported for encoding only, values can only be numpy if imported elsewhere
+            return o.tolist()
+        else:
+            raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+    # nested values are encoded by further calls
+    return encode(o)
+
+
+_encoder = json.JSONEncoder(default=_default)
 
 
 def dumps(o: Any) -> str:
-    # TODO: remove key: None entries
-    return json.dumps(o, cls=EncodeDataclasses)
+    return _encoder.encode(o)
+
+
+class DecodeError(ValueError):
+    pass
+
+
+def _check(cls: type) -> Callable[[Any], Any]:
+    def decode(v):
+        if isinstance(v, cls) and not (isinstance(v, bool) and cls is not bool):
+            return v
+        raise DecodeError(f"Expected {cls.__name__}: {v!r}")
+
+    return decode
+
+
+def _float(v) -> float:
+    if isinstance(v, (int, float)) and not isinstance(v, bool):
+        return float(v)
+    raise DecodeError(f"Expected float: {v!r}")
+
+
+def _compile_type(tp) -> Callable[[Any], Any]:
+    if tp is Any or isinstance(tp, TypeVar):
+        return lambda v: v
+    if tp is float:
+        return _float
+    if tp in (int, str, bool):
+        return _check(tp)
+    if isinstance(tp, type) and dataclasses.is_dataclass(tp):
+        return decoder(tp)
+    if isinstance(tp, type) and issubclass(tp, enum.Enum):
+        return tp
+    origin = typing.get_origin(tp)
+    args = typing.get_args(tp)
+    if origin is typing.Union:
+        options = [_compile_type(arg) for arg in args if arg is not _NONE]
+        optional = _NONE in args
+
+        def union(v):
+            if v is None and optional:
+                return None
+            for option in options:
+                try:
+                    return option(v)
+                except (DecodeError, TypeError, ValueError):
+                    pass
+            raise DecodeError(f"Expected {tp}: {v!r}")
+
+        return union
+    if origin in (list, typing.List):
+        item = _compile_type(args[0]) if args else _compile_type(Any)
+
+        def decode_list(v):
+            if not isinstance(v, list):
+                raise DecodeError(f"Expected list: {v!r}")
+            return [item(x) for x in v]
+
+        return decode_list
+    if origin in (dict, typing.Dict):
+        value = _compile_type(args[1]) if args else _compile_type(Any)
+
+        def decode_dict(v):
+            if not isinstance(v, dict):
+                raise DecodeError(f"Expected dict: {v!r}")
+            return dict((k, value(x)) for k, x in v.items())
+
+        return decode_dict
+    if isinstance(tp, type):
+        return _check(tp)
+    return lambda v: v
+
+
+def _compile_decoder(cls: type) -> Callable[[Any], Any]:
+    hints = typing.get_type_hints(cls)
+    fields = []  # (name, decode, required)
+    for f in dataclasses.fields(cls):
+        if not f.init:
+            continue
+        tp = hints[f.name]
+        required = f.default is dataclasses.MISSING and f.default_factory is dataclasses.MISSING  # type: ignore
+        optional = typing.get_origin(tp) is typing.Union and _NONE in typing.get_args(tp)
+        fields.append((f.name, _compile_type(tp), required and not optional, required))
+
+    def decode(data):
+        if not isinstance(data, dict):
+            raise DecodeError(f"Expected {cls.__name__} as dict: {data!r}")
+        kwargs = {}
+        for name, decode_field, required, no_default in fields:
+            if name in data:
+                kwargs[name] = decode_field(data[name])
+            elif required:
+                raise DecodeError(f"Missing {cls.__name__}.{name}")
+            elif no_default:
+                # Optional without default
+                kwargs[name] = None
+        return cls(**kwargs)
+
+    return decode
+
+
+def decoder(cls: Type[T]) -> Callable[[Any], T]:
+    decode = _decoders.get(cls)
+    if decode is None:
+        # placeholder for recursive dataclasses
+        _decoders[cls] = lambda v: _decoders[cls](v)
+        try:
+            decode = _decoders[cls] = _compile_decoder(cls)
+        except Exception:
+            # not left to recurse forever on the next call
+            del _decoders[cls]
+            raise
+    return decode
+
+
+def from_dict(data_class: Type[T], data: Any) -> T:
+    return decoder(data_class)(data)
 
 
 def loads(data: Any, data_class: Type[T]) -> T:
-    return from_dict(data_class=data_class, data=json.loads(data))
+    return from_dict(data_class, json.loads(data))
@@ -1,40 +1,157 @@
+"""
+MQTT client with a dispatcher of received messages to handlers by topic filter (with + and # wildcards).
+
+Payloads are decoded by the decoder of the route, compiled once, and invalid messages are not passed to handlers.
+Messages are handled in order per topic, concurrently for different topics, such that a slow handler only holds
+back messages of its own topic. Routes on the fast path (e.g. estop) are handled on receipt.
+"""
+
+import asyncio
+import json
 import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
 
 import gmqtt
+from dataclasses import dataclass
+
+from .json import decoder
 
 logger = logging.getLogger(__name__)
+Decoder = Callable[[bytes], Any]
+Handler = Callable[["Client", str, Any], Awaitable[Any]]  # (client, topic, decoded message)
+
+
+def json_decoder(cls: Optional[type] = None) -> Decoder:
+    """JSON payload, validated and decoded to dataclass cls if given"""
+    if cls is None:
+        return json.loads
+    decode: Callable[[Any], Any] = decoder(cls)
+    return lambda payload: decode(json.loads(payload))
+
+
+def matches(topic_filter: str, topic: str) -> bool:
+    """MQTT topic filter matching, + for one level and # for the remaining levels"""
+    levels = topic.split("/")
+    filter_levels = topic_filter.split("/")
+    for i, level in enumerate(filter_levels):
+        if level == "#":
+            return True
+        if i >= len(levels) or level not in ("+", levels[i]):
+            return False
+    return len(filter_levels) == len(levels)
+
+
+@dataclass
+class Route:
+    topic_filter: str
+    handler: Handler
+    decode: Decoder
+    fast: bool = False  # handled on receipt, not queued
+
+
+class Dispatcher:
+    def __init__(self, limit: int = 100):
+        self.limit = limit  # max messages queued per topic, the oldest are dropped
+        self.routes: Dict[str, Route] = {}  # by topic filter
+        self._routes: Dict[str, Optional[Route]] = {}  # by topic, resolved
+        self._queues: Dict[str, asyncio.Queue] = {}  # by topic
+        self._workers: Dict[str, asyncio.Task] = {}  # by topic
+        self.received = 0
+        self.invalid = 0  # not decoded
+        self.dropped = 0  # queue full
+        self.failed = 0  # handler raised
+
+    def register(self, topic_filter: str, handler: Handler, decode: Decoder = json.loads, fast: bool = False):
+        self.routes[topic_filter] = Route(topic_filter, handler, decode, fast)
+        self._routes.clear()
+
+    def route(self, topic: str) -> Optional[Route]:
+        """Route of topic, exact topic before the first matching wildcard filter"""
+        try:
+            return self._routes[topic]
+        except KeyError:
+            pass
+        route = self.routes.get(topic)
+        if route is None:
+            route = next((r for r in self.routes.values() if matches(r.topic_filter, topic)), None)
+        if len(self._routes) < 1000:
+            self._routes[topic] = route
+        return route
+
+    async def dispatch(self, client: "Client", topic: str, payload: bytes) -> bool:
+        """Decodes and queues message for the handler, or handles it if on the fast path"""
+        route = self.route(topic)
+        if route is None:
+            logger.error("Ignoring topic %r", topic)
+            return False
+        self.received += 1
+        try:
+            msg = route.decode(payload)
+        except Exception as e:
+            self.invalid += 1
+            logger.error("Invalid message on %s: %r %s", topic, payload, e)
+            return False
+        if route.fast:
+            await self._handle(route, client, topic, msg)
+            return True
+        queue = self._queues.get(topic)
+        if queue is None:
+            queue = self._queues[topic] = asyncio.Queue()
+            self._workers[topic] = asyncio.create_task(self._work(queue))
+        if queue.qsize() >= self.limit:
+            queue.get_nowait()
+            self.dropped += 1
+        queue.put_nowait((route, client, topic, msg))
+        return True
+
+    async def _handle(self, route: Route, client: "Client", topic: str, msg: Any):
+        try:
+            await route.handler(client, topic, msg)
+        except Exception:
+            self.failed += 1
+            logger.exception("Handler of %s failed on %r", topic, msg)
+
+    async def _work(self, queue: asyncio.Queue):
+        while True:
+            await self._handle(*await queue.get())
+
+    def clear(self, topic_filter: str) -> int:
+        """Drops queued messages of the topics matching the filter, returns the number dropped"""
+        n = 0
+        for topic, queue in self._queues.items():
+            if matches(topic_filter, topic):
+                while not queue.empty():
+                    queue.get_nowait()
+                    n += 1
+        return n
+
+    def close(self):
+        for task in self._workers.values():
+            task.cancel()
+        self._workers.clear()
+        self._queues.clear()
 
 
 class Client:
-    def __init__(self, client: gmqtt.Client, name: str, handlers={}):
+    def __init__(self, client: gmqtt.Client, name: str, dispatcher: Dispatcher):
         self.client = client
         self.name = name
-        self.handlers = handlers.copy()
+        self.dispatcher = dispatcher
         client.on_message = self.on_message
         client.on_connect = self.on_connect
         client.on_disconnect = self.on_disconnect
 
-    def register(self, topic: str, handler):
-        # TODO: QoS
-        self.handlers[topic] = handler
-
     def on_connect(self, client, flags, rc, properties):
         logger.info("Connection to %s open", self.name)
-        for topic in self.handlers:
-            client.subscribe(topic)
+        for topic_filter in self.dispatcher.routes:
+            client.subscribe(topic_filter)
 
     def on_disconnect(self, client, flags):
         logger.warning("Connection to %s closed", self.name)
 
     async def on_message(self, client, topic, payload, qos, properties):
-        logger.debug("Message %s %s", topic, payload.decode())
-        handler = self.handlers.get(topic)
-        if not handler:
-            logger.error("Ignoring topic %r", topic)
-            return
-        # TODO: check if handler is async
-        # TODO: figure out error handling/logging in gmqtt
-        await handler(self, topic, payload)
+        logger.debug("Message %s %r", topic, payload)
+        await self.dispatcher.dispatch(self, topic, payload)
         return 0
 
     async def connect(self, host: str, port: int):
@@ -43,6 +160,13 @@ class Client:
         except Exception as e:
             await self.client.reconnect()
 
-    def publish(self, topic: str, payload, qos=0):
+    @property
+    def is_connected(self) -> bool:
+        return self.client.is_connected
+
+    def publish(self, topic: str, payload, qos=0) -> bool:
+        """Publishes if connected, returns False if dropped"""
         if self.client.is_connected:
             self.client.publish(topic, payload, qos)
+            return True
+        return False
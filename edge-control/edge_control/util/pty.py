@@ -0,0 +1,61 @@
+"""
+Pseudo-terminal for emulating serial devices. The driver opens the slave device by name as a serial port,
+the emulator reads and writes the master side.
+"""
+
+import asyncio
+import logging
+import os
+import tty
+
+logger = logging.getLogger(__name__)
+
+
+class PseudoTerminal:
+    def __init__(self):
+        self.master, self._slave = os.openpty()
+        # raw mode: no echo and no line discipline, as a serial port
+        tty.setraw(self._slave)
+        self.name = os.ttyname(self._slave)
+        os.set_blocking(self.master, False)
+        self.overruns = 0  # bytes dropped as the driver did not keep up
+
+    async def read(self, n: int = 1024) -> bytes:
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                return os.read(self.master, n)
+            except BlockingIOError:
+                pass
+            ready = loop.create_future()
+
+            def on_ready():
+                if not ready.done():
+                    ready.set_result(None)
+
+            loop.add_reader(self.master, on_ready)
+            try:
+                await ready
+            finally:
+                loop.remove_reader(self.master)
+
+    def write(self, data: bytes) -> int:
+        # A UART does not wait for the receiver - drop what does not fit in the pty buffer (overrun).
+        try:
+            n = os.write(self.master, data)
+        except BlockingIOError:
+            n = 0
+        if n < len(data):
+            self.overruns += len(data) - n
+            logger.debug("Overrun %d bytes on %s", len(data) - n, self.name)
+        return n
+
+    def close(self):
+        os.close(self.master)
+        os.close(self._slave)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -1,17 +1,33 @@
 import asyncio
+import collections
 import logging
-from typing import AsyncGenerator, Generic, List, Optional, TypeVar
-
-from aiostream.stream import merge as _merge
+from typing import Any, AsyncGenerator, Callable, Generic, List, Optional, TypeVar
 
 logger = logging.getLogger(__name__)
 T = TypeVar("T")
 
 
+class _Queue(asyncio.Queue):
+    def flush(self, predicate: Callable[[Any], bool]) -> int:
+        """Removes pending items matching predicate, returns number of items removed"""
+        n = len(self._queue)  # type: ignore
+        if n == 0:
+            return 0
+        self._queue = collections.deque(o for o in self._queue if not predicate(o))  # type: ignore
+        removed = n - len(self._queue)  # type: ignore
+        for _ in range(removed):
+            self.task_done()
+        return removed
+
+
 class Topic(Generic[T]):
-    def __init__(self, name: str):
+    def __init__(self, name: str, supersedes: Optional[Callable[[T, T], bool]] = None):
+        # supersedes(message, pending) is True when publishing message makes a pending message obsolete, e.g. a stop
+        # flushes queued up moves, so that it is not delivered after a backlog of lower priority messages.
         self.name = name
-        self._queues: List[asyncio.Queue] = []
+        self.supersedes = supersedes
+        self.flushed = 0
+        self._queues: List[_Queue] = []
 
     async def publish(self, o: T):
         # logger.debug("PUBLISH %s %s %r", self.name, o, self._queues)
@@ -19,10 +35,16 @@ class Topic(Generic[T]):
         clz = self.__orig_class__.__args__[0]  # type: ignore
         assert isinstance(o, clz), "Invalid type for topic %s: %s" % (self.name, o)
         if self._queues:
-            await asyncio.wait([asyncio.create_task(q.put(o)) for q in self._queues])
+            supersedes = self.supersedes
+            for q in self._queues:
+                if supersedes:
+                    self.flushed += q.flush(lambda pending: supersedes(o, pending))  # type: ignore
+                # unbounded, never blocks
+                q.put_nowait(o)
+            await asyncio.sleep(0)
 
     def subscription(self) -> asyncio.Queue:
-        queue: asyncio.Queue = asyncio.Queue()
+        queue = _Queue()
         self._queues.append(queue)
         return queue
 
@@ -51,6 +73,8 @@ async def stream(queue: asyncio.Queue):
 
 
 async def merge(*sources):
+    from aiostream.stream import merge as _merge
+
     combine = _merge(*sources)
     async with combine.stream() as streamer:
         async for o in streamer:
@@ -0,0 +1,107 @@
+"""
+Serial port on the event loop: non-blocking reads and writes on file descriptor readiness (add_reader/add_writer),
+instead of blocking pyserial calls in executor threads as in aioserial.
+
+Same coroutine names as aioserial. One reading task and one writing task at a time.
+"""
+
+import asyncio
+import logging
+import os
+import termios
+
+import serial
+
+logger = logging.getLogger(__name__)
+_READ_SIZE = 4096
+
+
+class SerialPort:
+    def __init__(self, port: str, baudrate: int = 115_200):
+        # pyserial configures the tty (baud rate, raw mode), the event loop does the I/O
+        self._serial = serial.Serial(port, baudrate, timeout=0)
+        self._fd = self._serial.fileno()
+        os.set_blocking(self._fd, False)
+        # VMIN=1: an empty non-blocking read raises EAGAIN rather than returning no data, as for EOF
+        attributes = termios.tcgetattr(self._fd)
+        attributes[6][termios.VMIN] = 1
+        attributes[6][termios.VTIME] = 0
+        termios.tcsetattr(self._fd, termios.TCSANOW, attributes)
+        self._buffer = bytearray()
+        self._loop = asyncio.get_running_loop()
+        self.port = port
+        self.baudrate = baudrate
+
+    @property
+    def in_waiting(self) -> int:
+        """Bytes received but not read yet"""
+        return len(self._buffer) + self._serial.in_waiting
+
+    async def _ready(self, add, remove):
+        ready = self._loop.create_future()
+
+        def on_ready():
+            if not ready.done():
+                ready.set_result(None)
+
+        add(self._fd, on_ready)
+        try:
+            await ready
+        finally:
+            remove(self._fd)
+
+    async def _fill(self):
+        while True:
+            try:
+                data = os.read(self._fd, _READ_SIZE)
+            except BlockingIOError:
+                await self._ready(self._loop.add_reader, self._loop.remove_reader)
+                continue
+            if not data:
+                raise EOFError("Serial port closed: " + self.port)
+            self._buffer += data
+            return
+
+    def _take(self, n: int) -> bytes:
+        data = bytes(self._buffer[:n])
+        del self._buffer[:n]
+        return data
+
+    async def read_async(self, size: int = 1) -> bytes:
+        """Read exactly size bytes"""
+        while len(self._buffer) < size:
+            await self._fill()
+        return self._take(size)
+
+    async def readline_async(self) -> bytes:
+        """Read up to and including newline"""
+        start = 0
+        while True:
+            i = self._buffer.find(b"\n", start)
+            if i >= 0:
+                return self._take(i + 1)
+            start = len(self._buffer)
+            await self._fill()
+
+    async def write_async(self, data: bytes) -> int:
+        view = memoryview(data)
+        while view:
+            try:
+                n = os.write(self._fd, view)
+            except BlockingIOError:
+                n = 0
+            view = view[n:]
+            if view:
+                await self._ready(self._loop.add_writer, self._loop.remove_writer)
+        return len(data)
+
+    def close(self):
+        self._loop.remove_reader(self._fd)
+        self._loop.remove_writer(self._fd)
+        self._serial.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,91 @@
+"""
+Ring of fixed size frames in shared memory, written by one process and read by others.
+
+Layout: head sequence number, per slot sequence number and timestamp, then the frames. A slot is marked as being
+written (sequence 0) while copying the frame, readers check the slot sequence number before and after copying
+and retry or give up if the writer has been there in the meantime.
+"""
+
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+class FrameRing:
+    def __init__(self, shape: Tuple[int, ...], dtype, slots: int = 4, name: Optional[str] = None):
+        """Creates the ring, or attaches to an existing ring by name"""
+        self.shape = shape
+        self.dtype = np.dtype(dtype)
+        self.slots = slots
+        header = 8 * (1 + 2 * slots)
+        frame_size = int(np.prod(shape)) * self.dtype.itemsize
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=header + slots * frame_size)
+        else:
+            # processes started by the creating process share its resource tracker, which unlinks the memory once
+            self.shm = shared_memory.SharedMemory(name=name)
+        buf = self.shm.buf
+        self._head = np.ndarray((1,), np.int64, buf, 0)
+        self._seq = np.ndarray((slots,), np.int64, buf, 8)
+        self._time = np.ndarray((slots,), np.float64, buf, 8 * (1 + slots))
+        self._frames = np.ndarray((slots,) + tuple(shape), self.dtype, buf, header)
+        if self.owner:
+            self._head[0] = 0
+            self._seq[:] = -1
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def head(self) -> int:
+        """Sequence number of the last frame written, 0 if none"""
+        return int(self._head[0])
+
+    def write(self, t: float, frame: np.ndarray) -> int:
+        """Copies frame into the next slot, returns its sequence number (from 1)"""
+        seq = self.head + 1
+        i = seq % self.slots
+        self._seq[i] = 0
+        self._frames[i] = frame
+        self._time[i] = t
+        self._seq[i] = seq
+        self._head[0] = seq
+        return seq
+
+    def read(self, seq: int) -> Optional[Tuple[float, np.ndarray]]:
+        """Copy of the frame with sequence number, None if not written yet or overwritten"""
+        i = seq % self.slots
+        if self._seq[i] != seq:
+            return None
+        t = float(self._time[i])
+        frame = self._frames[i].copy()
+        if self._seq[i] != seq:
+            return None
+        return t, frame
+
+    def latest(self) -> Optional[Tuple[int, float, np.ndarray]]:
+        """Copy of the last frame written as (sequence number, time, frame), None if none"""
+        for _ in range(self.slots):
+            seq = self.head
+            if seq == 0:
+                return None
+            res = self.read(seq)
+            if res is not None:
+                return (seq,) + res
+        return None
+
+    def close(self):
+        # release views before closing the memory
+        del self._head, self._seq, self._time, self._frames
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -45,7 +45,7 @@ class Counter(Status[int]):
     def __init__(self, ttl=60):
         super().__init__(ttl, 0)
 
-    def inc(self, t: float = None) -> int:
-        value = 1 if self.value is None else self.value + 1
+    def inc(self, t: float = None, n: int = 1) -> int:
+        value = n if self.value is None else self.value + n
         self.set(value, t)
         return value
@@ -0,0 +1,80 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import AsyncGenerator, Callable, Generic, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class LatestWorker(Generic[T, R]):
+    """
+    Runs fn in a thread on the latest item submitted, off the event loop. An item submitted while another is pending
+    replaces it (counted as dropped), such that a slow fn neither processes stale items nor builds up a backlog.
+    Results are delivered on the event loop with the time the item was submitted with, e.g. capture time.
+    """
+
+    def __init__(self, fn: Callable[[T], R], name: str):
+        self.fn = fn
+        self.name = name
+        self.submitted = 0
+        self.dropped = 0
+        self.failed = 0
+        self.latency: Optional[float] = None  # s, last call of fn
+        self._slot: Optional[Tuple[float, T]] = None
+        self._condition = threading.Condition()
+        self._results: Optional[asyncio.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+
+    def submit(self, t: float, item: T):
+        with self._condition:
+            self.submitted += 1
+            if self._slot is not None:
+                self.dropped += 1
+            self._slot = (t, item)
+            self._condition.notify()
+
+    def _run(self, loop: asyncio.AbstractEventLoop, results: asyncio.Queue):
+        while True:
+            with self._condition:
+                while self._slot is None and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                t, item = self._slot  # type: ignore
+                self._slot = None
+            t0 = time.perf_counter()
+            try:
+                result = self.fn(item)
+            except Exception:
+                logger.exception("%s worker %r", self.name, item)
+                self.failed += 1
+                continue
+            self.latency = time.perf_counter() - t0
+            loop.call_soon_threadsafe(results.put_nowait, (t, result))
+
+    def start(self):
+        assert self._thread is None, "Worker already started"
+        self._results = asyncio.Queue()
+        self._thread = threading.Thread(
+            target=self._run, args=(asyncio.get_running_loop(), self._results), name=self.name, daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+
+    async def results(self) -> AsyncGenerator[Tuple[float, R], None]:
+        """Starts the worker and yields (t, result)"""
+        self.start()
+        assert self._results is not None
+        try:
+            while True:
+                yield await self._results.get()
+        finally:
+            self.stop()
@@ -0,0 +1,128 @@
+"""
+Load test of the hagedag and husqvarna motor drivers against the motor controller emulators on a pseudo-terminal.
+Publishes move commands on robot_command at a given rate, with a timeout in robot time, and optionally pauses
+to trigger the move timeout in the controller. Reports command latency from robot_command to the controller
+(which acks on receipt), throughput and timeouts.
+
+    python -m tests.arch.load hagedag --rate 50 --duration 10 --pause 3
+"""
+
+import asyncio
+import logging
+import os
+import statistics
+import time
+from typing import List, Optional, Union
+
+from edge_control import topics
+from edge_control.arch.commands import CommandStatus
+from edge_control.config import SerialConfig, robot_config
+from edge_control.models.messages import MoveCommand, StopCommand, Time
+from edge_control.util.pty import PseudoTerminal
+
+logger = logging.getLogger(__name__)
+
+
+def report(name: str, latencies: List[float]):
+    if not latencies:
+        print(f"{name:16} no messages")
+        return
+    latencies = sorted(latencies)
+    p95 = latencies[int(0.95 * (len(latencies) - 1))]
+    print(
+        f"{name:16} {len(latencies):6d}  latency ms median {1000 * statistics.median(latencies):6.2f}  "
+        f"p95 {1000 * p95:6.2f}  max {1000 * latencies[-1]:6.2f}"
+    )
+
+
+async def run(args):
+    published: List[float] = []
+    received: List[float] = []
+    robot_time: Optional[Time] = None
+
+    if args.robot == "hagedag":
+        # no GPIO for the cutter outside the robot
+        os.environ.setdefault("GPIOZERO_PIN_FACTORY", "mock")
+        from edge_control.arch.hagedag.driver import motor_driver
+        from edge_control.arch.hagedag.emulator import Stm32Emulator
+
+        emulator = Stm32Emulator()
+
+        def on_command(t: float, command: Union[str, bytes]):
+            # stm32 lines, not counting the reset on connect
+            if command != "!":
+                received.append(t)
+
+    else:
+        from edge_control.arch.husqvarna.driver import motor_driver
+        from edge_control.arch.husqvarna.emulator import ArduinoEmulator
+
+        emulator = ArduinoEmulator(robot_config.wheel_base)
+
+        def on_command(t: float, command: Union[str, bytes]):
+            # arduino messages
+            received.append(t)
+
+    emulator.on_command = on_command
+
+    async def state():
+        nonlocal robot_time
+        async for message in topics.robot_state.stream():
+            if isinstance(message, Time):
+                robot_time = message
+
+    async def commands():
+        i = 0
+        t_pause = time.time() + args.pause_interval
+        while True:
+            await asyncio.sleep(1 / args.rate)
+            if args.pause and time.time() >= t_pause:
+                await asyncio.sleep(args.pause)
+                t_pause = time.time() + args.pause_interval
+            if robot_time is None:
+                continue
+            if i % 100 == 99:
+                command: MoveCommand = StopCommand()
+            else:
+                command = MoveCommand(robot_time.robot_time + args.timeout, 0.2, 0.1 * (i % 3 - 1))
+            published.append(time.time())
+            await topics.robot_command.publish(command)
+            i += 1
+
+    with PseudoTerminal() as pty:
+        tasks = [asyncio.create_task(emulator.run(pty)), asyncio.create_task(state())]
+        tasks.append(asyncio.create_task(motor_driver(SerialConfig(pty.name))))
+        tasks.append(asyncio.create_task(commands()))
+        cpu0 = time.process_time()
+        await asyncio.sleep(args.duration)
+        cpu = time.process_time() - cpu0
+        for task in tasks:
+            task.cancel()
+
+    n = min(len(published), len(received))
+    print(f"emulator         {emulator}")
+    print(f"commands         published {len(published)} received {len(received)} ({n / args.duration:.1f}/s)")
+    print(f"command stage    coalesced {CommandStatus.coalesced.value} suppressed {CommandStatus.suppressed.value}")
+    # commands are delivered in order, latency is only meaningful without coalesced or suppressed commands
+    report("command", [r - p for p, r in zip(published[:n], received[:n])])
+    print(f"cpu              {100 * cpu / args.duration:5.1f}% (emulator included)")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="tests.arch.load", description="Motor driver load test")
+    parser.add_argument("robot", choices=["hagedag", "husqvarna"])
+    parser.add_argument("--rate", type=float, default=20.0, help="Move commands per second")
+    parser.add_argument("--timeout", type=float, default=0.5, help="Move timeout (s) after robot time")
+    parser.add_argument("--pause", type=float, default=0.0, help="Pause commands (s) to trigger move timeout")
+    parser.add_argument("--pause-interval", type=float, default=5.0, help="Time (s) between pauses")
+    parser.add_argument("--duration", type=float, default=10.0, help="Test duration (s)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Verbose output")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.verbose and logging.DEBUG or logging.WARNING)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
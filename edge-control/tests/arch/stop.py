@@ -0,0 +1,97 @@
+"""
+Worst case stop latency on robot_command under synthetic load: move commands are published faster than a slow
+motor driver writes them, while other tasks hog the event loop. Measures time from publishing StopCommand until the
+driver writes it, with a plain FIFO topic (as before) and with robot_command, where a stop flushes pending moves,
+read through the driver command stage.
+
+    python -m tests.arch.stop --rate 200 --write 10 --busy 2 --duration 10
+"""
+
+import asyncio
+import statistics
+import time
+from typing import Dict, List
+
+from edge_control import topics
+from edge_control.arch.commands import commands
+from edge_control.models.messages import MoveCommand, StopCommand, ToRobot
+from edge_control.util.pubsub import Topic
+
+
+async def run(lane: str, args) -> List[float]:
+    topic = topics.robot_command if lane == "priority" else Topic[ToRobot]("fifo")
+    published: Dict[int, float] = {}
+    latencies: List[float] = []
+    backlog = 0
+
+    async def driver():
+        nonlocal backlog
+        if lane == "priority":
+            stream = (command async for command, send in commands(topic, 0.5) if send)
+        else:
+            stream = topic.stream()
+        async for command in stream:
+            backlog = max(backlog, sum(q.qsize() for q in topic._queues))
+            if isinstance(command, StopCommand):
+                latencies.append(time.time() - published.pop(id(command)))
+            # serial write and whatever the driver does per command
+            await asyncio.sleep(args.write / 1000)
+
+    async def moves():
+        i = 0
+        while True:
+            await asyncio.sleep(1 / args.rate)
+            await topic.publish(MoveCommand(time.time() + 2, 0.2, 0.1 * (i % 3 - 1)))
+            i += 1
+
+    async def stops():
+        while True:
+            await asyncio.sleep(args.stop_interval)
+            stop = StopCommand()
+            published[id(stop)] = time.time()
+            await topic.publish(stop)
+
+    async def busy():
+        # other work on the event loop, e.g. tracking, API and MQTT
+        while True:
+            t_end = time.time() + args.busy / 1000
+            while time.time() < t_end:
+                pass
+            await asyncio.sleep(0.01)
+
+    tasks = [asyncio.create_task(t) for t in (driver(), moves(), stops(), busy())]
+    await asyncio.sleep(args.duration)
+    for task in tasks:
+        task.cancel()
+    print(f"{lane:8} max backlog {backlog:6d}  flushed {topic.flushed:6d}", end="  ")
+    return latencies
+
+
+def report(latencies: List[float]):
+    if not latencies:
+        print("no stops delivered")
+        return
+    latencies = sorted(latencies)
+    p95 = latencies[int(0.95 * (len(latencies) - 1))]
+    print(
+        f"stops {len(latencies):4d}  latency ms median {1000 * statistics.median(latencies):8.2f}  "
+        f"p95 {1000 * p95:8.2f}  max {1000 * latencies[-1]:8.2f}"
+    )
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="tests.arch.stop", description="Stop latency benchmark")
+    parser.add_argument("--rate", type=float, default=200.0, help="Move commands per second")
+    parser.add_argument("--write", type=float, default=10.0, help="Driver time (ms) per command")
+    parser.add_argument("--busy", type=float, default=2.0, help="Event loop hogged (ms) every 10 ms")
+    parser.add_argument("--stop-interval", type=float, default=0.5, help="Time (s) between stop commands")
+    parser.add_argument("--duration", type=float, default=5.0, help="Duration per lane (s)")
+    args = parser.parse_args()
+    for lane in ("fifo", "priority"):
+        report(asyncio.run(run(lane, args)))
+
+
+if __name__ == "__main__":
+    main()
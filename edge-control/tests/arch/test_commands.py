@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from edge_control.arch.commands import CommandStatus, commands
+from edge_control.models.messages import CutCommand, MoveCommand, StopCommand, ToRobot
+from edge_control.util.pubsub import Topic
+
+
+@pytest.mark.asyncio
+async def test_coalesce():
+    topic = Topic[ToRobot]("robot_command")
+    stream = commands(topic, 0.5)
+    first = asyncio.create_task(stream.__anext__())
+    await asyncio.sleep(0)  # subscribe
+    await topic.publish(MoveCommand(10, 0.1, 0))
+    assert await first == (MoveCommand(10, 0.1, 0), True)
+
+    # queued up while writing, only the latest move command (and stop) is delivered, other commands in order
+    coalesced = CommandStatus.coalesced.value
+    await topic.publish(MoveCommand(11, 0.2, 0))
+    await topic.publish(CutCommand(0, 0.5))
+    await topic.publish(MoveCommand(11, 0.1, 0))
+    await topic.publish(StopCommand())
+    await topic.publish(MoveCommand(12, 0.3, 0))
+    await topic.publish(MoveCommand(12, 0.2, 0))
+    assert await stream.__anext__() == (CutCommand(0, 0.5), True)
+    assert await stream.__anext__() == (StopCommand(), True)
+    assert await stream.__anext__() == (MoveCommand(12, 0.2, 0), True)
+    assert CommandStatus.coalesced.value == coalesced + 3
+
+    # move commands arriving while delivering the cut command replace the pending move command
+    await topic.publish(CutCommand(0, 0))
+    await topic.publish(MoveCommand(13, 0.1, 0))
+    assert await stream.__anext__() == (CutCommand(0, 0), True)
+    await topic.publish(StopCommand())
+    assert await stream.__anext__() == (StopCommand(), True)
+
+
+@pytest.mark.asyncio
+async def test_suppress():
+    topic = Topic[ToRobot]("robot_command")
+    stream = commands(topic, 0.05)
+    first = asyncio.create_task(stream.__anext__())
+    await asyncio.sleep(0)  # subscribe
+    suppressed = CommandStatus.suppressed.value
+    await topic.publish(MoveCommand(10, 0.1, 0))
+    assert await first == (MoveCommand(10, 0.1, 0), True)
+    await topic.publish(MoveCommand(11, 0.1, 0))
+    assert await stream.__anext__() == (MoveCommand(11, 0.1, 0), False)
+    await topic.publish(MoveCommand(11, 0.2, 0))
+    assert await stream.__anext__() == (MoveCommand(11, 0.2, 0), True)
+    assert CommandStatus.suppressed.value == suppressed + 1
+
+    # stop is never suppressed
+    await topic.publish(StopCommand())
+    assert await stream.__anext__() == (StopCommand(), True)
+    await topic.publish(StopCommand())
+    assert await stream.__anext__() == (StopCommand(), True)
+
+    # refresh timeout
+    await topic.publish(MoveCommand(12, 0.2, 0))
+    assert await stream.__anext__() == (MoveCommand(12, 0.2, 0), True)
+    await asyncio.sleep(0.06)
+    await topic.publish(MoveCommand(13, 0.2, 0))
+    assert await stream.__anext__() == (MoveCommand(13, 0.2, 0), True)
@@ -1,3 +1,5 @@
+from pytest import approx
+
 from edge_control.arch.hagedag import messages
 from edge_control.arch.hagedag.status import HagedagStatus
 from edge_control.robot import RobotState
@@ -10,3 +12,32 @@ def test_status():
     HagedagStatus.status.set(messages.process("Status 0"), t)
     d = RobotState.as_dict(t)
     assert d["hagedag"] == {"battery": {"voltage": 11.9}, "reports": 1, "status": {"status": 0}}
+
+
+def test_emulator():
+    from edge_control.arch.hagedag.emulator import Stm32Emulator
+
+    emulator = Stm32Emulator()
+    assert emulator.handle("!", 100.0) == ["Ack 0.000 !"]
+    command = str(messages.MoveCommand(0.2, 0.1, 1.5))
+    (ack,) = emulator.handle(command, 100.5)
+    m = messages.process(ack)
+    assert isinstance(m, messages.Ack)
+    assert m.time == 0.5
+    assert isinstance(m.command, messages.MoveAck)
+    assert m.command.speed == approx(0.2, abs=1e-4)
+    assert m.command.omega == approx(0.1, abs=1e-3)
+
+    emulator.update(100.5)
+    assert emulator.update(101.0) == []
+    assert emulator.left > 0
+    (timeout,) = emulator.update(101.5)
+    m = messages.process(timeout)
+    assert isinstance(m, messages.Timeout)
+    assert m.time == 1.5
+    assert emulator.timeouts == 1
+
+    # expired on arrival
+    assert emulator.handle(command, 102.0)[0].startswith("Timeout 2.000 m")
+    assert emulator.handle("x", 102.0) == ["Error x"]
+    assert emulator.errors == 1
@@ -2,9 +2,10 @@ import time
 
 from pytest import approx, raises
 
-from edge_control.arch.husqvarna.frame import frame
+from edge_control.arch.husqvarna.frame import FrameReader, frame
 from edge_control.arch.husqvarna.messages import Error, ErrorCode, Heartbeat, MotorSpeed, MotorStop, parse
-from edge_control.arch.husqvarna.motor import from_move
+from edge_control.arch.husqvarna.motor import from_move, to_move
+from edge_control.models.messages import MoveCommand
 
 
 def test_motor_move():
@@ -59,3 +60,63 @@ def test_error():
 def test_frame():
     message = bytes([0x88, 0xD0, 0x1E, 0x8E, 0x00])
     assert frame(message) == bytes([0xDE, 0x05, 0x88, 0xD0, 0x1E, 0x8E, 0x00, 0xAD])
+
+
+def test_frame_reader():
+    heartbeat = frame(bytes([0x88, 0xD0, 0x1E, 0x8E, 0x00, 0x02, 0x01, 0x03, 0x01]))
+    error = frame(b"\xf0\x00Hello")
+    reader = FrameReader(0.001)
+    assert reader.remaining() == 2
+    frames = reader.feed(heartbeat + error + heartbeat[:4], 10.0)
+    assert [m for _, m in frames] == [heartbeat[2:-1], error[2:-1]]
+    # arrival time of the first byte of each frame
+    assert frames[0][0] == approx(10.0 - 0.001 * (len(heartbeat) + len(error) + 3))
+    assert frames[1][0] == approx(10.0 - 0.001 * (len(error) + 3))
+    assert reader.remaining() == len(heartbeat) - 4
+
+    frames = reader.feed(heartbeat[4:], 11.0)
+    assert len(frames) == 1
+    assert frames[0][0] == approx(10.0 - 0.003)
+    assert reader.frames == 3
+    assert reader.resyncs == 0
+    assert reader.discarded == 0
+
+
+def test_frame_reader_resync():
+    heartbeat = frame(bytes([0x88, 0xD0, 0x1E, 0x8E, 0x00, 0x02, 0x01, 0x03, 0x01]))
+    corrupt = heartbeat[:-1] + b"\x00"
+    reader = FrameReader()
+    frames = reader.feed(b"\x01\x02" + corrupt + heartbeat, 1.0)
+    assert [m for _, m in frames] == [heartbeat[2:-1]]
+    assert reader.resyncs == 1
+    assert reader.discarded == 2 + len(corrupt)
+
+
+def test_emulator():
+    from edge_control.arch.husqvarna.emulator import ArduinoEmulator
+
+    emulator = ArduinoEmulator(0.4)
+    emulator.t0 = 100.0
+    speed = from_move(MoveCommand(1.5, 0.2, 0), 0.3)
+    assert emulator.handle(speed.message(), 100.5) == []
+    for i in range(20):
+        (message,) = emulator.update(100.5 + i / 20)
+    m = parse(101.5, message)
+    assert isinstance(m, Heartbeat)
+    assert m.time == 1.45
+    assert to_move(m) == (approx(0.2, abs=0.02), approx(0, abs=0.01))
+    assert emulator.turtle.x > 0
+
+    error, _ = emulator.update(101.5)
+    m = parse(101.5, error)
+    assert isinstance(m, Error)
+    assert ErrorCode(m.code) == ErrorCode.motor_speed_end_time
+    assert emulator.timeouts == 1
+    assert emulator.deltas == [0, 0, 0]
+
+    (error,) = emulator.handle(b"\x40", 102.0)
+    assert ErrorCode(parse(102.0, error).code) == ErrorCode.invalid_request
+
+    (error,) = emulator.handle(b"", 102.0)
+    assert ErrorCode(parse(102.0, error).code) == ErrorCode.invalid_frame
+    assert emulator.errors == 2
@@ -0,0 +1,116 @@
+"""
+Load test of the GPS path against the GPS emulator on a pseudo-terminal:
+
+    nmea_driver/ubx_driver -> world_to_site -> run_tracker
+
+Reports message rates, latency from the GPS epoch time to gps_position and robot_tracking, and CPU usage.
+Requires a site reference:
+
+    CONFIG_DIR=config/simulation python -m tests.gps.load --rate 20 --corrupt 0.01 --float-rate 0.1
+"""
+
+import asyncio
+import logging
+import statistics
+import time
+from typing import List
+
+from edge_control import topics
+from edge_control.config import GpsConfig, SerialConfig, Vector2D, site_config
+from edge_control.gps.driver import gps_driver
+from edge_control.gps.emulator import GpsEmulator, add_arguments, config_from_args, source_from_args
+from edge_control.gps.site import world_to_site
+from edge_control.gps.status import GpsStatus
+from edge_control.models.tracking import RobotTracker, run_tracker
+from edge_control.util.pty import PseudoTerminal
+
+logger = logging.getLogger(__name__)
+
+
+def since_midnight(t: float) -> float:
+    return t % 86400
+
+
+def report(name: str, latencies: List[float], duration: float):
+    if not latencies:
+        print(f"{name:16} no messages")
+        return
+    latencies = sorted(latencies)
+    p95 = latencies[int(0.95 * (len(latencies) - 1))]
+    print(
+        f"{name:16} {len(latencies) / duration:7.1f}/s  latency ms "
+        f"median {1000 * statistics.median(latencies):6.2f}  p95 {1000 * p95:6.2f}  max {1000 * latencies[-1]:6.2f}"
+    )
+
+
+async def run(args):
+    assert site_config.reference, "Site reference required, set CONFIG_DIR"
+    emulator = GpsEmulator(config_from_args(args), source_from_args(args))
+    positions: List[float] = []
+    sites: List[float] = []
+    tracking: List[float] = []
+    gps_time = 0.0
+
+    async def gps_position():
+        nonlocal gps_time
+        async for gga in topics.gps_position.stream():
+            if gga.time is not None:
+                gps_time = gga.time
+                positions.append(since_midnight(time.time()) - gga.time)
+
+    async def site_position():
+        async for _ in topics.site_position.stream():
+            sites.append(since_midnight(time.time()) - gps_time)
+
+    async def robot_tracking():
+        # tracking state has no time, use the last GPS time as FIFO topic queues preserve order
+        async for _ in topics.robot_tracking.stream():
+            tracking.append(since_midnight(time.time()) - gps_time)
+
+    with PseudoTerminal() as pty:
+        logger.info("GPS emulator on %s", pty.name)
+        config = GpsConfig(gps=SerialConfig(pty.name), mode=args.mode, offset=Vector2D(0, 0))
+        tasks = [
+            asyncio.create_task(coroutine)
+            for coroutine in (
+                emulator.run(pty),
+                gps_position(),
+                site_position(),
+                robot_tracking(),
+                world_to_site(),
+                run_tracker(RobotTracker(config.offset)),
+            )
+        ]
+        await gps_driver(config)
+
+        cpu0 = time.process_time()
+        t0 = time.time()
+        await asyncio.sleep(args.duration)
+        duration = time.time() - t0
+        cpu = time.process_time() - cpu0
+        for task in tasks:
+            task.cancel()
+
+        print(f"emulator         {emulator} overruns {pty.overruns}")
+        print(f"driver           responses {GpsStatus.responses.value} errors {GpsStatus.errors.value}")
+        print(f"emulator output  {emulator.bytes / duration:7.0f} bytes/s")
+        report("gps_position", positions, duration)
+        report("site_position", sites, duration)
+        report("robot_tracking", tracking, duration)
+        print(f"cpu              {100 * cpu / duration:5.1f}% (emulator included)")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="tests.gps.load", description="GPS driver load test")
+    add_arguments(parser)
+    parser.add_argument("--duration", type=float, default=10.0, help="Test duration (s)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Verbose output")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.verbose and logging.DEBUG or logging.WARNING)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
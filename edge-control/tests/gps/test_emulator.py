@@ -0,0 +1,115 @@
+from pytest import approx, raises
+
+from edge_control.config import SiteReferenceConfig
+from edge_control.gps.emulator import (
+    Circle,
+    EmulatorConfig,
+    Fix,
+    GpsEmulator,
+    Replay,
+    RtcmReader,
+    corrupt_nmea,
+    crc24q,
+    gga,
+    navposllh,
+    rmc,
+    vtg,
+)
+from edge_control.gps.messages import GGA, RMC, VTG, Quality, process
+from edge_control.gps.ubx import Reader, decode
+
+# 2020-06-25 14:04:16.250 UTC
+t = 1593093856.25
+
+
+def test_gga():
+    fix = Fix(59.8166435, -10.361301833, 192.9, Quality.RTK, 12)
+    m = process(gga(t, fix, 0.014))
+    assert isinstance(m, GGA)
+    assert m.time == approx(50656.25)
+    assert m.lat == approx(59.8166435)
+    assert m.lon == approx(-10.361301833)
+    assert m.quality == Quality.RTK
+    assert m.sats == 12
+    assert m.hdop == 0.01
+    assert m.alt == 192.9
+
+
+def test_rmc_vtg():
+    fix = Fix(59.8, 10.3, quality=Quality.FLOAT_RTK, speed=0.5, course=271.5)
+    m = process(rmc(t, fix, 0.3))
+    assert isinstance(m, RMC)
+    assert m.date == "250620"
+    assert m.mode == "F"
+    assert m.course_over_ground == 271.5
+    m = process(vtg(t, fix, 0.3))
+    assert isinstance(m, VTG)
+    assert m.speed == 1.8
+
+
+def test_corrupt():
+    sentence = corrupt_nmea(gga(t, Fix(59.8, 10.3), 0.014))
+    with raises(ValueError, match="checksum"):
+        process(sentence)
+
+
+def test_navposllh():
+    frame = navposllh(t, Fix(59.8166822, 10.3612657, 194.725), 0.014)
+    frames = list(Reader().frames(frame))
+    assert frames == [frame]
+    msg = decode(frame)
+    assert msg.latitude() == approx(59.8166822)
+    assert msg.longitude() == approx(10.3612657)
+    assert msg.hdop() == 0.014
+    assert msg.iTOW % 86_400_000 == 50656250
+
+
+def test_circle():
+    reference = SiteReferenceConfig(59.8, 10.3)
+    circle = Circle(reference, 1.0, 2.0, radius=3.0, speed=0.3)
+    fix = circle(0)
+    x, y = reference.to_site(fix.lat, fix.lon)
+    assert x == approx(4.0, abs=1e-3)
+    assert y == approx(2.0, abs=1e-3)
+    assert fix.course == approx(0.0)
+
+
+def test_replay():
+    replay = Replay(
+        [
+            "$GNGGA,140416.00,5948.99861,N,01021.67811,E,4,12,0.59,192.9,M,39.4,M,1.0,1405*68",
+            "$GNRMC,140417.00,A,5948.99864,N,01021.67811,E,0.068,,250620,,,R,V*0C",
+            "garbage",
+        ]
+    )
+    assert len(replay.fixes) == 1
+    assert replay(0).lat == 59.8166435
+    assert replay(1).lat == 59.8166435
+
+
+def test_epoch():
+    emulator = GpsEmulator(EmulatorConfig(noise=0), lambda t: Fix(59.8, 10.3))
+    data = emulator.epoch(t, emulator.fix(t, t))
+    lines = data.decode("ascii").splitlines()
+    assert [line[3:6] for line in lines] == ["GGA", "GSA", "GST", "RMC", "VTG"]
+    for line in lines:
+        process(line)
+    assert emulator.messages == 5
+
+
+def test_rtcm():
+    payload = bytes(range(19))
+    header = bytes([0xD3, 0, len(payload)])
+    frame = header + payload + crc24q(header + payload).to_bytes(3, "big")
+    reader = RtcmReader()
+    reader.feed(b"\x00" + frame[:10], 1.0)
+    assert reader.frames == 0
+    reader.feed(frame[10:] + frame[:-1] + b"\x00", 2.0)
+    assert reader.frames == 1
+    assert reader.updated == 2.0
+
+
+def test_crc24q():
+    # RTCM 1005 sample frame
+    frame = bytes.fromhex("d300133ed7d30202980edeef34b4bd62ac0941986f33360b98")
+    assert crc24q(frame[:-3]) == int.from_bytes(frame[-3:], "big")
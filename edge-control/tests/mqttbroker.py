@@ -0,0 +1,263 @@
+"""
+Minimal in-process MQTT broker stand-in, sufficient for gmqtt with MQTT 3.1.1 and 5: connect, subscribe,
+unsubscribe, publish with QoS 0 and 1 and retained messages, ping. No sessions, will messages or resending of
+unacknowledged messages, and MQTT 5 properties are ignored.
+
+    python -m tests.mqttbroker --port 1883
+"""
+
+import asyncio
+import logging
+import struct
+from typing import Dict, List, Optional, Tuple
+
+from dataclasses import dataclass, field
+
+from edge_control.util.mqtt import matches
+
+logger = logging.getLogger(__name__)
+
+CONNECT = 1
+CONNACK = 2
+PUBLISH = 3
+PUBACK = 4
+SUBSCRIBE = 8
+SUBACK = 9
+UNSUBSCRIBE = 10
+UNSUBACK = 11
+PINGREQ = 12
+PINGRESP = 13
+DISCONNECT = 14
+MQTT5 = 5
+
+
+def varint(n: int) -> bytes:
+    b = bytearray()
+    while True:
+        n, digit = divmod(n, 128)
+        b.append(digit | (0x80 if n else 0))
+        if not n:
+            return bytes(b)
+
+
+def packet(kind: int, flags: int, body: bytes) -> bytes:
+    return bytes([kind << 4 | flags]) + varint(len(body)) + body
+
+
+def string(s: str) -> bytes:
+    b = s.encode()
+    return struct.pack("!H", len(b)) + b
+
+
+class Reader:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.offset = 0
+
+    def u8(self) -> int:
+        self.offset += 1
+        return self.data[self.offset - 1]
+
+    def u16(self) -> int:
+        self.offset += 2
+        return struct.unpack_from("!H", self.data, self.offset - 2)[0]
+
+    def varint(self) -> int:
+        n = shift = 0
+        while True:
+            b = self.u8()
+            n |= (b & 0x7F) << shift
+            shift += 7
+            if not b & 0x80:
+                return n
+
+    def blob(self, n: Optional[int] = None) -> bytes:
+        n = self.u16() if n is None else n
+        self.offset += n
+        return self.data[self.offset - n : self.offset]
+
+    def string(self) -> str:
+        return self.blob().decode()
+
+    def properties(self):
+        # skipped
+        self.blob(self.varint())
+
+    def rest(self) -> bytes:
+        return self.data[self.offset :]
+
+    def more(self) -> bool:
+        return self.offset < len(self.data)
+
+
+@dataclass
+class Session:
+    client_id: str
+    version: int
+    writer: asyncio.StreamWriter
+    subscriptions: Dict[str, int] = field(default_factory=dict)  # topic filter: max QoS
+    packet_id: int = 0
+
+    def send(self, data: bytes):
+        self.writer.write(data)
+
+    def publish(self, topic: str, payload: bytes, qos: int, retain: bool = False):
+        body = string(topic)
+        if qos:
+            self.packet_id = self.packet_id % 0xFFFF + 1
+            body += struct.pack("!H", self.packet_id)
+        if self.version == MQTT5:
+            body += varint(0)
+        self.send(packet(PUBLISH, qos << 1 | retain, body + payload))
+
+
+class Broker:
+    def __init__(self):
+        self.sessions: List[Session] = []
+        self.retained: Dict[str, Tuple[bytes, int]] = {}  # topic: (payload, qos)
+        self.received = 0  # publishes
+        self.delivered = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Dict[asyncio.Task, asyncio.StreamWriter] = {}
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Starts serving, returns the port"""
+        self._server = await asyncio.start_server(self._serve, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            # not cancelled, as the server logs the cancellation, ends on end of stream
+            for writer in self._connections.values():
+                writer.close()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+
+    async def _read(self, reader: asyncio.StreamReader) -> Tuple[int, int, Reader]:
+        first = (await reader.readexactly(1))[0]
+        n = shift = 0
+        while True:
+            b = (await reader.readexactly(1))[0]
+            n |= (b & 0x7F) << shift
+            shift += 7
+            if not b & 0x80:
+                break
+        return first >> 4, first & 0x0F, Reader(await reader.readexactly(n))
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        session = None
+        task = asyncio.current_task()
+        self._connections[task] = writer  # type: ignore
+        try:
+            kind, _, r = await self._read(reader)
+            assert kind == CONNECT, "Expected CONNECT"
+            r.string()  # protocol name
+            version = r.u8()
+            flags = r.u8()
+            r.u16()  # keep alive, not enforced
+            if version == MQTT5:
+                r.properties()
+            session = Session(r.string(), version, writer)
+            if flags & 0x04:
+                # will, not published
+                if version == MQTT5:
+                    r.properties()
+                r.string()
+                r.blob()
+            session.send(packet(CONNACK, 0, b"\x00\x00" + (varint(0) if version == MQTT5 else b"")))
+            self.sessions.append(session)
+            logger.debug("Connected %s version %d", session.client_id, version)
+            while True:
+                kind, flags, r = await self._read(reader)
+                if kind == PUBLISH:
+                    self._publish(session, flags, r)
+                elif kind == SUBSCRIBE:
+                    self._subscribe(session, r)
+                elif kind == UNSUBSCRIBE:
+                    packet_id = r.u16()
+                    if version == MQTT5:
+                        r.properties()
+                    filters = []
+                    while r.more():
+                        filters.append(r.string())
+                        session.subscriptions.pop(filters[-1], None)
+                    codes = varint(0) + bytes(len(filters)) if version == MQTT5 else b""
+                    session.send(packet(UNSUBACK, 0, struct.pack("!H", packet_id) + codes))
+                elif kind == PINGREQ:
+                    session.send(packet(PINGRESP, 0, b""))
+                elif kind == DISCONNECT:
+                    break
+                # PUBACK from subscribers is not tracked
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if session in self.sessions:
+                self.sessions.remove(session)
+            self._connections.pop(task, None)  # type: ignore
+            writer.close()
+
+    def _publish(self, session: Session, flags: int, r: Reader):
+        qos = flags >> 1 & 0x03
+        retain = bool(flags & 0x01)
+        topic = r.string()
+        packet_id = r.u16() if qos else 0
+        if session.version == MQTT5:
+            r.properties()
+        payload = r.rest()
+        self.received += 1
+        if qos:
+            session.send(packet(PUBACK, 0, struct.pack("!H", packet_id)))
+        if retain:
+            if payload:
+                self.retained[topic] = payload, qos
+            else:
+                self.retained.pop(topic, None)
+        for s in self.sessions:
+            granted = max((q for f, q in s.subscriptions.items() if matches(f, topic)), default=None)
+            if granted is not None:
+                s.publish(topic, payload, min(qos, granted))
+                self.delivered += 1
+
+    def _subscribe(self, session: Session, r: Reader):
+        packet_id = r.u16()
+        if session.version == MQTT5:
+            r.properties()
+        codes = bytearray()
+        filters = []
+        while r.more():
+            topic_filter = r.string()
+            qos = min(r.u8() & 0x03, 1)
+            session.subscriptions[topic_filter] = qos
+            filters.append(topic_filter)
+            codes.append(qos)
+        props = varint(0) if session.version == MQTT5 else b""
+        session.send(packet(SUBACK, 0, struct.pack("!H", packet_id) + props + bytes(codes)))
+        for topic, (payload, qos) in self.retained.items():
+            granted = [session.subscriptions[f] for f in filters if matches(f, topic)]
+            if granted:
+                session.publish(topic, payload, min(qos, max(granted)), retain=True)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="tests.mqttbroker", description="MQTT broker stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1883)
+    parser.add_argument("-v", "--verbose", action="store_true", help="Verbose output")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.verbose and logging.DEBUG or logging.INFO)
+
+    async def serve():
+        broker = Broker()
+        port = await broker.start(args.host, args.port)
+        logger.info("Serving MQTT on %s:%d", args.host, port)
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark the MQTT command dispatcher: throughput of the command handlers of edge_control.mqtt through
+util.mqtt.Client.on_message as called by gmqtt, and estop latency while a slow mission start is being handled,
+compared to the former inline dispatch (json.loads and await the handler by exact topic).
+
+    python -m tests.mqttdispatch --count 20000 --slow 0.5
+"""
+
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List, Tuple
+
+from edge_control import mqtt
+from edge_control.util.mqtt import Client, Dispatcher
+
+COMMANDS: List[Tuple[str, Dict[str, Any]]] = [
+    ("robot_cmd/twist_cmd", {"linear": {"x": 0.5}, "angular": {"z": 0.1}}),
+    ("cmd/lights", {"head": True, "strobe": False}),
+    ("ptz/move", {"pan": 0.5, "tilt": -0.2}),
+    ("mission/pause", {}),
+]
+ESTOP = ("estop/cmd", {"signal": "STOP"})
+
+
+class Inline:
+    """Former dispatch: exact topic, decoded by the handler and awaited inline"""
+
+    def __init__(self, dispatcher: Dispatcher):
+        self.handlers = dict((r.topic_filter, r) for r in dispatcher.routes.values())
+
+    async def on_message(self, client, topic, payload, qos, properties):
+        route = self.handlers[topic]
+        await route.handler(self, topic, route.decode(payload))
+
+
+def stand_in() -> SimpleNamespace:
+    # the gmqtt client as seen by util.mqtt.Client, messages are injected with on_message
+    return SimpleNamespace(is_connected=True, publish=lambda *args: None)
+
+
+async def throughput(name: str, receiver, messages: List[Tuple[str, bytes]], dispatcher: Dispatcher):
+    t0 = time.perf_counter()
+    for topic, payload in messages:
+        await receiver.on_message(None, topic, payload, 0, None)
+    # queued for the handlers
+    while any(not q.empty() for q in dispatcher._queues.values()):
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - t0
+    print(f"{name:8} {len(messages) / elapsed:10.0f} messages/s")
+
+
+async def estop_latency(name: str, receiver, handled: asyncio.Event) -> float:
+    async def receive():
+        # gmqtt awaits on_message in order of receipt
+        await receiver.on_message(None, "mission/start", b'{"name": "mow"}', 0, None)
+        await receiver.on_message(None, ESTOP[0], json.dumps(ESTOP[1]).encode(), 0, None)
+
+    handled.clear()
+    t0 = time.perf_counter()
+    task = asyncio.create_task(receive())
+    await handled.wait()
+    latency = time.perf_counter() - t0
+    await task
+    print(f"{name:8} estop latency {1000 * latency:8.1f} ms")
+    return latency
+
+
+async def run(count: int, slow: float):
+    messages = [(topic, json.dumps(msg).encode()) for topic, msg in COMMANDS] * (count // len(COMMANDS))
+    client = Client(stand_in(), "benchmark", mqtt._dispatch)
+    # all handled, as messages are injected faster than received from a broker
+    mqtt._dispatch.limit = count
+    await throughput("inline", Inline(mqtt._dispatch), messages, mqtt._dispatch)
+    await throughput("dispatch", client, messages, mqtt._dispatch)
+
+    handled = asyncio.Event()
+    estop = mqtt._dispatch.routes[ESTOP[0]].handler
+
+    async def on_estop(client, topic, msg):
+        handled.set()
+        await estop(client, topic, msg)
+
+    async def mission_start(client, topic, msg):
+        # e.g. building the mission plan
+        await asyncio.sleep(slow)
+
+    mqtt._dispatch.register("mission/start", mission_start)
+    mqtt._dispatch.register(ESTOP[0], on_estop, fast=True)
+    await estop_latency("inline", Inline(mqtt._dispatch), handled)
+    await estop_latency("dispatch", client, handled)
+    d = mqtt._dispatch
+    print(f"received {d.received} invalid {d.invalid} dropped {d.dropped} failed {d.failed}")
+    d.close()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="tests.mqttdispatch", description="MQTT command dispatch benchmark")
+    parser.add_argument("--count", type=int, default=20000, help="Commands")
+    parser.add_argument("--slow", type=float, default=0.5, help="Time (s) to handle a mission start")
+    args = parser.parse_args()
+    asyncio.run(run(args.count, args.slow))
+
+
+if __name__ == "__main__":
+    main()
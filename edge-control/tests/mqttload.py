@@ -0,0 +1,145 @@
+"""
+Load test the MQTT bridge (mqtt.cloud_mqtt_driver) against the in-process broker stand-in, or a broker given by
+--port: floods robot_cmd/twist_cmd, mission/pause|continue and estop/cmd at the given rates, and measures the
+latency from command publish to robot_command (MoveCommand for twists, StopCommand for estops) and the rate of
+status published on MQTT.
+
+    python -m tests.mqttload --twist 50 --mission 5 --estop 0.5 --duration 10
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import Counter
+from typing import Dict, List
+
+import gmqtt
+import numpy as np
+
+from edge_control import mqtt, snapshot, topics
+from edge_control.config import robot_config
+from edge_control.models.messages import MoveCommand, StopCommand
+
+from .mqttbroker import Broker
+
+logger = logging.getLogger(__name__)
+TWISTS = 1000  # twist sequence numbers encoded in linear.x
+
+
+class Load:
+    def __init__(self):
+        self.sent: Counter = Counter()
+        self.received: Counter = Counter()  # MQTT messages by topic from the robot
+        self.twists: Dict[int, float] = {}  # sequence number modulo TWISTS: send time
+        self.estop: List[float] = []  # send times not yet stopped
+        self.latency: Dict[str, List[float]] = {"twist": [], "estop": []}
+
+    async def generate(self, client: gmqtt.Client, topic: str, rate: float, duration: float):
+        if not rate:
+            return
+        t = time.perf_counter()
+        t_end = t + duration
+        i = 0
+        while t < t_end:
+            i += 1
+            if topic == "robot_cmd/twist_cmd":
+                self.twists[i % TWISTS] = time.perf_counter()
+                msg: dict = {"linear": {"x": (i % TWISTS + 1) / TWISTS}, "angular": {"z": 0.0}}
+            elif topic == "estop/cmd":
+                self.estop.append(time.perf_counter())
+                msg = {"signal": "STOP"}
+            else:
+                topic = "mission/pause" if i % 2 else "mission/continue"
+                msg = {}
+            client.publish(topic, json.dumps(msg), qos=1)
+            self.sent[topic] += 1
+            t += 1 / rate
+            await asyncio.sleep(max(0.0, t - time.perf_counter()))
+
+    async def commands(self, queue: asyncio.Queue):
+        while True:
+            command = await queue.get()
+            t = time.perf_counter()
+            if isinstance(command, MoveCommand) and command.speed:
+                i = round(command.speed / robot_config.max_speed * TWISTS) - 1
+                t0 = self.twists.pop(i, None)
+                if t0 is not None:
+                    self.latency["twist"].append(t - t0)
+            elif isinstance(command, StopCommand) and self.estop:
+                self.latency["estop"].append(t - self.estop.pop(0))
+
+    def on_message(self, client, topic, payload, qos, properties):
+        self.received[topic] += 1
+        return 0
+
+    def report(self, duration: float):
+        for topic, n in sorted(self.sent.items()):
+            print(f"sent     {topic:24} {n:6d} {n / duration:8.1f}/s")
+        for topic, n in sorted(self.received.items()):
+            print(f"received {topic:24} {n:6d} {n / duration:8.1f}/s")
+        for name, latency in self.latency.items():
+            if latency:
+                p50, p99, p100 = 1000 * np.percentile(latency, [50, 99, 100])
+                print(f"latency  {name:24} {len(latency):6d} p50 {p50:6.1f} ms p99 {p99:6.1f} ms max {p100:6.1f} ms")
+        d = mqtt._dispatch
+        print(f"dispatch received {d.received} invalid {d.invalid} dropped {d.dropped} failed {d.failed}")
+
+
+async def run(args):
+    broker = None
+    port = args.port
+    if not port:
+        broker = Broker()
+        port = await broker.start()
+    load = Load()
+    queue = topics.robot_command.subscription()
+    tasks = [
+        asyncio.create_task(mqtt.cloud_mqtt_driver(args.host, port)),
+        asyncio.create_task(snapshot.run(args.status)),
+        asyncio.create_task(load.commands(queue)),
+    ]
+    client = gmqtt.Client("load")
+    client.on_message = load.on_message
+    await client.connect(args.host, port)
+    client.subscribe("autonomy/#")
+    await asyncio.sleep(0.5)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(
+        load.generate(client, "robot_cmd/twist_cmd", args.twist, args.duration),
+        load.generate(client, "mission", args.mission, args.duration),
+        load.generate(client, "estop/cmd", args.estop, args.duration),
+    )
+    elapsed = time.perf_counter() - t0
+    await asyncio.sleep(0.5)
+    load.report(elapsed)
+
+    await client.disconnect()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    mqtt._dispatch.close()
+    if broker:
+        await broker.stop()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="tests.mqttload", description="MQTT bridge load test")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="Broker port, 0 for the in-process broker stand-in")
+    parser.add_argument("--twist", type=float, default=50, help="Twist commands/s")
+    parser.add_argument("--mission", type=float, default=5, help="Mission pause/continue commands/s")
+    parser.add_argument("--estop", type=float, default=0.5, help="Estop commands/s")
+    parser.add_argument("--status", type=float, default=1, help="Status period (s)")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Verbose output")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.verbose and logging.DEBUG or logging.WARNING)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark obstacle detection on synthetic depth frames: the full frame masked array computation with boolean mask
+indexing per region (as before) against the detector gathering only region pixels with flat indices.
+
+    python -m tests.realsense.obstacle --frames 200
+"""
+
+import time
+
+import numpy as np
+
+from edge_control.models.messages import ObstacleDetection
+from edge_control.realsense.obstacle import (
+    ObstacleDetector,
+    _areas,
+    _masks,
+    distance_threshold,
+    height,
+    obstacle_threshold,
+    width,
+)
+
+
+def masked_process(floor_depth, t: float, depth) -> ObstacleDetection:
+    # previous implementation, floor_depth is a masked array
+    obstacles = abs(depth - floor_depth) >= distance_threshold
+    blocked = [bool(obstacles[mask].sum() > obstacle_threshold * area) for mask, area in zip(_masks, _areas)]
+    return ObstacleDetection(t, *blocked)
+
+
+def frames(n: int):
+    rng = np.random.default_rng(0)
+    # floor further away towards the top of the image
+    floor = np.linspace(1500, 800, height, dtype=np.int16)[:, None].repeat(width, axis=1)
+    images = []
+    for i in range(n):
+        image = (floor + rng.integers(-15, 15, (height, width))).astype(np.uint16)
+        image[rng.random((height, width)) < 0.005] = 0
+        x = rng.integers(0, width - 100)
+        image[300:400, x : x + 100] = 600  # obstacle
+        images.append(image)
+    return floor, images
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="tests.realsense.obstacle", description="Obstacle detection benchmark")
+    parser.add_argument("--frames", type=int, default=100, help="Number of frames")
+    args = parser.parse_args()
+
+    floor, images = frames(args.frames)
+    masked_floor = np.ma.masked_equal(floor, 0)
+    detector = ObstacleDetector(floor)
+
+    for name, process in (
+        ("masked", lambda t, image: masked_process(masked_floor, t, image)),
+        ("indexed", detector.process),
+    ):
+        t0 = time.perf_counter()
+        detections = [process(i, image) for i, image in enumerate(images)]
+        elapsed = time.perf_counter() - t0
+        blocked = sum(d.left or d.center() or d.right for d in detections)
+        per_frame = elapsed / len(images)
+        print(f"{name:8} {1 / per_frame:8.1f} fps  {1000 * per_frame:6.2f} ms/frame  blocked {blocked}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark parsing of rs-pose-apriltag lines: json and dacite for every line (as before) against FrameParser,
+skipping poses as driver3 does (200 ms), on synthetic 30 Hz poses with tags once per second and lost tracking.
+
+    python -m tests.realsense.parser --seconds 600
+"""
+
+import json
+import time
+from typing import List, Optional
+
+import dacite
+
+from edge_control.realsense.T265 import Frame, FrameParser
+
+_pose = (
+    '{"frame":%d,"timestamp":%d,"pose":{"confidence":3,"t":[0.0966,-0.0211,0.696],"r":[-0.00525,-0.99,0.0107,0.138]}}'
+)
+_lost = '{"frame":%d,"timestamp":%d,"pose":{"confidence":0,"t":[nan,nan,nan],"r":[nan,nan,nan,nan]}}'
+_tag = (
+    '{"tagId":%d, "camera":{"r":[0.948,-0.021,0.318,0.013,1.000,0.027,-0.318,-0.021,0.948],"t":[-0.120,-0.189,1.936]}, '
+    '"world":{"r":[-0.999,0.010,-0.041,-0.010,-1.000,-0.009,-0.041,-0.008,0.999],"t":[0.783,0.198,2.510]}}'
+)
+
+
+def lines(seconds: int) -> List[str]:
+    res = []
+    t0 = 1606489924746
+    for i in range(30 * seconds):
+        t = t0 + i * 1000 // 30
+        res.append((_lost if i % 300 < 3 else _pose) % (i, t))
+        if i % 30 == 0:
+            tags = ", ".join(_tag % tag_id for tag_id in (0, 210, 212, 213))
+            res.append('{"frame":%d,"timestamp":%d,"tags":[%s]}' % (i, t, tags))
+    return res
+
+
+def dacite_parse(line: str) -> Optional[Frame]:
+    try:
+        return dacite.from_dict(data_class=Frame, data=json.loads(line))
+    except json.JSONDecodeError:
+        return None
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="tests.realsense.parser", description="T265 frame parser benchmark")
+    parser.add_argument("--seconds", type=int, default=300, help="Seconds of frames")
+    args = parser.parse_args()
+    data = lines(args.seconds)
+
+    frame_parser = FrameParser(200)
+    for name, parse in (
+        ("dacite", dacite_parse),
+        ("parser", FrameParser(0).parse),
+        ("skipping", frame_parser.parse),
+    ):
+        t0 = time.perf_counter()
+        frames = [frame for frame in map(parse, data) if frame is not None]
+        elapsed = time.perf_counter() - t0
+        print(
+            f"{name:8} {len(data) / elapsed:10.0f} lines/s  {1e6 * elapsed / len(data):6.2f} us/line  frames {len(frames)}"
+        )
+    print(f"skipped {frame_parser.skipped} lost {frame_parser.lost}")
+
+
+if __name__ == "__main__":
+    main()
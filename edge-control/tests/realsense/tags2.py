@@ -73,8 +73,7 @@ def parse_args():
 def main():
     args = parse_args()
 
-    _tags = dict((t.id, t) for t in tag_config.tags)
-    assert len(_tags) == len(tag_config.tags), "Duplicate tag ids in tag config"
+    _tags = tag_config.map
 
     pose = None
     timestamp = None
@@ -39,9 +39,7 @@ def main():
     from edge_control.realsense.driver3 import position
     from edge_control.realsense.T265 import Frame, Pose, Quaternion, Tag, TagPose  # for eval()
 
-    _tags = dict((t.id, t) for t in tag_config.tags)
-    assert len(_tags) == len(tag_config.tags), "Duplicate tag ids in tag config"
-    print("TAGDB", _tags.keys())
+    print("TAGDB", [t.id for t in tag_config.map.tags])
 
     x0 = np.array([[site_config.dock.position.x], [site_config.dock.position.y], [site_config.dock.heading]])
     r0 = np.diag([0.05, 0.05, 0.1])  # in docking station
@@ -0,0 +1,72 @@
+"""
+Benchmark the tag position solver: scipy minimize (as before) against the closed form fit, per tag frame.
+
+    python -m tests.realsense.tagsolver --frames 200 --tags 4
+"""
+
+import cmath
+import statistics
+import time
+
+import numpy
+
+from edge_control.config import Vector3D
+from edge_control.realsense.T265 import Tag, TagPose
+from edge_control.realsense.tags import position
+
+
+def scipy_position(x0, pairs, camera_offset):
+    from scipy.optimize import minimize
+
+    def error(x) -> float:
+        robot = complex(x[0], x[1])
+        rotation = cmath.rect(1, x[2])
+        return sum(
+            abs(robot + complex(tag.camera.t[2] + camera_offset.x, camera_offset.y - tag.camera.t[0]) * rotation - pos)
+            ** 2
+            for tag, pos in pairs
+        )
+
+    return minimize(error, x0).x
+
+
+def frames(n: int, tags: int):
+    rng = numpy.random.default_rng(0)
+    res = []
+    for _ in range(n):
+        x = numpy.array([rng.uniform(-10, 10), rng.uniform(-10, 10), rng.uniform(-3, 3)])
+        pairs = []
+        for i in range(tags):
+            ahead, left = rng.uniform(0.5, 3), rng.uniform(-1.5, 1.5)
+            world = complex(x[0], x[1]) + complex(ahead, left) * cmath.rect(1, x[2])
+            t = [-left + rng.normal(0, 0.02), 0.0, ahead + rng.normal(0, 0.02)]
+            pairs.append((Tag(i, TagPose(t, [1, 0, 0, 0, 1, 0, 0, 0, 1])), world))
+        res.append((x + rng.normal(0, 0.1, 3), pairs))
+    return res
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="tests.realsense.tagsolver", description="Tag position solver benchmark")
+    parser.add_argument("--frames", type=int, default=100, help="Number of tag frames")
+    parser.add_argument("--tags", type=int, default=4, help="Tags per frame")
+    args = parser.parse_args()
+    data = frames(args.frames, args.tags)
+    offset = Vector3D(0.1, 0.0, 1.0)
+
+    for name, solve in (("scipy", scipy_position), ("closed", position)):
+        latencies = []
+        for x0, pairs in data:
+            t0 = time.perf_counter()
+            solve(x0, pairs, offset)
+            latencies.append(time.perf_counter() - t0)
+        latencies.sort()
+        print(
+            f"{name:8} latency ms median {1000 * statistics.median(latencies):7.3f}  "
+            f"p95 {1000 * latencies[int(0.95 * (len(latencies) - 1))]:7.3f}  max {1000 * latencies[-1]:7.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@ import json
 
 import yaml
 
-from edge_control.config import tag_config
+from edge_control.config import resolve, tag_config
 
 # Site coordinates when in dock (origin for realsense)
 dock_x = 2.51
@@ -15,7 +15,7 @@ def tags():
         tag.position.y += dock_y
 
     # print(tag_config.tags)
-    print(yaml.dump(tag_config, indent=2))
+    print(yaml.dump(resolve(tag_config), indent=2))
 
 
 def site():
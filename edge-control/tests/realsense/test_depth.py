@@ -0,0 +1,42 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from edge_control.realsense.depth import driver, height, width
+from edge_control.realsense.status import DepthStatus
+from edge_control.robot import RobotState
+from edge_control.util.framefile import Reader, Writer
+
+
+@pytest.mark.asyncio
+async def test_driver(tmp_path):
+    floor = 1000 * np.ones((height, width), dtype=np.int16)
+    with open(tmp_path / "floor.npy", "wb") as f:
+        np.save(f, floor)
+    with Writer(str(tmp_path / "depth.frames"), (height, width)) as writer:
+        writer.write(1, floor)
+        writer.write(2, floor - 500)
+
+    record = str(tmp_path / "record.frames")
+    task = asyncio.create_task(driver(str(tmp_path / "depth.frames"), str(tmp_path / "floor.npy"), record))
+    for _ in range(100):
+        await asyncio.sleep(0.1)
+        if (DepthStatus.sequence.value or 0) >= 3:
+            break
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert DepthStatus.sequence.value >= 3
+    assert DepthStatus.latency.value < 1
+    detection = RobotState.obstacle_depth
+    # frames alternate between floor and obstacles
+    blocked = detection.left and detection.center_left and detection.center_right and detection.right
+    assert blocked == (DepthStatus.sequence.value % 2 == 0)
+    assert detection.distance == (0.5 if blocked else None)
+
+    # terminated while recording, readable up to the last complete frame
+    with Reader(record) as reader:
+        assert len(reader) >= 3
+        assert (reader[1][1] == floor - 500).all()
@@ -1,6 +1,6 @@
 import numpy as np
 
-from edge_control.realsense.obstacle import ObstacleDetector, distance_threshold, height, width
+from edge_control.realsense.obstacle import ObstacleDetector, _masks, _points, distance_threshold, height, width
 
 
 def test_clear():
@@ -25,3 +25,33 @@ def test_all_blocked():
     assert detection.center_left
     assert detection.center_right
     assert detection.right
+
+
+def test_regions():
+    # compare with the full frame computation per region mask
+    rng = np.random.default_rng(1)
+    floor = rng.integers(800, 1500, (height, width)).astype(np.int16)
+    floor[:10] = 0  # no floor information
+    depth = (floor + rng.integers(-30, 30, (height, width))).astype(np.uint16)
+    depth[rng.random((height, width)) < 0.01] = 0
+    d = ObstacleDetector(floor)
+    counts, nearest = d.regions(depth)
+
+    obstacles = abs(depth.astype(np.int32) - floor) >= distance_threshold
+    for i, mask in enumerate(_masks):
+        mask = mask & (floor != 0)
+        assert counts[i] == obstacles[mask].sum()
+        assert nearest[i] == depth[mask & obstacles & (depth > 0)].min()
+
+
+def test_distance():
+    floor = 1000 * np.ones((height, width), dtype=np.int16)
+    image = floor.copy()
+    x, y = _points[0][0]  # bottom corner of left region
+    image[y - 50 : y, x - 60 : x + 60] = 700
+    image[y - 10 : y, x : x + 10] = 650
+    d = ObstacleDetector(floor)
+    detection = d.process(12.5, image)
+    assert detection.left
+    assert not detection.right
+    assert detection.distance == 0.65
@@ -1,8 +1,21 @@
+import cmath
+import math
+
 import numpy
+import pytest
 from pytest import approx
 
 from edge_control.config import Vector3D
-from edge_control.realsense.T265 import Frame, Pose, Quaternion, Tag, TagPose, to_site_euler, to_site_position
+from edge_control.realsense.T265 import (
+    Frame,
+    FrameParser,
+    Pose,
+    Quaternion,
+    Tag,
+    TagPose,
+    to_site_euler,
+    to_site_position,
+)
 from edge_control.realsense.tags import distance, position, tag_position
 
 
@@ -55,8 +68,7 @@ def test_tags():
     assert len(frame.tags[0].world.t) == 3
 
 
-def _test_driver2_position():
-    # DISABLED: requires scipy dependency
+def test_driver2_position():
 
     # NOTE: with origin in dock, before realigning origin to corner of office
     # 2020-10-29 12:40:55.730
@@ -103,3 +115,94 @@ def _test_driver2_position():
     x0 = numpy.array([-0.8, 0.5, 1.1])
     x = position(x0, [(tag1, tag1_pos), (tag2, tag2_pos)], Vector3D(0, 0, 0))
     assert distance(x, x1) < 0.13
+
+
+def test_parser():
+    pose = '{"frame":%d,"timestamp":%d,"pose":{"confidence":3,"t":[0.0966,-0.0211,0.696],"r":[-0.00525,-0.99,0.0107,0.138]}}'
+    tags = (
+        '{"frame":%d,"timestamp":%d,"tags":[{"tagId":0,"camera":{"r":[1,0,0,0,1,0,0,0,1],"t":[-0.120,-0.189,1.936]}}]}'
+    )
+    lost = '{"frame":%d,"timestamp":%d,"pose":{"confidence":0,"t":[nan,nan,nan],"r":[nan,nan,nan,nan]}}'
+    parser = FrameParser(pose_period=200)
+    frames = []
+    for i in range(30):
+        t = 1601456003782 + 33 * i
+        line = (lost if i == 20 else pose) % (i, t)
+        frames.append(parser.parse(line))
+        if i % 10 == 5:
+            frames.append(parser.parse(tags % (i, t)))
+    frames = [frame for frame in frames if frame is not None]
+    assert [frame.frame for frame in frames] == [0, 5, 7, 14, 15, 21, 25, 28]
+    assert [frame.pose is None for frame in frames] == [False, True, False, False, True, False, True, False]
+    assert frames[0] == Frame.from_json(pose % (0, 1601456003782))
+    assert frames[1].tags[0].world is None
+    assert parser.lost == 1
+    assert parser.lines == 33
+    assert parser.skipped == 33 - 8 - 1
+
+
+def _tags(x, n: int, rng, noise: float = 0.0):
+    # n tags in view of robot at x, with camera t (right, down, ahead), and their world positions
+    pairs = []
+    for i in range(n):
+        ahead, left = rng.uniform(0.5, 3), rng.uniform(-1.5, 1.5)
+        world = complex(x[0], x[1]) + complex(ahead, left) * cmath.rect(1, x[2])
+        t = [-left + rng.normal(0, noise), 0.0, ahead + rng.normal(0, noise)]
+        pairs.append((Tag(i, TagPose(t, [1, 0, 0, 0, 1, 0, 0, 0, 1])), world))
+    return pairs
+
+
+def test_position_scipy():
+    minimize = pytest.importorskip("scipy.optimize").minimize
+
+    def error(x, pairs):
+        # former scipy based solver
+        return sum(
+            abs(complex(x[0], x[1]) + complex(tag.camera.t[2], -tag.camera.t[0]) * cmath.rect(1, x[2]) - pos) ** 2
+            for tag, pos in pairs
+        )
+
+    rng = numpy.random.default_rng(1)
+    for _ in range(20):
+        x = numpy.array([rng.uniform(-10, 10), rng.uniform(-10, 10), rng.uniform(-3, 3)])
+        x0 = x + rng.normal(0, 0.2, 3)
+        pairs = _tags(x, rng.integers(2, 6), rng, 0.02)
+        expected = minimize(error, x0, args=(pairs,)).x
+        assert position(x0, pairs, Vector3D(0, 0, 0)) == approx(expected, abs=1e-4)
+
+
+def test_position_outlier():
+    rng = numpy.random.default_rng(2)
+    x = numpy.array([2.0, -1.0, 0.5])
+    pairs = _tags(x, 5, rng)
+    tag, pos = pairs[1]
+    pairs[1] = (tag, pos + 1.0)  # e.g. a moved tag
+    assert position(x, pairs, Vector3D(0, 0, 0)) == approx(x)
+    # heading closest to x0
+    assert position(x + [0, 0, 2 * math.pi], pairs, Vector3D(0, 0, 0))[2] == approx(x[2] + 2 * math.pi)
+
+
+def test_shift():
+    from edge_control.realsense.driver3 import shift
+
+    tag = 3 + 1j  # site
+    x0 = numpy.array([[1.0], [0.0], [0.0]])
+    z0 = numpy.array([[2.0], [1.0]])  # tag in robot frame at capture
+    # robot has since turned left and moved
+    x1 = numpy.array([[1.5], [0.5], [math.pi / 2]])
+    z1 = shift(z0, x0, x1)
+    expected = (tag - complex(1.5, 0.5)) * cmath.rect(1, -math.pi / 2)
+    assert z1.flatten() == approx([expected.real, expected.imag])
+    assert shift(z0, x0, x0) == approx(z0)
+
+
+def test_moved():
+    from edge_control.realsense.driver2 import moved
+
+    p0 = numpy.array([1.0, 0.0, 0.0])
+    # fix turns the robot left by 90 degrees
+    p = numpy.array([2.0, 1.0, math.pi / 2])
+    # robot has since driven 1 m ahead and turned, ahead is +y after the fix
+    p_now = numpy.array([2.0, 0.0, 0.1])
+    assert moved(p, p0, p_now) == approx([2.0, 2.0, math.pi / 2 + 0.1])
+    assert moved(p, p0, p0) == approx(p)
@@ -0,0 +1,108 @@
+"""
+Startup benchmark: import time of the service modules by python -X importtime, with the heavy dependencies each
+still imports eagerly and the modules taking the most time themselves, and the time from process start to the
+first command (a twist on MQTT through the broker stand-in) published on robot_command.
+
+    python -m tests.startup --runs 5 --top 15
+"""
+
+import asyncio
+import json
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+MODULES = ["edge_control.config", "edge_control.robot", "edge_control.mqtt", "edge_control.api"]
+HEAVY = ["numpy", "scipy", "shapely", "utm", "yaml", "dacite", "aiostream"]
+
+
+def importtime(module: str) -> Tuple[float, Dict[str, float]]:
+    """Cumulative import time (s) of module and self time (s) per imported module"""
+    command = [sys.executable, "-X", "importtime", "-c", f"import {module}"]
+    result = subprocess.run(command, capture_output=True, text=True)
+    self_times = {}
+    total = 0.0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        self_times[name.strip()] = 1e-6 * int(self_us)
+        if name.strip() == module:
+            total = 1e-6 * int(cumulative_us)
+    return total, self_times
+
+
+async def first_command():
+    # in the child process
+    from edge_control import mqtt, topics
+
+    imported = time.time()
+    import gmqtt
+
+    from .mqttbroker import Broker
+
+    broker = Broker()
+    port = await broker.start()
+    commands = topics.robot_command.subscription()
+    driver = asyncio.create_task(mqtt.cloud_mqtt_driver("127.0.0.1", port))
+    client = gmqtt.Client("startup")
+    await client.connect("127.0.0.1", port)
+    while True:
+        client.publish("robot_cmd/twist_cmd", json.dumps({"linear": {"x": 0.1}, "angular": {"z": 0.0}}))
+        try:
+            await asyncio.wait_for(commands.get(), 0.01)
+            break
+        except asyncio.TimeoutError:
+            # until subscribed
+            pass
+    print(imported, time.time())
+    await client.disconnect()
+    driver.cancel()
+    await asyncio.gather(driver, return_exceptions=True)
+    mqtt._dispatch.close()
+    await broker.stop()
+
+
+def time_to_first_command() -> Tuple[float, float]:
+    """Time (s) from process start to imported and to the first command"""
+    t0 = time.time()
+    result = subprocess.run([sys.executable, "-m", "tests.startup", "--child"], capture_output=True, text=True)
+    imported, commanded = map(float, result.stdout.split())
+    return imported - t0, commanded - t0
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="tests.startup", description="Startup benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per measurement, median reported")
+    parser.add_argument("--top", type=int, default=15, help="Modules with the most self time")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        asyncio.run(first_command())
+        return
+
+    self_times: Dict[str, List[float]] = {}
+    for module in MODULES:
+        results = [importtime(module) for _ in range(args.runs)]
+        eager = " ".join(name for name in HEAVY if name in results[0][1])
+        print(f"import {module:28} {1000 * statistics.median(total for total, _ in results):8.1f} ms  {eager}")
+        for _, times in results:
+            for name, t in times.items():
+                self_times.setdefault(name, []).append(t)
+
+    print("\nmost self time (of the modules above, median per import):")
+    top = sorted(((statistics.median(t), name) for name, t in self_times.items()), reverse=True)[: args.top]
+    for t, name in top:
+        print(f"  {name:40} {1000 * t:8.1f} ms")
+
+    runs = [time_to_first_command() for _ in range(args.runs)]
+    print(f"\nstart to edge_control.mqtt imported {1000 * statistics.median(r[0] for r in runs):8.1f} ms")
+    print(f"start to first command             {1000 * statistics.median(r[1] for r in runs):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
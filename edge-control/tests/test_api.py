@@ -0,0 +1,112 @@
+import asyncio
+import itertools
+import json
+from typing import List
+
+import pytest
+
+from edge_control import api, framing, storage
+from edge_control.models.state import State
+
+
+class Connection:
+    def __init__(self):
+        self.sent = []
+
+    def post(self, topic: str, message: str):
+        self.sent.append(json.loads(message))
+
+
+class BinaryConnection:
+    def __init__(self):
+        self.sent = []
+
+    def post(self, topic: str, message: bytes):
+        self.sent.append(message)
+
+
+class WebSocket:
+    """Receives the given messages once the first message is sent"""
+
+    def __init__(self, *received: str):
+        self.received = received
+        self.sent: List[str] = []
+        self._sent = asyncio.Event()
+
+    async def send(self, message):
+        self.sent.append(message)
+        self._sent.set()
+
+    async def __aiter__(self):
+        await self._sent.wait()
+        for msg in self.received:
+            yield msg
+
+
+@pytest.mark.asyncio
+async def test_connection():
+    ws = WebSocket(json.dumps({"topic": "binary", "message": {"topics": ["robot_tracking"]}}))
+    await api.connection(ws, "/")
+    assert json.loads(ws.sent[0])["topic"] == "map"
+    assert ws not in api.connections
+    assert not api.binary_clients
+
+
+def test_trail_resume():
+    for i in range(10):
+        storage.track.append(float(i), State(float(i), 0, 0))
+    connection = Connection()
+    api.request_trail(connection, {"resolution": 1.28})
+    message = connection.sent[-1]["message"]
+    assert message["reset"]
+    assert len(message["points"]) == 5
+    cursor = message["cursor"]
+
+    # reconnect, only new points
+    storage.track.append(10.0, State(10.0, 0, 0))
+    storage.track.append(11.0, State(11.0, 0, 0))
+    connection = Connection()
+    api.request_trail(connection, {"resolution": 1.28, "session": message["session"], "cursor": cursor})
+    message = connection.sent[-1]["message"]
+    assert not message["reset"]
+    assert message["points"] == [[10.0, 0.0]]
+
+    # incremental
+    storage.track.append(12.0, State(12.0, 0, 0))
+    api.send_trail(connection, api.trails[connection])
+    assert connection.sent[-1]["message"]["points"] == [[12.0, 0.0]]
+    api.send_trail(connection, api.trails[connection])
+    assert len(connection.sent) == 2
+    api.trails.clear()
+
+
+def test_request_binary():
+    connection = Connection()
+    api.request_binary(connection, {"topics": ["robot_tracking", "unknown"]})
+    assert connection.sent[-1]["message"]["topics"]["robot_tracking"]["id"] == 1
+    assert api.binary_clients[connection] == {"robot_tracking"}
+    # back to JSON
+    api.request_binary(connection, {})
+    assert connection.sent[-1]["message"]["topics"] == {}
+    assert connection not in api.binary_clients
+
+
+@pytest.mark.asyncio
+async def test_binary_feed(monkeypatch):
+    # later on every call
+    clock = itertools.count(1000.0)
+    monkeypatch.setattr(api.time, "time", lambda: float(next(clock)))
+    connection = BinaryConnection()
+    api.binary_clients[connection] = {"robot_tracking"}
+    api.batcher.add("robot_tracking", 999.5, State(1.0, 2.0, 0.5))
+    task = asyncio.create_task(api.binary_feed(0.001))
+    while not connection.sent:
+        await asyncio.sleep(0.001)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    del api.binary_clients[connection]
+
+    t, records = framing.decode(connection.sent[0])
+    assert t == 1000.0
+    assert records["robot_tracking"].tolist() == [[999.5, 1.0, 2.0, 0.5]]
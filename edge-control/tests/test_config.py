@@ -1,6 +1,6 @@
 from pytest import approx
 
-from edge_control.config import mission_config
+from edge_control.config import Lazy, mission_config, resolve
 
 
 def test_mission_config():
@@ -8,3 +8,18 @@ def test_mission_config():
     assert mission_config.on_site.enabled
     assert mission_config.on_site.interval == approx(1)
     assert mission_config.on_site.buffer == approx(10)
+
+
+def test_lazy():
+    loaded = []
+
+    def load():
+        loaded.append(1)
+        return None
+
+    config = Lazy(load)
+    assert not loaded
+    assert not config
+    assert not config
+    assert loaded == [1]
+    assert resolve(config) is None
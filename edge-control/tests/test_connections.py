@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from edge_control.connections import ApiStatus, Connection
+
+
+class WebSocket:
+    def __init__(self):
+        self.sent = []
+        self.closed = None
+        self.blocked = asyncio.Event()
+        self.blocked.set()
+
+    async def send(self, message: str):
+        await self.blocked.wait()
+        self.sent.append(message)
+
+    async def close(self, code: int, reason: str):
+        self.closed = reason
+
+
+@pytest.mark.asyncio
+async def test_conflate():
+    ws = WebSocket()
+    ws.blocked.clear()
+    connection = Connection(ws)
+    connection.start()
+    connection.post("status", "s")
+    await asyncio.sleep(0)
+    # first status is being sent, blocked
+    for i in range(5):
+        connection.post("status", f"s{i}")
+        connection.post("trail", f"t{i}")
+    assert connection.status(0).queued == 6
+    ws.blocked.set()
+    await asyncio.sleep(0.01)
+    assert ws.sent == ["s", "s4", "t0", "t1", "t2", "t3", "t4"]
+    assert connection.conflated == 4
+    assert connection.status(0).queued == 0
+    connection.stop()
+    await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_slow_client():
+    fast, slow = WebSocket(), WebSocket()
+    slow.blocked.clear()
+    connections = [Connection(fast, limit=10), Connection(slow, limit=10)]
+    for c in connections:
+        c.start()
+    disconnected = ApiStatus.disconnected.value
+    for i in range(20):
+        for c in connections:
+            c.post("trail", str(i))
+        await asyncio.sleep(0)
+    assert fast.sent == [str(i) for i in range(20)]
+    assert slow.closed == "queue full"
+    assert ApiStatus.disconnected.value == disconnected + 1
+    for c in connections:
+        c.stop()
+    await asyncio.sleep(0)
@@ -0,0 +1,33 @@
+import math
+
+import numpy as np
+
+from edge_control import framing
+from edge_control.models.messages import ObstacleDetection
+from edge_control.models.state import State
+
+
+def test_frame():
+    batcher = framing.Batcher()
+    batcher.add("robot_tracking", 99.95, State(1.0, 2.0, 0.5))
+    batcher.add("robot_tracking", 100.0, State(1.5, 2.0, 0.5))
+    batcher.add("obstacle_detection", 100.0, ObstacleDetection(99.9, True, False, False, True))
+    blocks = batcher.flush(100.0)
+    assert batcher.flush(100.1) == {}
+
+    t, records = framing.decode(framing.frame(100.0, blocks, {"robot_tracking", "obstacle_detection"}))
+    assert t == 100.0
+    np.testing.assert_allclose(records["robot_tracking"], [[99.95, 1.0, 2.0, 0.5], [100.0, 1.5, 2.0, 0.5]], atol=1e-6)
+    (obstacle,) = records["obstacle_detection"]
+    assert obstacle[1] == 0b1001
+    assert math.isnan(obstacle[2])
+
+    # only the topics of the client
+    t, records = framing.decode(framing.frame(100.0, blocks, {"robot_tracking"}))
+    assert list(records) == ["robot_tracking"]
+    assert framing.frame(100.0, blocks, set()) == b""
+
+
+def test_schema():
+    schema = framing.schema(["robot_tracking", "unknown"], 0.1)
+    assert schema == {"interval": 0.1, "topics": {"robot_tracking": {"id": 1, "fields": ["dt", "x", "y", "theta"]}}}
@@ -0,0 +1,82 @@
+import asyncio
+import json
+
+import gmqtt
+import pytest
+from gmqtt.mqtt.constants import MQTTv50, MQTTv311
+
+from edge_control import missioncontrol, missions, mqtt, topics
+from edge_control.models.messages import MoveCommand, StopCommand
+
+from .mqttbroker import Broker
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("version", [MQTTv311, MQTTv50])
+async def test_broker(version):
+    broker = Broker()
+    port = await broker.start()
+    received = []
+    subscriber = gmqtt.Client("subscriber")
+    subscriber.on_message = lambda client, topic, payload, qos, properties: received.append((topic, payload, qos))
+    publisher = gmqtt.Client("publisher")
+    await publisher.connect("127.0.0.1", port, version=version)
+    publisher.publish("autonomy/retained", b"1", qos=1, retain=True)
+    await asyncio.sleep(0.05)
+
+    await subscriber.connect("127.0.0.1", port, version=version)
+    subscriber.subscribe("autonomy/#", qos=1)
+    await asyncio.sleep(0.05)
+    publisher.publish("autonomy/status", b"2", qos=1)
+    publisher.publish("other", b"3")
+    await asyncio.sleep(0.05)
+    assert received == [("autonomy/retained", b"1", 1), ("autonomy/status", b"2", 1)]
+
+    await subscriber.disconnect()
+    await publisher.disconnect()
+    await broker.stop()
+
+
+@pytest.mark.asyncio
+async def test_commands():
+    broker = Broker()
+    port = await broker.start()
+    commands = topics.robot_command.subscription()
+    driver = asyncio.create_task(mqtt.cloud_mqtt_driver("127.0.0.1", port))
+    client = gmqtt.Client("commander")
+    await client.connect("127.0.0.1", port)
+    await asyncio.sleep(0.1)
+
+    client.publish("robot_cmd/twist_cmd", json.dumps({"linear": {"x": 0.5}, "angular": {"z": 0.0}}), qos=1)
+    assert isinstance(await asyncio.wait_for(commands.get(), 1), MoveCommand)
+    client.publish("estop/cmd", json.dumps({"signal": "STOP"}), qos=1)
+    assert isinstance(await asyncio.wait_for(commands.get(), 1), StopCommand)
+
+    await client.disconnect()
+    driver.cancel()
+    await asyncio.gather(driver, return_exceptions=True)
+    mqtt._dispatch.close()
+    topics.robot_command._queues.remove(commands)
+    await broker.stop()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("topic, payload", [("estop/cmd", b'{"signal": "STOP"}'), ("mission/abort", b"{}")])
+async def test_abort_during_start(monkeypatch, topic, payload):
+    async def get_mission(name: str):
+        # e.g. building the mission plan
+        await asyncio.sleep(0.2)
+        return None
+
+    monkeypatch.setattr(missions, "get_mission", get_mission)
+    commands = topics.robot_command.subscription()
+    await mqtt._dispatch.dispatch(None, "mission/start", b'{"name": "mow"}')
+    await asyncio.sleep(0.01)
+    await mqtt._dispatch.dispatch(None, topic, payload)
+    assert isinstance(await asyncio.wait_for(commands.get(), 1), StopCommand)
+    await asyncio.sleep(0.3)
+    # the start was invalidated by the abort
+    assert missioncontrol._mission_in_progress is None
+
+    mqtt._dispatch.close()
+    topics.robot_command._queues.remove(commands)
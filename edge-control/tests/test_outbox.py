@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from edge_control.outbox import Outbox, forward
+
+
+class Client:
+    def __init__(self):
+        self.is_connected = False
+        self.published = []
+
+    def publish(self, topic: str, payload, qos=0) -> bool:
+        if self.is_connected:
+            self.published.append((topic, payload.decode()))
+        return self.is_connected
+
+
+def test_outbox(tmp_path):
+    file_name = str(tmp_path / "outbox.sqlite")
+    outbox = Outbox(file_name, max_bytes=30)
+    assert outbox.put("mission", "1234567890", 1, "m/1")
+    assert not outbox.put("mission", "1234567890", 1, "m/1")
+    assert outbox.put("mission", "abcdefghij", 1, "m/2")
+    outbox.close()
+
+    # persisted
+    outbox = Outbox(file_name, max_bytes=30)
+    assert outbox.size == 20
+    (id1, _, payload, qos), (id2, *_) = outbox.peek(10)
+    assert (payload, qos) == (b"1234567890", 1)
+
+    # delivered keys are still duplicates
+    outbox.ack([id1])
+    assert not outbox.put("mission", "1234567890", 1, "m/1")
+    assert len(outbox) == 1
+
+    # bounded, oldest dropped
+    assert outbox.put("mission", "x" * 25, 1, "m/3")
+    assert [p for _, _, p, _ in outbox.peek(10)] == [b"x" * 25]
+    assert outbox.size == 25
+    outbox.close()
+
+
+@pytest.mark.asyncio
+async def test_forward(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.sqlite"), max_bytes=1000)
+    client = Client()
+    for i in range(5):
+        outbox.put("mission", str(i), 1, str(i))
+    task = asyncio.create_task(forward(outbox, client, rate=100, batch=2))
+    await asyncio.sleep(0.01)
+    assert not client.published and len(outbox) == 5
+
+    client.is_connected = True
+    await asyncio.sleep(1.1)
+    assert client.published == [("mission", str(i)) for i in range(5)]
+    assert len(outbox) == 0
+
+    # live message
+    outbox.put("mission", "5", 1, "5")
+    await asyncio.sleep(0.01)
+    assert client.published[-1] == ("mission", "5")
+    task.cancel()
+    await asyncio.sleep(0)
+    outbox.close()
@@ -0,0 +1,71 @@
+import asyncio
+import json
+
+import pytest
+
+from edge_control.config import PublishPolicy
+from edge_control.publisher import Publisher
+
+
+class Client:
+    def __init__(self):
+        self.published = []
+        self.times = []  # loop time of each publish
+
+    def publish(self, topic: str, payload: str, qos: int = 0) -> bool:
+        self.published.append((topic, payload, qos))
+        self.times.append(asyncio.get_running_loop().time())
+        return True
+
+
+@pytest.mark.asyncio
+async def test_immediate():
+    client = Client()
+    publisher = Publisher(client.publish, {})
+    publisher.put("mission", '{"a": 1}', 1)
+    assert client.published == [("mission", '{"a": 1}', 1)]
+    (status,) = publisher.status()
+    assert (status.messages, status.publishes, status.bytes) == (1, 1, 8)
+
+
+@pytest.mark.asyncio
+async def test_coalesce():
+    client = Client()
+    publisher = Publisher(client.publish, {"autonomy/status": PublishPolicy(qos=1, window=0.05, coalesce=True)})
+    for i in range(5):
+        publisher.put("autonomy/status", str(i))
+    assert client.published == []
+    await asyncio.sleep(0.1)
+    assert client.published == [("autonomy/status", "4", 1)]
+    assert publisher.status()[0].coalesced == 4
+
+
+@pytest.mark.asyncio
+async def test_batch_rate():
+    client = Client()
+    publisher = Publisher(client.publish, {"gaugecapture": PublishPolicy(batch=2, max_rate=20)})
+    for i in range(5):
+        publisher.put("gaugecapture", str(i))
+    # first immediately, then batches of 2 at max rate, always as arrays
+    assert [json.loads(p) for _, p, _ in client.published] == [[0]]
+    await asyncio.sleep(0.07)
+    assert [json.loads(p) for _, p, _ in client.published] == [[0], [1, 2]]
+    await asyncio.sleep(0.05)
+    assert [json.loads(p) for _, p, _ in client.published] == [[0], [1, 2], [3, 4]]
+    status = publisher.status()[0]
+    assert (status.messages, status.publishes) == (5, 3)
+
+
+@pytest.mark.asyncio
+async def test_rate():
+    client = Client()
+    publisher = Publisher(client.publish, {"mission": PublishPolicy(max_rate=20)})
+    for i in range(10):
+        publisher.put("mission", str(i))
+        await asyncio.sleep(0.01)
+    # one message per publish, not a burst of those pending
+    assert len(client.published) < 5
+    await asyncio.sleep(0.5)
+    assert [p for _, p, _ in client.published] == [str(i) for i in range(10)]
+    intervals = [t1 - t0 for t0, t1 in zip(client.times, client.times[1:])]
+    assert min(intervals) >= 0.05 - 0.005
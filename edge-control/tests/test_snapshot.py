@@ -0,0 +1,103 @@
+import json
+from typing import Optional
+
+from edge_control.arch.commands import CommandStatus
+from edge_control.robot import RobotState
+from edge_control.snapshot import SnapshotBuilder, keyframe
+from edge_control.util.json import dumps
+
+
+def _same(builder: SnapshotBuilder, t: float):
+    assert json.loads(builder.build(t).encoded) == json.loads(dumps(RobotState.as_dict(t)))
+
+
+def test_snapshot(monkeypatch):
+    builder = SnapshotBuilder()
+    t = 100.0
+    _same(builder, t)
+    encoded = builder.encoded
+    assert builder.reused == 0
+    _same(builder, t + 1)
+    assert builder.encoded == encoded
+    assert builder.reused == encoded
+
+    # changed section only
+    CommandStatus.written.inc(t + 2)
+    _same(builder, t + 2)
+    assert builder.encoded == encoded + 1
+    assert json.loads(builder.build(t + 2).encoded)["commands"]["written"] > 0
+
+    # expired
+    _same(builder, t + 2 + CommandStatus.written.ttl + 1)
+    assert builder.encoded == encoded + 2
+
+    monkeypatch.setattr(RobotState, "battery", None)
+    monkeypatch.setattr(RobotState, "docked", not RobotState.docked)
+    _same(builder, t + 100)
+
+
+class Decoder:
+    """Reference client side decoder of keyframes and deltas"""
+
+    def __init__(self):
+        self.status: Optional[dict] = None
+        self.seq = 0
+
+    def decode(self, message: str) -> Optional[dict]:
+        m = json.loads(message)
+        if m.get("keyframe"):
+            self.status = m["status"]
+        elif self.status is None or m["seq"] != self.seq + 1:
+            # wait for keyframe
+            self.status = None
+            return None
+        else:
+            for path, v in m["set"].items():
+                section, _, field = path.partition(".")
+                if field:
+                    self.status.setdefault(section, {})[field] = v
+                else:
+                    self.status[section] = v
+            for path in m["unset"]:
+                section, _, field = path.partition(".")
+                if field:
+                    fields = self.status.get(section, {})
+                    fields.pop(field, None)
+                    if not fields:
+                        self.status.pop(section, None)
+                else:
+                    self.status.pop(section, None)
+        self.seq = m["seq"]
+        return self.status
+
+
+def test_delta(monkeypatch):
+    # toggled below, restored after the test
+    monkeypatch.setattr(RobotState, "docked", RobotState.docked)
+    builder = SnapshotBuilder()
+    decoder = Decoder()
+    t = 1000.0
+    assert decoder.decode(builder.build(t).delta) is None
+    snapshot = builder.build(t)
+    assert decoder.decode(keyframe(snapshot)) == json.loads(snapshot.encoded)
+
+    for i in range(1, 200):
+        t += 1
+        if i % 3 == 0:
+            CommandStatus.written.inc(t)
+        if i % 7 == 0:
+            CommandStatus.coalesced.inc(t)
+        if i % 50 == 0:
+            RobotState.docked = not RobotState.docked
+        snapshot = builder.build(t)
+        delta = json.loads(snapshot.delta)
+        # only changes
+        assert ("commands.written" in delta["set"]) == (i % 3 == 0)
+        assert ("docked" in delta["set"]) == (i % 50 == 0)
+        assert decoder.decode(snapshot.delta) == json.loads(snapshot.encoded)
+
+    # gap
+    builder.build(t + 1)
+    assert decoder.decode(builder.build(t + 2).delta) is None
+    snapshot = builder.build(t + 3)
+    assert decoder.decode(keyframe(snapshot)) == json.loads(snapshot.encoded)
@@ -0,0 +1,67 @@
+from pytest import approx
+
+from edge_control.models.state import State
+from edge_control.storage import TrackStore, load, resolution_level, to_dicts, to_states
+
+
+def _fill(store: TrackStore, n: int):
+    for i in range(n):
+        store.append(float(i), State(i, -i, 0.1 * i))
+
+
+def test_ring():
+    store = TrackStore(10)
+    assert len(store.range()) == 0
+    _fill(store, 4)
+    assert store.range()["time"].tolist() == [0, 1, 2, 3]
+    _fill(store, 25)
+    assert len(store) == 10
+    assert store.range()["time"].tolist() == list(range(15, 25))
+    assert store.range(17.5, 20)["time"].tolist() == [18, 19]
+    assert to_states(store.range(24)) == [State(24, -24, approx(2.4))]
+    assert to_dicts(store.range(24)) == [dict(x=24, y=-24, theta=approx(2.4))]
+
+
+def test_retention():
+    store = TrackStore(10, retention=3)
+    _fill(store, 8)
+    assert store.range()["time"].tolist() == [4, 5, 6, 7]
+    assert store.range(6)["time"].tolist() == [6, 7]
+
+
+def test_spill(tmp_path):
+    file_name = str(tmp_path / "tracking.bin")
+    store = TrackStore(10)
+    store.spill(file_name)
+    _fill(store, 30)
+    # older than the ring from file
+    assert store.range(5, 8)["time"].tolist() == [5, 6, 7]
+    assert len(store.range()) == 10
+    store.close()
+    records = load(file_name)
+    assert records["time"].tolist() == list(range(30))
+    assert records["y"][3] == -3
+
+
+def test_trail():
+    store = TrackStore(100)
+    for i in range(10):
+        store.append(float(i), State(0.03 * i, 0, 0))
+    # initialized from the ring, then updated as records are appended
+    trail = store.trail(0.1)
+    assert trail.resolution == approx(0.08)
+    assert [p[0] for p in trail.points] == [1, 4, 7, 10]
+    store.append(10.0, State(0.3, 0, 0))
+    store.append(11.0, State(0.4, 0, 0))
+    assert [p[0] for p in trail.points] == [1, 4, 7, 10, 12]
+    assert store.trail(0.07) is trail
+    # resume
+    assert [p[0] for p in trail.since(0)] == [1, 4, 7, 10, 12]
+    assert [p[0] for p in trail.since(7)] == [10, 12]
+    assert trail.since(12) == []
+
+
+def test_resolution_level():
+    assert resolution_level(0) == approx(0.01)
+    assert resolution_level(0.05) == approx(0.04)
+    assert resolution_level(0.5) == approx(0.64)
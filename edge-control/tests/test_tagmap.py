@@ -0,0 +1,54 @@
+import math
+
+import numpy
+from pytest import approx
+
+from edge_control.config import Tag, TagConfig, TagPosition
+from edge_control.map.tagmap import TagMap
+
+
+def _tag(tag_id: int, x: float, y: float) -> Tag:
+    return Tag(tag_id, TagPosition(x, y, None, 1.0))
+
+
+def _ids(tags):
+    return sorted(tag.id for tag in tags)
+
+
+def test_get():
+    config = TagConfig([_tag(1, 0, 0), _tag(2, 3, 4)])
+    assert config.get(2).position.complex() == approx(3 + 4j)
+    assert config.get(3) is None
+    assert 1 in config.map and 3 not in config.map
+    assert len(config.map) == 2
+
+
+def test_near():
+    tag_map = TagMap([_tag(1, 0, 0), _tag(2, 3, 4), _tag(3, -10, 0), _tag(4, 4.1, 4)], cell=2)
+    assert _ids(tag_map.near(0, 5)) == [1, 2]
+    assert _ids(tag_map.near(-10 + 1j, 1.5)) == [3]
+    assert _ids(tag_map.near(100, 5)) == []
+
+
+def test_visible():
+    tag_map = TagMap([_tag(1, 2, 0), _tag(2, 2, 2.5), _tag(3, -2, 0), _tag(4, 8, 0), _tag(5, 2, -1)])
+    # facing along x, 90 degree field of view
+    assert _ids(tag_map.visible(0, 0, math.pi / 2, 6)) == [1, 5]
+    # tag 2 just outside view at 51 degrees, tag 4 beyond range
+    assert _ids(tag_map.visible(0, 0, math.pi / 2, 6, margin=0.5)) == [1, 2, 5]
+    assert _ids(tag_map.visible(0, 0, math.pi / 2, 8.2)) == [1, 4, 5]
+    # facing backwards
+    assert _ids(tag_map.visible(0, math.pi, math.pi / 2, 6)) == [3]
+
+
+def test_visible_grid():
+    # same result as brute force for a large site
+    rng = numpy.random.default_rng(1)
+    positions = rng.uniform(-100, 100, (500, 2))
+    tag_map = TagMap([_tag(i, x, y) for i, (x, y) in enumerate(positions)])
+    for _ in range(50):
+        camera = complex(*rng.uniform(-100, 100, 2))
+        heading = rng.uniform(-math.pi, math.pi)
+        d = (positions[:, 0] + 1j * positions[:, 1] - camera) * complex(math.cos(heading), -math.sin(heading))
+        expected = numpy.flatnonzero((numpy.abs(d) <= 6) & (numpy.abs(numpy.angle(d)) <= 1.4))
+        assert _ids(tag_map.visible(camera, heading, 2.8, 6)) == list(expected)
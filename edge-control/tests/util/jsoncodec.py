@@ -0,0 +1,87 @@
+"""
+Benchmark util.json against json with a dataclasses.asdict encoder and dacite (as before), on representative
+messages: State, cdf.Mission, a populated robot status and the MQTT commands.
+
+    python -m tests.util.jsoncodec --count 20000
+"""
+
+import json
+import time
+from typing import Any, Callable, List, Tuple
+
+import dacite
+import dataclasses
+
+from edge_control.util.json import dumps, from_dict
+
+
+class EncodeDataclasses(json.JSONEncoder):
+    def default(self, o: Any):
+        if dataclasses.is_dataclass(o) and not isinstance(o, type):
+            return dataclasses.asdict(o)
+        return super().default(o)
+
+
+def asdict_dumps(o: Any) -> str:
+    return json.dumps(o, cls=EncodeDataclasses)
+
+
+def status() -> dict:
+    from edge_control.arch.commands import CommandStatus
+    from edge_control.connections import ApiStatus, ClientStatus
+    from edge_control.gps.messages import GGA
+    from edge_control.gps.status import GpsStatus
+    from edge_control.models.messages import SitePosition
+    from edge_control.robot import RobotState
+
+    t = time.time()
+    GpsStatus.gga.set(GGA("$GPGGA,...", 1.0, 59.1, 10.2, 4, 12, 0.6, 30.0), t)
+    GpsStatus.site.set(SitePosition(1.0, 2.0, 4), t)
+    for counter in (GpsStatus.corrections, CommandStatus.written, CommandStatus.suppressed):
+        counter.inc(t, 5)
+    ApiStatus.clients.set([ClientStatus("('192.168.1.20', 51234)", 0, 0.0, 100, 3)] * 2, t)
+    return RobotState.as_dict(t)
+
+
+def run(name: str, fn: Callable[[Any], Any], items: List[Any]):
+    t0 = time.perf_counter()
+    for item in items:
+        fn(item)
+    elapsed = time.perf_counter() - t0
+    print(f"{name:24} {1e6 * elapsed / len(items):8.2f} us")
+
+
+def main():
+    import argparse
+
+    from edge_control.models import cdf
+    from edge_control.models.messages import LightsCommand
+    from edge_control.models.ptz import PanTiltZoomSpeed
+    from edge_control.models.state import State
+
+    parser = argparse.ArgumentParser(prog="tests.util.jsoncodec", description="JSON codec benchmark")
+    parser.add_argument("--count", type=int, default=20000, help="Messages per case")
+    args = parser.parse_args()
+
+    messages: List[Tuple[str, Any]] = [
+        ("State", State(1.234, -5.678, 0.5)),
+        ("cdf.Mission", cdf.Mission("1606489924746", 1606489924746, "Mow lawn", "Running")),
+        ("status", status()),
+    ]
+    for name, message in messages:
+        assert json.loads(dumps(message)).items() <= json.loads(asdict_dumps(message)).items()
+        run(f"asdict  {name}", asdict_dumps, [message] * args.count)
+        run(f"dumps   {name}", dumps, [message] * args.count)
+
+    commands = [
+        ("LightsCommand", LightsCommand, {"head": True, "strobe": False}),
+        ("PanTiltZoomSpeed", PanTiltZoomSpeed, {"pan": 0.5, "tilt": -0.2, "zoom": None}),
+    ]
+    for name, clz, data in commands:
+        assert from_dict(clz, data) == dacite.from_dict(clz, data)
+        run(f"dacite  {name}", lambda d: dacite.from_dict(clz, d), [data] * args.count)
+        run(f"decode  {name}", lambda d: from_dict(clz, d), [data] * args.count)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark the event loop serial port against aioserial on pseudo-terminal loopback:
+per-message latency from the emulated device to the reading task, and CPU usage,
+with line (GPS/STM32) and framed (Arduino) traffic on several devices at the same time.
+
+    python -m tests.util.serialport --devices 3 --rate 50 --duration 10
+"""
+
+import asyncio
+import statistics
+import threading
+import time
+from typing import List
+
+import aioserial
+
+from edge_control.arch.husqvarna.frame import frame, read_frames
+from edge_control.util.pty import PseudoTerminal
+from edge_control.util.serialport import SerialPort
+
+
+async def device_lines(pty: PseudoTerminal, rate: float, n: int):
+    for i in range(n):
+        pty.write(b"%d %.6f\n" % (i, time.time()))
+        await asyncio.sleep(1 / rate)
+
+
+async def device_frames(pty: PseudoTerminal, rate: float, n: int):
+    for i in range(n):
+        pty.write(frame(b"\x88" + int(time.time() * 1e6).to_bytes(8, "little")))
+        await asyncio.sleep(1 / rate)
+
+
+async def read_lines(port, n: int, latencies: List[float]):
+    for _ in range(n):
+        line = await port.readline_async()
+        latencies.append(time.time() - float(line.split()[1]))
+
+
+async def read_framed(port, n: int, latencies: List[float]):
+    i = 0
+    async for t, message in read_frames(port):
+        latencies.append(time.time() - int.from_bytes(message[1:], "little") * 1e-6)
+        i += 1
+        if i == n:
+            return
+
+
+async def commands(port, rate: float, n: int):
+    for i in range(n):
+        await port.write_async(b"m 100 0 1.0\n")
+        await asyncio.sleep(1 / rate)
+
+
+async def drain(pty: PseudoTerminal):
+    while True:
+        await pty.read()
+
+
+async def run(transport: str, devices: int, rate: float, duration: float):
+    n = int(rate * duration)
+    latencies: List[float] = []
+    ptys = [PseudoTerminal() for _ in range(2 * devices)]
+    if transport == "aioserial":
+        ports = [aioserial.AioSerial(pty.name, 115_200) for pty in ptys]
+    else:
+        ports = [SerialPort(pty.name, 115_200) for pty in ptys]
+
+    tasks = []
+    for i, (pty, port) in enumerate(zip(ptys, ports)):
+        if i % 2 == 0:
+            tasks += [device_lines(pty, rate, n), read_lines(port, n, latencies)]
+        else:
+            tasks += [device_frames(pty, rate, n), read_framed(port, n, latencies)]
+        tasks.append(commands(port, rate, n))
+    drains = [asyncio.create_task(drain(pty)) for pty in ptys]
+
+    cpu0 = time.process_time()
+    t0 = time.time()
+    threads = 0
+
+    async def count_threads():
+        nonlocal threads
+        while True:
+            threads = max(threads, threading.active_count())
+            await asyncio.sleep(0.1)
+
+    counter = asyncio.create_task(count_threads())
+    await asyncio.gather(*tasks)
+    cpu = time.process_time() - cpu0
+    elapsed = time.time() - t0
+    counter.cancel()
+    for task in drains:
+        task.cancel()
+    for port in ports:
+        port.close()
+    for pty in ptys:
+        pty.close()
+
+    latencies.sort()
+    p95 = latencies[int(0.95 * (len(latencies) - 1))]
+    print(
+        f"{transport:10} messages {len(latencies):6d}  cpu {100 * cpu / elapsed:5.1f}%  threads {threads:3d}  "
+        f"latency ms median {1000 * statistics.median(latencies):6.3f}  p95 {1000 * p95:6.3f}  "
+        f"max {1000 * latencies[-1]:6.3f}"
+    )
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="tests.util.serialport", description="Serial port benchmark")
+    parser.add_argument("--devices", type=int, default=3, help="Number of line and framed devices each")
+    parser.add_argument("--rate", type=float, default=50.0, help="Messages per second per device")
+    parser.add_argument("--duration", type=float, default=5.0, help="Duration per transport (s)")
+    args = parser.parse_args()
+    for transport in ("aioserial", "native"):
+        asyncio.run(run(transport, args.devices, args.rate, args.duration))
+
+
+if __name__ == "__main__":
+    main()
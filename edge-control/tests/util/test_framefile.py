@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from edge_control.util.framefile import Reader, Writer, convert
+
+
+def frames(n: int):
+    return [np.arange(48, dtype=np.uint16).reshape((6, 8)) + i for i in range(n)]
+
+
+@pytest.mark.parametrize("compression", [None, "zlib"])
+def test_write_read(tmp_path, compression):
+    file_name = str(tmp_path / "depth.frames")
+    with Writer(file_name, (6, 8), compression=compression, period=0.1) as writer:
+        for i, frame in enumerate(frames(10)):
+            writer.write(0.05 * i, frame)
+
+    with Reader(file_name) as reader:
+        assert len(reader) == 5
+        assert reader.shape == (6, 8)
+        assert reader.compression == compression
+        t, frame = reader[3]
+        assert t == pytest.approx(0.3)
+        assert (frame == frames(10)[6]).all()
+        assert reader.find(0.25) == 3
+        assert [t for t, _ in reader] == pytest.approx([0, 0.1, 0.2, 0.3, 0.4])
+
+
+def test_zero_copy(tmp_path):
+    file_name = str(tmp_path / "depth.frames")
+    with Writer(file_name, (6, 8)) as writer:
+        for i, frame in enumerate(frames(3)):
+            writer.write(i, frame)
+    reader = Reader(file_name)
+    t, frame = reader[2]
+    assert not frame.flags.owndata
+    assert not frame.flags.writeable
+    assert reader.frames.shape == (3, 6, 8)
+    del frame
+    reader.close()
+
+
+def test_decimation(tmp_path):
+    file_name = str(tmp_path / "depth.frames")
+    with Writer(file_name, (6, 8), decimation=2) as writer:
+        writer.write(0, frames(1)[0])
+    with Reader(file_name) as reader:
+        assert reader.decimation == 2
+        assert reader.shape == (3, 4)
+        assert (reader[0][1] == frames(1)[0][::2, ::2]).all()
+
+
+@pytest.mark.parametrize("compression", [None, "zlib"])
+def test_not_closed(tmp_path, compression):
+    # e.g. power loss while recording, partly written last frame
+    file_name = str(tmp_path / "depth.frames")
+    writer = Writer(file_name, (6, 8), compression=compression)
+    for i, frame in enumerate(frames(3)):
+        writer.write(i, frame)
+    writer.file.write(b"\1\2\3")
+    writer.flush()
+    with Reader(file_name) as reader:
+        assert len(reader) == 3
+        assert (reader[2][1] == frames(3)[2]).all()
+    writer.file.close()
+
+
+def test_convert(tmp_path):
+    src = str(tmp_path / "depth.bag")
+    with open(src, "wb") as f:
+        for i, frame in enumerate(frames(3)):
+            np.save(f, 1000 * i)
+            np.save(f, frame)
+    dst = str(tmp_path / "depth.frames")
+    convert(src, dst, compression="zlib")
+    with Reader(dst) as reader:
+        assert len(reader) == 3
+        t, frame = reader[1]
+        assert t == 1.0
+        assert (frame == frames(3)[1]).all()
@@ -0,0 +1,98 @@
+import enum
+import json
+from typing import Dict, List, Optional
+
+import numpy
+import pytest
+from dataclasses import dataclass, field
+
+from edge_control.models import cdf
+from edge_control.models.messages import LightsCommand
+from edge_control.models.ptz import PanTiltZoomSpeed
+from edge_control.models.state import State
+from edge_control.util.json import DecodeError, dumps, from_dict, loads
+
+
+class Color(enum.Enum):
+    red = 1
+    green = 2
+
+
+@dataclass
+class Point:
+    x: float
+    y: float
+    label: Optional[str] = None
+
+
+@dataclass
+class Path:
+    name: str
+    points: List[Point]
+    color: Color = Color.red
+    tags: Dict[str, int] = field(default_factory=dict)
+
+
+def test_dumps():
+    assert json.loads(dumps(State(1.0, 2.0, 0.5))) == {"x": 1.0, "y": 2.0, "theta": 0.5}
+    path = Path("p", [Point(1, 2), Point(3, 4.5, "end")], Color.green, {"a": 1})
+    assert json.loads(dumps({"path": path, "n": numpy.int64(3), "v": numpy.float32(0.5), "a": numpy.arange(3)})) == {
+        "path": {
+            "name": "p",
+            "points": [{"x": 1, "y": 2}, {"x": 3, "y": 4.5, "label": "end"}],
+            "color": 2,
+            "tags": {"a": 1},
+        },
+        "n": 3,
+        "v": 0.5,
+        "a": [0, 1, 2],
+    }
+    mission = cdf.Mission("1", 2, "name", "Running")
+    expected = dict(missionId="1", startTime=2, name="name", status="Running", fault="", endTime=0)
+    assert json.loads(dumps(mission)) == expected
+    with pytest.raises(TypeError):
+        dumps(object())
+
+
+def test_decode():
+    assert from_dict(LightsCommand, {"head": True}) == LightsCommand(True, None)
+    # int as float
+    assert loads('{"pan": 1, "tilt": 0.5, "zoom": null}', PanTiltZoomSpeed) == PanTiltZoomSpeed(1.0, 0.5, None)
+    path = Path("p", [Point(1, 2), Point(3, 4.5, "end")], Color.green, {"a": 1})
+    assert loads(dumps(path), Path) == path
+    assert from_dict(Path, {"name": "p", "points": []}) == Path("p", [])
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"head": "yes"},
+        {"head": 1},
+        [],
+    ],
+)
+def test_decode_invalid_lights(data):
+    with pytest.raises(DecodeError):
+        from_dict(LightsCommand, data)
+
+
+def test_decode_invalid():
+    with pytest.raises(DecodeError):
+        from_dict(Point, {"x": 1})
+    with pytest.raises(DecodeError):
+        from_dict(Point, {"x": True, "y": 1})
+    with pytest.raises(DecodeError):
+        from_dict(Path, {"name": "p", "points": [{"x": 1}]})
+    with pytest.raises(ValueError):
+        from_dict(Path, {"name": "p", "points": [], "color": 3})
+
+
+def test_decoder_failed():
+    @dataclass
+    class Unresolved:
+        x: "Undefined"  # type: ignore # noqa: F821
+
+    # fails again instead of recursing on the placeholder
+    for _ in range(2):
+        with pytest.raises(NameError):
+            from_dict(Unresolved, {"x": 1})
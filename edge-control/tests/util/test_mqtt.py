@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from edge_control.models.messages import LightsCommand
+from edge_control.util.mqtt import Dispatcher, json_decoder, matches
+
+
+def test_matches():
+    assert matches("mission/start", "mission/start")
+    assert matches("mission/+", "mission/start")
+    assert not matches("mission/+", "mission/start/now")
+    assert matches("mission/#", "mission/start/now")
+    assert matches("#", "estop/cmd")
+    assert not matches("mission/+", "estop/cmd")
+    assert not matches("mission/start/+", "mission/start")
+
+
+@pytest.mark.asyncio
+async def test_dispatch():
+    handled = []
+    release = asyncio.Event()
+
+    async def slow(client, topic, msg):
+        await release.wait()
+        handled.append((topic, msg))
+
+    async def handle(client, topic, msg):
+        handled.append((topic, msg))
+
+    dispatcher = Dispatcher()
+    dispatcher.register("mission/+", slow)
+    dispatcher.register("mission/abort", handle)
+    dispatcher.register("cmd/lights", handle, json_decoder(LightsCommand))
+    dispatcher.register("estop/cmd", handle, fast=True)
+
+    assert await dispatcher.dispatch(None, "mission/start", b'{"name": "a"}')
+    assert await dispatcher.dispatch(None, "mission/start", b'{"name": "b"}')
+    assert await dispatcher.dispatch(None, "cmd/lights", b'{"head": true, "strobe": false}')
+    assert not await dispatcher.dispatch(None, "cmd/lights", b'{"head": 1}')
+    assert not await dispatcher.dispatch(None, "unknown", b"{}")
+    # fast path, while mission start is busy
+    assert await dispatcher.dispatch(None, "estop/cmd", b'{"signal": "STOP"}')
+    assert handled == [("estop/cmd", {"signal": "STOP"})]
+    await asyncio.sleep(0.01)
+    assert handled[-1] == ("cmd/lights", LightsCommand(True, False))
+
+    # in order per topic, exact topic before wildcard
+    await dispatcher.dispatch(None, "mission/abort", b"{}")
+    await asyncio.sleep(0.01)
+    assert handled[-1] == ("mission/abort", {})
+    release.set()
+    await asyncio.sleep(0.01)
+    assert handled[-2:] == [("mission/start", {"name": "a"}), ("mission/start", {"name": "b"})]
+    assert (dispatcher.received, dispatcher.invalid) == (6, 1)
+    dispatcher.close()
+    await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_clear():
+    release = asyncio.Event()
+
+    async def handle(client, topic, msg):
+        await release.wait()
+
+    dispatcher = Dispatcher(limit=2)
+    dispatcher.register("robot_cmd/twist_cmd", handle)
+    await dispatcher.dispatch(None, "robot_cmd/twist_cmd", b"{}")
+    await asyncio.sleep(0)
+    # first in handler, one dropped as full
+    for _ in range(3):
+        await dispatcher.dispatch(None, "robot_cmd/twist_cmd", b"{}")
+    assert dispatcher.dropped == 1
+    assert dispatcher.clear("robot_cmd/#") == 2
+    dispatcher.close()
+    await asyncio.sleep(0)
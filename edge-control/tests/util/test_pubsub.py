@@ -42,3 +42,17 @@ async def test_timeout():
     task = asyncio.create_task(sub())
     received = await task
     assert received is None
+
+
+@pytest.mark.asyncio
+async def test_supersedes():
+    def supersedes(o: int, pending: int) -> bool:
+        # negative flushes pending positive
+        return o < 0 and pending > 0
+
+    topic = pubsub.Topic[int]("topic", supersedes)
+    queue = topic.subscription()
+    for o in (1, 2, 0, 3, -1, 4):
+        await topic.publish(o)
+    assert [queue.get_nowait() for _ in range(queue.qsize())] == [0, -1, 4]
+    assert topic.flushed == 3
@@ -0,0 +1,32 @@
+import asyncio
+
+import pytest
+
+from edge_control.util.pty import PseudoTerminal
+from edge_control.util.serialport import SerialPort
+
+
+@pytest.mark.asyncio
+async def test_read():
+    with PseudoTerminal() as pty, SerialPort(pty.name) as port:
+        pty.write(b"Time 12.5\nBat")
+        assert await port.readline_async() == b"Time 12.5\n"
+        assert port.in_waiting == 3
+        line = asyncio.create_task(port.readline_async())
+        await asyncio.sleep(0.01)
+        assert not line.done()
+        pty.write(b"tery 11.9\n\xde\x01")
+        assert await line == b"Battery 11.9\n"
+        assert await port.read_async(2) == b"\xde\x01"
+
+
+@pytest.mark.asyncio
+async def test_write():
+    with PseudoTerminal() as pty, SerialPort(pty.name) as port:
+        data = bytes(range(256)) * 64
+        write = asyncio.create_task(port.write_async(data))
+        received = b""
+        while len(received) < len(data):
+            received += await pty.read(4096)
+        assert await write == len(data)
+        assert received == data
@@ -0,0 +1,25 @@
+import numpy as np
+
+from edge_control.util.shmring import FrameRing
+
+
+def test_ring():
+    with FrameRing((4, 6), np.uint16, slots=3) as ring:
+        assert ring.latest() is None
+        for i in range(1, 6):
+            assert ring.write(0.1 * i, np.full((4, 6), i, dtype=np.uint16)) == i
+        seq, t, frame = ring.latest()
+        assert seq == 5
+        assert t == 0.5
+        assert (frame == 5).all()
+        # overwritten
+        assert ring.read(2) is None
+        t, frame = ring.read(3)
+        assert (frame == 3).all()
+
+        reader = FrameRing((4, 6), np.uint16, slots=3, name=ring.name)
+        ring.write(0.6, np.full((4, 6), 6, dtype=np.uint16))
+        seq, t, frame = reader.latest()
+        assert seq == 6
+        assert (frame == 6).all()
+        reader.close()
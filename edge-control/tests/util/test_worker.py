@@ -0,0 +1,53 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from edge_control.util.worker import LatestWorker
+
+
+@pytest.mark.asyncio
+async def test_latest():
+    release = threading.Event()
+    threads = set()
+
+    def square(x: int) -> int:
+        threads.add(threading.current_thread())
+        release.wait()
+        return x * x
+
+    worker = LatestWorker(square, "square")
+    results = worker.results()
+    first = asyncio.create_task(results.__anext__())
+    await asyncio.sleep(0.01)
+    worker.submit(1.0, 1)
+    await asyncio.sleep(0.01)
+    # while busy with 1, 2 and 3 are replaced by 4
+    worker.submit(2.0, 2)
+    worker.submit(3.0, 3)
+    worker.submit(4.0, 4)
+    release.set()
+    assert await first == (1.0, 1)
+    assert await results.__anext__() == (4.0, 16)
+    assert worker.submitted == 4
+    assert worker.dropped == 2
+    assert worker.latency > 0
+    assert threading.current_thread() not in threads
+    await results.aclose()
+
+
+@pytest.mark.asyncio
+async def test_failed():
+    worker = LatestWorker(lambda x: 1 / x, "inverse")
+    results = worker.results()
+    first = asyncio.create_task(results.__anext__())
+    await asyncio.sleep(0.01)
+    worker.submit(1.0, 0)
+    t0 = time.time()
+    while not worker.failed and time.time() < t0 + 1:
+        await asyncio.sleep(0.01)
+    worker.submit(2.0, 2)
+    assert await first == (2.0, 0.5)
+    assert worker.failed == 1
+    await results.aclose()
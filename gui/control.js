@@ -41,6 +41,13 @@
 
     var s;
 
+    // trail points [x, y] received, kept over reconnects
+    const TrailResolution = 0.1; // m
+    var site_map;
+    var trail = [];
+    var trail_session = null;
+    var trail_cursor = 0;
+
     function post(topic, message) {
       // console.log("post", s)
       console.log("post", topic, message);
@@ -61,6 +68,42 @@
         post("mission/abort", null);
     }
 
+    // status from keyframe and deltas, see edge_control.snapshot
+    var status_decoded;
+    var status_seq = 0;
+
+    function status_decode(m) {
+      if (m.keyframe) {
+        status_decoded = m.status;
+      } else if (!status_decoded || m.seq != status_seq + 1) {
+        // wait for keyframe
+        status_decoded = undefined;
+        return undefined;
+      } else {
+        for (const [path, value] of Object.entries(m.set)) {
+          const [section, field] = path.split(".", 2);
+          if (field === undefined) {
+            status_decoded[section] = value;
+          } else {
+            status_decoded[section] = status_decoded[section] || {};
+            status_decoded[section][field] = value;
+          }
+        }
+        for (const path of m.unset) {
+          const [section, field] = path.split(".", 2);
+          if (field === undefined || !status_decoded[section]) {
+            delete status_decoded[section];
+          } else {
+            delete status_decoded[section][field];
+            if (Object.keys(status_decoded[section]).length == 0)
+              delete status_decoded[section];
+          }
+        }
+      }
+      status_seq = m.seq;
+      return status_decoded;
+    }
+
     function connect() {
       try {
         const host = "ws://" + window.location.hostname + ":18888";
@@ -78,6 +121,10 @@
         s.onopen = function (e) {
           console.log("Websocket open");
           $("#websocket").text("Open");
+          // status as keyframes and deltas
+          post("status", {delta: true});
+          // only the trail points since the last point received
+          post("trail", {resolution: TrailResolution, session: trail_session, cursor: trail_cursor});
           heartbeatTimer = setInterval(() => $("#heartbeat").prop("checked") && heartbeat(), 1000);
         };
         
@@ -94,22 +141,40 @@
           let envelope = JSON.parse(message);
 
           if (envelope.topic == "map") {
-              let map = envelope.message;
-              console.log("map", map);
+              site_map = envelope.message;
+              console.log("map", site_map);
               canvas_clear();
-              drawBackground(map);
+              drawBackground(site_map);
+              drawTrail(trail);
               return;
           }
 
-          if (envelope.topic == "robot_tracking") {
+          if (envelope.topic == "trail") {
               let message = envelope.message;
-              if (Array.isArray(message)) {
-                  // Draw all previous positions in current mission when connection is opened
-                  drawTrail(message);
+              if (message.reset) {
+                  // new session, drop the trail from the previous session
+                  trail = [];
+                  canvas_clear();
+                  drawBackground(site_map);
               }
-              else {
-                  let state = message;
-                  robot_at(state.x, state.y, state.theta);
+              trail_session = message.session;
+              trail_cursor = message.cursor;
+              trail.push(...message.points);
+              drawTrail(message.points);
+              return;
+          }
+
+          if (envelope.topic == "robot_tracking") {
+              let state = envelope.message;
+              robot_at(state.x, state.y, state.theta);
+              return;
+          }
+
+          if (envelope.topic == "status/delta") {
+              let status = status_decode(envelope.message);
+              if (status) {
+                  robot_status = status;
+                  $("#status").text(JSON.stringify(robot_status, null, 2));
               }
               return;
           }
@@ -149,8 +149,6 @@ function drawGrid(ctx, delta, width) {
 }
 
 function robot_at(x, y, angle) {
-  trail_at(x, y);
-
   layer2.save();
   layer2.resetTransform();
   layer2.clearRect(0, 0, width, height);
@@ -222,8 +220,9 @@ function drawBackground(map) {
 
 
 function drawTrail(trail) {
+    // trail is [x, y] points
     console.log("trail", trail.length);
-    trail.forEach(state => trail_at(state.x, state.y));
+    trail.forEach(p => trail_at(p[0], p[1]));
 }
 
 